@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import re
+
+from outbound import BULK
+from webhooks import webhooks
+
+# -------------------- Bulk Announcer --------------------
+# Packs announcement lines into as few messages as possible and sends them one by
+# one (callers pass an outbound-queue send, which paces the channel). Progress is
+# saved after every message, so a failed run resumes where it stopped the next
+# time the same job is started.
+
+MESSAGE_LIMIT = 2000
+MENTION_LIMIT = 50           # keep pings per message well below anti-spam thresholds
+STATE_FILE = "announce_state.json"
+
+MENTION_PATTERN = re.compile(r"<@[!&]?\d+>")
+
+def count_mentions(text):
+    return len(MENTION_PATTERN.findall(text))
+
+def split_long_line(line, limit):
+    """Break a single oversized line on spaces so no chunk exceeds the limit."""
+    parts, current = [], ""
+    for word in line.split(" "):
+        while len(word) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(word[:limit])
+            word = word[limit:]
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) > limit:
+            parts.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+def pack_lines(lines, header=None, limit=MESSAGE_LIMIT, max_mentions=MENTION_LIMIT):
+    """Greedily pack lines into messages under the character and mention limits."""
+    chunks = []
+    current = header or ""
+    mentions = count_mentions(current)
+
+    for line in lines:
+        for piece in split_long_line(line, limit) if len(line) > limit else [line]:
+            piece_mentions = count_mentions(piece)
+            candidate = f"{current}\n{piece}" if current else piece
+            if current and (len(candidate) > limit or mentions + piece_mentions > max_mentions):
+                chunks.append(current)
+                current, mentions = piece, piece_mentions
+            else:
+                current, mentions = candidate, mentions + piece_mentions
+    if current:
+        chunks.append(current)
+    return chunks
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return {}
+
+def save_state(state):
+    tmp = f"{STATE_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+
+class BulkAnnouncer:
+    def __init__(self, job_id, chunks, send, progress=None, channel_id=None):
+        self.job_id = job_id
+        self.chunks = chunks
+        self.channel_id = channel_id
+        self.send = send            # async callable taking the message content
+        self.progress = progress    # optional async callable(sent, total)
+        self.digest = hashlib.sha1("\x00".join(chunks).encode()).hexdigest()
+        self.sent = 0
+        self.resumed = False
+
+    def _resume_point(self):
+        entry = load_state().get(self.job_id)
+        if entry and entry.get("digest") == self.digest:
+            return min(entry.get("sent", 0), len(self.chunks))
+        return 0
+
+    def _record(self, done=False):
+        state = load_state()
+        if done:
+            state.pop(self.job_id, None)
+        else:
+            state[self.job_id] = {
+                "digest": self.digest,
+                "sent": self.sent,
+                "channel_id": self.channel_id,
+                "chunks": self.chunks
+            }
+        save_state(state)
+
+    async def run(self):
+        """Send the remaining chunks. Returns the number sent; re-raises after saving progress on failure."""
+        self.sent = self._resume_point()
+        self.resumed = self.sent > 0
+        if self.resumed:
+            print(f"[📢] Resuming {self.job_id} at {self.sent}/{len(self.chunks)}")
+
+        try:
+            while self.sent < len(self.chunks):
+                await self.send(self.chunks[self.sent])
+                self.sent += 1
+                self._record()
+                if self.progress:
+                    await self.progress(self.sent, len(self.chunks))
+        except Exception as e:
+            print(f"[❌] Announcement {self.job_id} stopped at {self.sent}/{len(self.chunks)}: {e}")
+            self._record()
+            raise
+
+        self._record(done=True)
+        return self.sent
+
+def unfinished_jobs():
+    return {job_id: entry for job_id, entry in load_state().items() if entry.get("sent", 0) < len(entry.get("chunks", []))}
+
+async def resume_unfinished(bot, progress=None):
+    """Restart every saved job from where it stopped. Returns (job_id, sent, total) per job."""
+    results = []
+    for job_id, entry in unfinished_jobs().items():
+        channel = bot.get_channel(int(entry["channel_id"])) if entry.get("channel_id") else None
+        if not channel:
+            print(f"[⚠️] Cannot resume {job_id}: channel not found.")
+            continue
+        send = lambda content, channel=channel: webhooks.announce(channel, content, priority=BULK)
+        job = BulkAnnouncer(job_id, entry["chunks"], send, progress, channel.id)
+        try:
+            await job.run()
+        except Exception:
+            pass
+        results.append((job_id, job.sent, len(job.chunks)))
+    return results
@@ -0,0 +1,206 @@
+import re
+from datetime import datetime, timedelta
+
+# -------------------- Team Availability Bitmaps --------------------
+# Each team's week is a 672-bit integer: one bit per 15-minute slot, Monday 00:00 = bit 0.
+# Times are server-local, the same clock SubmitProposalView builds proposals with.
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+WEEK_MASK = (1 << WEEK_SLOTS) - 1
+
+AVAILABILITY_SHEET = "Availability"
+AVAILABILITY_HEADERS = ["Team Name", "Slots"]
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# team -> bitmap, loaded from the sheet once and updated on every save
+_bitmaps = None
+
+def get_or_create_sheet(spreadsheet, name, headers):
+    try:
+        sheet = spreadsheet.worksheet(name)
+    except Exception:
+        sheet = spreadsheet.add_worksheet(title=name, rows="100", cols=str(len(headers)))
+        sheet.append_row(headers)
+    return sheet
+
+# --- Parsing ---
+
+def parse_time(text):
+    text = text.strip().lower()
+    found = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", text)
+    if not found:
+        raise ValueError(f"Bad time '{text}'")
+    hour, minute, period = int(found.group(1)), int(found.group(2) or 0), found.group(3)
+    if period == "pm" and hour != 12:
+        hour += 12
+    elif period == "am" and hour == 12:
+        hour = 0
+    if hour == 24 and minute == 0:
+        return SLOTS_PER_DAY
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Bad time '{text}'")
+    return (hour * 60 + minute) // SLOT_MINUTES
+
+def parse_days(text):
+    text = text.strip().lower()
+    if text in ("daily", "every day", "all"):
+        return list(range(7))
+    if text in ("weekdays",):
+        return list(range(5))
+    if text in ("weekends",):
+        return [5, 6]
+    if "-" in text:
+        start, end = (DAYS.index(part.strip()[:3]) for part in text.split("-", 1))
+        return [(start + i) % 7 for i in range((end - start) % 7 + 1)]
+    return [DAYS.index(text[:3])]
+
+def parse_availability(text):
+    """Parse entries like 'Mon 18:00-22:00, Sat-Sun 12pm-4pm, weekdays 8pm-11pm' into a bitmap."""
+    bits = 0
+    for entry in re.split(r"[,\n;]+", text):
+        entry = entry.strip()
+        if not entry:
+            continue
+        found = re.fullmatch(r"([a-z\- ]+?)\s+([\d:apm ]+)\s*-\s*([\d:apm ]+)", entry.lower())
+        if not found:
+            raise ValueError(f"Could not read '{entry}'")
+        try:
+            days = parse_days(found.group(1))
+        except ValueError:
+            raise ValueError(f"Unknown day in '{entry}'")
+        start, end = parse_time(found.group(2)), parse_time(found.group(3))
+        length = (end - start) % SLOTS_PER_DAY or SLOTS_PER_DAY  # ranges may run past midnight
+        for day in days:
+            first = day * SLOTS_PER_DAY + start
+            run = ((1 << length) - 1) << first
+            bits |= (run | (run >> WEEK_SLOTS)) & WEEK_MASK
+    return bits
+
+def describe(bits):
+    """Human-readable ranges, e.g. 'Mon 18:00-22:00'."""
+    parts = []
+    slot = 0
+    while slot < WEEK_SLOTS:
+        if not bits >> slot & 1:
+            slot += 1
+            continue
+        start = slot
+        while slot < WEEK_SLOTS and bits >> slot & 1 and (slot == start or slot % SLOTS_PER_DAY):
+            slot += 1
+        day, s, e = start // SLOTS_PER_DAY, start % SLOTS_PER_DAY, (slot - 1) % SLOTS_PER_DAY + 1
+        fmt = lambda x: f"{x * SLOT_MINUTES // 60:02d}:{x * SLOT_MINUTES % 60:02d}"
+        parts.append(f"{DAYS[day].title()} {fmt(s)}-{fmt(e)}")
+    return ", ".join(parts) if parts else "No availability set"
+
+# --- Storage ---
+
+def load_bitmaps(spreadsheet):
+    global _bitmaps
+    if _bitmaps is None:
+        sheet = get_or_create_sheet(spreadsheet, AVAILABILITY_SHEET, AVAILABILITY_HEADERS)
+        _bitmaps = {}
+        for row in sheet.get_all_values()[1:]:
+            if len(row) >= 2 and row[0] and row[1]:
+                try:
+                    _bitmaps[row[0]] = int(row[1], 16)
+                except ValueError:
+                    print(f"⚠️ Bad availability bitmap for {row[0]}")
+    return _bitmaps
+
+def save_bitmap(spreadsheet, team_name, bits):
+    bitmaps = load_bitmaps(spreadsheet)
+    sheet = get_or_create_sheet(spreadsheet, AVAILABILITY_SHEET, AVAILABILITY_HEADERS)
+    value = format(bits, "x")
+    for idx, row in enumerate(sheet.get_all_values()[1:], start=2):
+        if row and row[0] == team_name:
+            sheet.update(f"B{idx}", [[value]])
+            break
+    else:
+        sheet.append_row([team_name, value])
+    bitmaps[team_name] = bits
+
+def get_bitmap(spreadsheet, team_name):
+    return load_bitmaps(spreadsheet).get(team_name, 0)
+
+# --- Solver ---
+
+def rotate_right(bits, k):
+    k %= WEEK_SLOTS
+    return ((bits >> k) | (bits << (WEEK_SLOTS - k))) & WEEK_MASK
+
+def start_slots(bits, length):
+    """Bits set where `length` consecutive free slots begin (wrapping over Sunday night)."""
+    starts = bits
+    for k in range(1, length):
+        starts &= rotate_right(bits, k)
+    return starts
+
+def slot_of(dt):
+    return dt.weekday() * SLOTS_PER_DAY + (dt.hour * 60 + dt.minute) // SLOT_MINUTES
+
+def upcoming_starts(starts, now, lead_minutes=60, horizon_days=14):
+    """Yield datetimes for set start bits in chronological order from now + lead."""
+    earliest = now + timedelta(minutes=lead_minutes)
+    base = earliest.replace(second=0, microsecond=0)
+    base -= timedelta(minutes=base.minute % SLOT_MINUTES)
+    if base < earliest:
+        base += timedelta(minutes=SLOT_MINUTES)
+    rotated = rotate_right(starts, slot_of(base))  # bit i is now "i slots after base"
+    limit = horizon_days * SLOTS_PER_DAY
+    week = 0
+    while rotated and week * WEEK_SLOTS < limit:
+        remaining = rotated
+        while remaining:
+            low = (remaining & -remaining).bit_length() - 1
+            total = week * WEEK_SLOTS + low
+            if total >= limit:
+                return
+            yield base + timedelta(minutes=total * SLOT_MINUTES)
+            remaining &= remaining - 1
+        week += 1
+
+def suggest_slots(bits_a, bits_b, match_minutes=60, count=5, now=None, lead_minutes=60):
+    """Soonest non-overlapping start times both teams are free for a full match."""
+    now = now or datetime.now()
+    length = max(1, match_minutes // SLOT_MINUTES)
+    starts = start_slots(bits_a & bits_b, length)
+    picks = []
+    for dt in upcoming_starts(starts, now, lead_minutes):
+        if picks and dt - picks[-1] < timedelta(minutes=match_minutes):
+            continue
+        picks.append(dt)
+        if len(picks) >= count:
+            break
+    return picks
+
+def assign_week(matchups, bitmaps, match_minutes=60, now=None, lead_minutes=60):
+    """Assign one start time to every (team_a, team_b, match_id) at once.
+
+    Matches with the fewest shared slots go first, and a team is never booked for two
+    overlapping matches. Returns {match_id: datetime or None}.
+    """
+    now = now or datetime.now()
+    length = max(1, match_minutes // SLOT_MINUTES)
+    busy = {}
+
+    def options(team_a, team_b):
+        free = bitmaps.get(team_a, 0) & bitmaps.get(team_b, 0)
+        return start_slots(free, length)
+
+    ordered = sorted(matchups, key=lambda m: bin(options(m[0], m[1])).count("1"))
+    assigned = {}
+    for team_a, team_b, match_id in ordered:
+        free = bitmaps.get(team_a, 0) & bitmaps.get(team_b, 0) & ~busy.get(team_a, 0) & ~busy.get(team_b, 0)
+        starts = start_slots(free & WEEK_MASK, length)
+        choice = next(upcoming_starts(starts, now, lead_minutes, horizon_days=7), None)
+        assigned[match_id] = choice
+        if choice:
+            first = slot_of(choice)
+            block = ((1 << length) - 1) << first
+            block = (block | (block >> WEEK_SLOTS)) & WEEK_MASK
+            busy[team_a] = busy.get(team_a, 0) | block
+            busy[team_b] = busy.get(team_b, 0) | block
+    return assigned
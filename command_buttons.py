@@ -1,9 +1,24 @@
 import discord
 from discord.ui import View, Button, Modal, TextInput
-import json
 import re
 import pytz
-from datetime import datetime, timedelta, timezone
+import standings
+import teamroles
+import availability
+import delivery
+import payloads
+import search as search_index
+from locks import locks, team_key, player_key, match_key, sheet_key
+from roster import roster
+from rowguard import GuardedSheet, RowConflict
+from settings import settings
+from outbound import outbound
+from janitor import janitor
+from pending import pending
+from reminders import reminders
+from scheduler import scheduler
+from webhooks import webhooks
+from datetime import datetime, timezone
 
 # Helper function to extract user ID from "Name (ID)"
 def extract_user_id(profile_string):
@@ -33,8 +48,682 @@ async def safe_send(interaction, content, ephemeral=True):
     except discord.NotFound:
         print("❗ Tried to send to an expired interaction.")
 
+# -------------------- PENDING PROPOSALS --------------------
+# Prompts that wait on the other captain: match proposals, score confirmations and
+# join requests. No View object is kept per prompt: each button's custom_id carries
+# the prompt's state (see payloads.py) and one dynamic item registered at startup
+# rebuilds the prompt on click. The pending store tracks deadlines and decides who
+# gets to act; expiry runs from the shared scheduler instead of a per-View timer.
+
+def pending_ttl():
+    return settings.proposal_timeout_minutes * 60
+
+def fallback_channel_ttl():
+    # A little past the prompt's own expiry, which normally removes the channel first
+    return pending_ttl() + 60
+
+async def notify_user(bot, user_id, content):
+    """DM a user by id; users who left or closed their DMs are skipped."""
+    try:
+        user = bot.get_user(int(user_id)) or await bot.fetch_user(int(user_id))
+    except discord.NotFound:
+        return
+    await delivery.router.notify(user, content)
+
+def delete_prompt(bot, record, channel_prefix=None):
+    """Remove an expired prompt: its private fallback channel if it had one, otherwise the message."""
+    if not record.channel_id:
+        return
+    channel = bot.get_channel(record.channel_id)
+    if channel_prefix and delivery.is_fallback(channel, channel_prefix):
+        janitor.release(channel)
+    elif record.message_id:
+        outbound.delete(bot.get_partial_messageable(record.channel_id).get_partial_message(record.message_id))
+
+class PromptButton(discord.ui.DynamicItem[discord.ui.Button], template=r"p:(?P<code>[a-z])(?P<action>\d):(?P<data>.+)|pending:(?P<key>[0-9a-f]+):(?P<index>\d)"):
+    """Any prompt button. Also answers the "pending:<key>:<n>" ids of prompts posted before payload ids."""
+    panel = None   # LeaguePanel the prompts act through; set by setup_prompts()
+
+    def __init__(self, custom_id, label=None, style=discord.ButtonStyle.secondary):
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=custom_id))
+        self.match = None
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        button = cls(item.custom_id, label=item.label, style=item.style)
+        button.match = match
+        return button
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.match["code"]:
+            kind, action = payloads.CODE_KINDS[self.match["code"]], int(self.match["action"])
+            key, payload = payloads.decode(kind, self.match["data"])
+        else:
+            kind, action, key, payload = None, int(self.match["index"]), self.match["key"], None
+
+        if payload is None:
+            record = pending.get(key)
+            if record is None:
+                await safe_send(interaction, "❗ This prompt was already answered or has expired.", ephemeral=True)
+                return
+            kind, payload = record.kind, record.payload
+
+        prompt_cls = PROMPTS[kind]
+        prompt = prompt_cls(self.panel, key, **payload)
+        await getattr(prompt, prompt_cls.buttons[action][0])(interaction)
+
+class PendingPrompt:
+    kind = None
+    buttons = []   # (method, label, style), in button order
+
+    @classmethod
+    def open(cls, payload):
+        """Store a new prompt and build its buttons. Returns (key, view) ready to send."""
+        key = pending.add(cls.kind, payload, pending_ttl())
+        data = payloads.encode(cls.kind, key, payload)
+        view = View(timeout=None)
+        for action, (_, label, style) in enumerate(cls.buttons):
+            view.add_item(PromptButton(payloads.custom_id(cls.kind, action, data), label=label, style=style))
+        return key, view
+
+class MatchProposalPrompt(PendingPrompt):
+    kind = "match"
+    buttons = [
+        ("accept", "✅ Accept", discord.ButtonStyle.success),
+        ("decline", "❌ Decline", discord.ButtonStyle.danger),
+    ]
+
+    def __init__(self, parent, key, team_a, team_b, proposed_date, match_id, match_type="assigned", week_number=None, proposed_ts=None):
+        self.parent = parent
+        self.key = key
+        self.team_a = team_a
+        self.team_b = team_b
+        self.proposed_date = proposed_date
+        self.match_id = match_id
+        self.match_type = match_type
+        self.week_number = week_number
+        self.proposed_datetime = datetime.fromtimestamp(proposed_ts)
+
+    @staticmethod
+    def payload(team_a, team_b, proposed_date, match_id, match_type, week_number, proposed_datetime):
+        return {
+            "team_a": team_a, "team_b": team_b, "proposed_date": proposed_date,
+            "match_id": match_id, "match_type": match_type, "week_number": week_number,
+            "proposed_ts": int(proposed_datetime.timestamp()),
+        }
+
+    async def accept(self, interaction: discord.Interaction):
+        # ✅ Serialize accepts per match; whoever claims the stored proposal first acts on it
+        async with locks.hold(match_key(self.match_id)):
+            if not pending.claim(self.key):
+                await safe_send(interaction, "❗ This proposal was already answered or has expired.", ephemeral=True)
+                return
+            await self.confirm(interaction)
+
+    async def confirm(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)  # ✅ prevent timeout
+
+        discord_ts = int(self.proposed_datetime.timestamp())
+        discord_time_fmt = f"<t:{discord_ts}:f>"
+        discord_relative = f"<t:{discord_ts}:R>"
+
+        # Add to scheduled sheet
+        self.parent.scheduled_sheet.append_row([self.match_id, self.team_a, self.team_b, self.proposed_date])
+        reminders.add(self.match_id, self.team_a, self.team_b, self.proposed_date)
+
+        # Add to Matches if it's a challenge
+        if self.match_type == "challenge":
+            self.parent.matches_sheet.append_row([
+                self.match_id, self.team_a, self.team_b,
+                self.proposed_date, self.proposed_date,
+                "Scheduled", "", "", ""
+            ])
+
+        # Update existing Matches row
+        match_sheet = get_or_create_sheet(
+            self.parent.spreadsheet, "Matches",
+            ["Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date", "Status", "Winner", "Loser", "Proposed By"]
+        )
+
+        wanted = self.match_id.strip().lower()
+        updated = GuardedSheet(match_sheet).update_where(
+            lambda v: v[0].strip().lower() == wanted,
+            lambda v: v[:3] + [self.proposed_date, self.proposed_date, "Scheduled"] + v[6:]
+        )
+        if updated:
+            print(f"[✅] Updated dates and status for match {self.match_id}")
+        else:
+            print(f"[⚠️] Match ID {self.match_id} not found in Matches sheet")
+
+        msg = (
+            f"✅ **Match Accepted:** `{self.team_a} vs {self.team_b}`\n"
+            f"🕓 Scheduled for {discord_time_fmt} ({discord_relative})"
+        )
+        await interaction.followup.send(msg, ephemeral=True)  # ✅ safe after defer()
+
+        # Send to scheduled match channel
+        match_channel = self.parent.bot.get_channel(settings.scheduled_channel_id)
+        if match_channel:
+            match_type_str = "Challenge Match" if self.match_type == "challenge" else f"Assigned Match (Week {self.week_number})"
+
+            embed = discord.Embed(
+                title="📅 Match Scheduled",
+                description=(
+                    f"**{self.team_a}** vs **{self.team_b}**\n"
+                    f"🕓 {discord_time_fmt} ({discord_relative})\n"
+                    f"🏷️ {match_type_str}"
+                ),
+                color=discord.Color.green()
+            )
+
+            mentions_a = roster.mentions(self.team_a)
+            mentions_b = roster.mentions(self.team_b)
+
+            await webhooks.announce(
+                match_channel,
+                content=f"{mentions_a} vs {mentions_b}",
+                embed=embed
+            )
+
+        # Clean up message & channel in the background
+        if interaction.message:
+            outbound.delete(interaction.message)
+        if delivery.is_fallback(interaction.channel, "proposed-match"):
+            janitor.release(interaction.channel)
+
+    async def decline(self, interaction: discord.Interaction):
+        if not pending.claim(self.key):
+            await safe_send(interaction, "❗ This proposal was already answered or has expired.", ephemeral=True)
+            return
+        await interaction.response.send_message("❌ Match proposal declined.", ephemeral=True)
+
+        # ✅ Remove from Proposed Matches
+        GuardedSheet(self.parent.proposed_sheet).delete_where(lambda row: (
+            row[0] == self.team_a and
+            row[1] == self.team_b and
+            row[3] == self.proposed_date
+        ))
+
+        # ✅ Remove from Challenge Matches if it was a challenge
+        if self.match_type == "challenge":
+            removed = GuardedSheet(self.parent.challenge_sheet).delete_where(lambda row: (
+                row[2] == self.team_a and
+                row[3] == self.team_b and
+                row[5] == self.proposed_date
+            ))
+            if removed:
+                print(f"[🗑️] Challenge match declined, removed from sheet: {removed}")
+
+        # Delete original message if in channel (safe check)
+        if interaction.message:
+            outbound.delete(interaction.message)
+
+        # Delete channel if it was a private proposed match channel
+        if delivery.is_fallback(interaction.channel, "proposed-match"):
+            janitor.release(interaction.channel)
+    
+    @staticmethod
+    async def expire(parent, record):
+        match_id = record.payload["match_id"]
+
+        # ✅ Remove from Proposed Match sheet by match ID
+        wanted = match_id.strip().lower()
+        if GuardedSheet(parent.proposed_sheet).delete_where(lambda row: row[0].strip().lower() == wanted):
+            print(f"[⌛] Match {match_id} auto-removed from Proposed Match sheet after timeout.")
+
+        # ✅ Remove from Challenge Match sheet if it was a challenge match
+        if record.payload["match_type"] == "challenge":
+            if GuardedSheet(parent.challenge_sheet).delete_where(lambda row: row[1].strip().lower() == wanted):
+                print(f"[⌛] Challenge match {match_id} removed from Challenge Matches sheet after timeout.")
+
+        # ✅ Delete the proposal message, or the fallback private channel it was posted in
+        delete_prompt(parent.bot, record, "proposed-match")
+
+class ScoreConfirmPrompt(PendingPrompt):
+    kind = "score"
+    buttons = [
+        ("accept", "✅ Accept Scores", discord.ButtonStyle.green),
+        ("deny", "❌ Deny Scores", discord.ButtonStyle.red),
+    ]
+
+    def __init__(self, parent, key, match, map_scores, proposer_id):
+        self.parent = parent
+        self.key = key
+        self.match = match
+        self.map_scores = map_scores
+        self.proposer_id = proposer_id
+
+    @staticmethod
+    def payload(match, map_scores, proposer_id):
+        return {"match": match, "map_scores": map_scores, "proposer_id": proposer_id}
+
+    async def accept(self, interaction: discord.Interaction):
+        # ✅ Both teams' ratings and the leaderboard sort change together; hold them all
+        keys = [
+            match_key(self.match.get("match_id", "challenge")),
+            team_key(self.match["team1"]),
+            team_key(self.match["team2"]),
+            sheet_key("Leaderboard"),
+        ]
+        async with locks.hold(*keys):
+            if not pending.claim(self.key):
+                await safe_send(interaction, "❗ These scores were already answered or have expired.", ephemeral=True)
+                return
+            await self.finalize(interaction)
+
+    async def finalize(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        from match import update_team_rating 
+        # Calculate totals and maps won
+        map_scores = [(m["gamemode"], int(m["team1_score"]), int(m["team2_score"])) for m in self.map_scores]
+        total_a = sum([score[1] for score in map_scores])  # Team A scores
+        total_b = sum([score[2] for score in map_scores])  # Team B scores
+        maps_won_a = sum(1 for score in map_scores if score[1] > score[2])
+        maps_won_b = sum(1 for score in map_scores if score[2] > score[1])
+
+
+        if total_a > total_b:
+            winner = self.match["team1"]
+        elif total_b > total_a:
+            winner = self.match["team2"]
+        else:
+            if maps_won_a > maps_won_b:
+                winner = self.match["team1"]
+            elif maps_won_b > maps_won_a:
+                winner = self.match["team2"]
+            else:
+                winner = "Tie"
+
+        # Update leaderboard
+        elo_win = settings.elo_win_points
+        elo_loss = settings.elo_loss_points
+
+        if winner != "Tie":
+            update_team_rating(self.parent.leaderboard_sheet, winner, True, elo_win, elo_loss)
+            loser = self.match["team2"] if winner == self.match["team1"] else self.match["team1"]
+            update_team_rating(self.parent.leaderboard_sheet, loser, False, elo_win, elo_loss)
+
+        # Append to scoring sheet (NEW WAY)
+        self.parent.scoring_sheet.append_row([
+            self.match.get("match_id", "challenge"),
+            self.match["team1"],
+            self.match["team2"],
+            map_scores[0][0], map_scores[0][1], map_scores[0][2],  # Map 1: Mode, A, B
+            map_scores[1][0], map_scores[1][1], map_scores[1][2],  # Map 2: Mode, A, B
+            map_scores[2][0] if len(map_scores) > 2 else "",
+            map_scores[2][1] if len(map_scores) > 2 else "",
+            map_scores[2][2] if len(map_scores) > 2 else "",
+            total_a,
+            total_b,
+            maps_won_a,
+            maps_won_b,
+            winner
+        ])
+
+        # ✅ REMOVE MATCH FROM WEEKLY OR PROPOSED SHEET
+        from datetime import datetime
+
+        # Data
+        league_week_sheet = get_or_create_sheet(self.parent.spreadsheet, "LeagueWeek", ["League Week"])
+        week_number = int(league_week_sheet.get_all_values()[1][0])
+        match_id = self.match.get("match_id")
+        team_a = self.match["team1"]
+        team_b = self.match["team2"]
+        winner = winner
+        total_a = total_a
+        total_b = total_b
+        maps_won_a = maps_won_a
+        maps_won_b = maps_won_b
+
+        proposed_date = ""
+        scheduled_date = ""
+
+        # ✅ Update Match Sheet status to "Finished"
+        if match_id:
+            match_sheet = get_or_create_sheet(
+                self.parent.spreadsheet,
+                "Matches",
+                ["Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date", "Status", "Winner", "Loser", "Proposed By"]
+            )
+
+            wanted = str(match_id).strip().lower()
+            # Status, Winner, Loser (columns 6-8)
+            result = ["Finished", winner if winner != "Tie" else "", loser if winner != "Tie" else ""]
+            if GuardedSheet(match_sheet).update_where(lambda v: v[0].strip().lower() == wanted, lambda v: v[:5] + result + v[8:]):
+                print(f"[✅] Updated match {match_id} status to Finished")
+            else:
+                print(f"[⚠️] match_id {match_id} not found in Matches sheet")
+
+        def same_pair(a, b):
+            return (a == team_a and b == team_b) or (a == team_b and b == team_a)
+
+        # --- Find proposed match
+        removed = GuardedSheet(self.parent.proposed_sheet).delete_where(lambda row: same_pair(row[0], row[1]))
+        if removed:
+            proposed_date = removed[3]
+
+        # --- Find and remove scheduled match (by match ID)
+        if match_id:
+            wanted = str(match_id).strip().lower()
+            removed = GuardedSheet(self.parent.scheduled_sheet).delete_where(lambda row: row[0].strip().lower() == wanted)
+            if removed:
+                scheduled_date = removed[3]
+                print(f"[🧹] Removed scheduled match {match_id}")
+        reminders.remove(match_id)
+
+        # --- Clean up Weekly Matches
+        GuardedSheet(self.parent.weekly_matches_sheet).delete_where(lambda row: same_pair(row[1], row[2]))
+
+        # --- Prepare map scores
+        map1 = self.map_scores[0] if len(self.map_scores) > 0 else {"gamemode": "", "team1_score": "", "team2_score": ""}
+        map2 = self.map_scores[1] if len(self.map_scores) > 1 else {"gamemode": "", "team1_score": "", "team2_score": ""}
+        map3 = self.map_scores[2] if len(self.map_scores) > 2 else {"gamemode": "", "team1_score": "", "team2_score": ""}
+
+        # --- Append to Match History
+        match_history_sheet = get_or_create_sheet(
+            self.parent.spreadsheet,
+            "Match History",
+            [
+                "Week", "Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date",
+                "Map 1 Mode", "Map 1 A", "Map 1 B",
+                "Map 2 Mode", "Map 2 A", "Map 2 B",
+                "Map 3 Mode", "Map 3 A", "Map 3 B",
+                "Total A", "Total B", "Maps Won A", "Maps Won B", "Winner"
+            ]
+        )
+
+        match_history_sheet.append_row([
+            week_number,
+            match_id,
+            team_a,
+            team_b,
+            proposed_date,
+            scheduled_date,
+            map1["gamemode"], map1["team1_score"], map1["team2_score"],
+            map2["gamemode"], map2["team1_score"], map2["team2_score"],
+            map3["gamemode"], map3["team1_score"], map3["team2_score"],
+            total_a,
+            total_b,
+            maps_won_a,
+            maps_won_b,
+            winner
+        ])
+
+        # ✅ Log completed challenge match (for enforcement)
+        if self.match.get("is_challenge"):
+            from datetime import datetime
+            league_week_sheet = get_or_create_sheet(self.parent.spreadsheet, "LeagueWeek", ["League Week"])
+            week_number = int(league_week_sheet.get_all_values()[1][0])
+
+            challenge_sheet = get_or_create_sheet(
+                self.parent.spreadsheet,
+                "Challenge Matches",
+                ["Week", "Team A", "Team B", "Proposer ID", "Completion Date"]
+            )
+
+            challenge_sheet.append_row([
+                week_number,
+                self.match["team1"],
+                self.match["team2"],
+                str(self.proposer_id),
+                datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+            ])
+
+        
+        # Announce final result to score/results channel
+        score_channel_id = settings.score_channel_id
+        score_channel = self.parent.bot.get_channel(score_channel_id)
+
+        if score_channel:
+            result_embed = discord.Embed(
+                title="🏆 Final Match Result",
+                description=f"**{self.match['team1']}** vs **{self.match['team2']}**",
+                color=discord.Color.gold()
+            )
+            for i, s in enumerate(self.map_scores, 1):
+                result_embed.add_field(
+                    name=f"Map {i} ({s['gamemode']})",
+                    value=f"{self.match['team1']} {s['team1_score']} - {s['team2_score']} {self.match['team2']}",
+                    inline=False
+                )
+            result_embed.add_field(name="Winner", value=winner, inline=False)
+            await webhooks.announce(score_channel, embed=result_embed)
+
+        # 🛎️ Ping both teams in the same message
+        mentions_a = roster.mentions(self.match["team1"])
+        mentions_b = roster.mentions(self.match["team2"])
+
+        # Safely format match time (UTC fallback)
+        match_time = self.match.get("proposed_datetime")
+        if isinstance(match_time, str):
+            try:
+                match_time = datetime.fromisoformat(match_time)
+            except:
+                match_time = None
+
+        if not match_time:
+            match_time = datetime.utcnow()
+
+        formatted_dt = match_time.strftime("%Y-%m-%d %I:%M %p %Z").strip()
+        discord_ts = int(match_time.replace(tzinfo=timezone.utc).timestamp())
+
+        await webhooks.announce(
+            score_channel,
+            f"🏁 Final score submitted for **{self.match['team1']}** vs **{self.match['team2']}**\n"
+            f"{mentions_a} vs {mentions_b}\n"
+            f"🕒 <t:{discord_ts}:F> (<t:{discord_ts}:R>)\n"
+        )
+
+        # Notify and cleanup
+        await safe_send(interaction, "✅ Score accepted and finalized!\n✅ Scores accepted and saved!", ephemeral=True)
+
+        # DM proposer (safe)
+        await notify_user(self.parent.bot, self.proposer_id, "✅ Your proposed match scores have been accepted and finalized.")
+
+        # Delete the message (safe)
+        if interaction.message:
+            outbound.delete(interaction.message)
+
+        # Delete the proposed-score fallback channel
+        if delivery.is_fallback(interaction.channel, "proposed-score"):
+            janitor.release(interaction.channel)
+
+    async def deny(self, interaction: discord.Interaction):
+        if not pending.claim(self.key):
+            await safe_send(interaction, "❗ These scores were already answered or have expired.", ephemeral=True)
+            return
+        await interaction.response.send_message("❌ Scores denied.", ephemeral=True)
+
+        # DM proposer (safe)
+        await notify_user(self.parent.bot, self.proposer_id, "❌ Your proposed match scores were denied.")
+
+        outbound.delete(interaction.message)
+
+        # Delete the proposed-score fallback channel
+        if delivery.is_fallback(interaction.channel, "proposed-score"):
+            janitor.release(interaction.channel)
+
+    @staticmethod
+    async def expire(parent, record):
+        match = record.payload["match"]
+        await notify_user(parent.bot, record.payload["proposer_id"], "⏳ Your proposed scores expired due to no response.")
+
+        # Delete private channel or message
+        delete_prompt(parent.bot, record, "proposed-score")
+
+        # Remove from proposed sheet
+        GuardedSheet(parent.proposed_sheet).delete_where(lambda row: (
+            row[0] == match["team1"] and row[1] == match["team2"]
+        ) or (
+            row[0] == match["team2"] and row[1] == match["team1"]
+        ))
+
+class JoinRequestPrompt(PendingPrompt):
+    kind = "join"
+    buttons = [
+        ("accept", "✅ Accept", discord.ButtonStyle.success),
+        ("deny", "❌ Deny", discord.ButtonStyle.danger),
+    ]
+
+    def __init__(self, parent_view, key, team_name, invitee_id, guild_id):
+        self.parent_view = parent_view
+        self.key = key
+        self.team_name = team_name
+        self.invitee_id = invitee_id
+        self.guild_id = guild_id
+
+    @staticmethod
+    def payload(team_name, invitee_id, guild_id):
+        return {"team_name": team_name, "invitee_id": invitee_id, "guild_id": guild_id}
+
+    async def accept(self, interaction: discord.Interaction):
+        # ✅ One roster change per team and per player at a time, so two accepts can't claim the same slot
+        async with locks.hold(team_key(self.team_name), player_key(self.invitee_id)):
+            if not pending.claim(self.key):
+                await safe_send(interaction, "❗ This request was already answered or has expired.", ephemeral=True)
+                return
+            await self.add_player(interaction)
+
+    async def add_player(self, interaction: discord.Interaction):
+        guild = self.parent_view.bot.get_guild(self.guild_id)
+
+        invitee = await teamroles.member(guild, self.invitee_id)
+        if invitee is None:
+            await interaction.response.send_message("❗ That player is no longer in the server.", ephemeral=True)
+            return
+
+        if not roster.get(self.team_name):
+            await interaction.response.send_message("❗ That team no longer exists.", ephemeral=True)
+            return
+
+        already_on_team = False
+        for row in self.parent_view.teams_sheet.get_all_values():
+            for cell in row[1:7]:
+                if cell.strip() == f"{invitee.display_name} ({invitee.id})":
+                    already_on_team = True
+                    break
+            if already_on_team:
+                break
+
+        if already_on_team:
+            await interaction.response.send_message("❗ Player is already on another team.", ephemeral=True)
+            return
+
+        await teamroles.add_member(guild, self.team_name, invitee)
+
+        guard = GuardedSheet(self.parent_view.teams_sheet)
+        wanted = self.team_name.lower()
+        entry = f"{invitee.display_name} ({invitee.id})"
+        max_players = settings.team_max_players
+
+        def has_room(v):
+            return v[0].lower() == wanted and len([p for p in v[1:7] if p.strip()]) < max_players
+
+        def add_player(v):
+            slot = v.index("", 1) if "" in v[1:7] else None
+            return v if slot is None else v[:slot] + [entry] + v[slot + 1:]
+
+        for team_row in guard.read():
+            row = team_row.values
+            if row[0].lower() == wanted:
+                if not has_room(row):
+                    await interaction.response.send_message(
+                        f"❗ This team already has the maximum number of players ({max_players}).",
+                        ephemeral=True
+                    )
+                    return
+                try:
+                    team_row = guard.update(team_row, add_player, predicate=has_room)
+                except RowConflict as e:
+                    await interaction.response.send_message(f"❗ {e} Ask the player to request again.", ephemeral=True)
+                    return
+                roster.invalidate()
+                # ✅ Check minimum player count
+                player_count = sum(1 for cell in team_row.values[1:7] if cell.strip())
+                min_required = settings.team_min_players
+
+                if player_count == min_required:
+                    try:
+                        await self.parent_view.send_notification(
+                            f"✅ **{self.team_name}** has reached the minimum required players ({min_required}) and is now eligible for matches!"
+                        )
+                    except Exception as e:
+                        print(f"❗ Failed to send team eligibility notification: {e}")    
+                break
+
+        await interaction.response.send_message("✅ Player added to team.", ephemeral=True)
+
+        # ✅ Send notification to league announcement channel
+        try:
+            await self.parent_view.send_notification(
+                f"👥 {invitee.mention} has joined **{self.team_name}**!"
+            )
+        except Exception as e:
+            print(f"❗ Failed to send join team notification: {e}")
+
+        # The shared team-requests channel is left to the janitor; other requests may still be in it
+        outbound.delete(interaction.message)
+
+    async def deny(self, interaction: discord.Interaction):
+        if not pending.claim(self.key):
+            await safe_send(interaction, "❗ This request was already answered or has expired.", ephemeral=True)
+            return
+        await interaction.response.send_message("❌ Request denied.", ephemeral=True)
+
+        # The shared team-requests channel is left to the janitor; other requests may still be in it
+        outbound.delete(interaction.message)
+
+    @staticmethod
+    async def expire(parent, record):
+        print(f"[⌛] Join request for {record.payload['team_name']} expired.")
+        delete_prompt(parent.bot, record)
+
+PROMPTS = {prompt.kind: prompt for prompt in (MatchProposalPrompt, ScoreConfirmPrompt, JoinRequestPrompt)}
+
+async def deliver_match_proposal(guild, payload, content, members=()):
+    """Store a match proposal and post it to team B's captain (DM or fallback). The sent message, or None.
+
+    The record is stored first, so an undeliverable proposal still expires and cleans up its sheet rows.
+    """
+    key, view = MatchProposalPrompt.open(payload)
+    captain = await teamroles.captain_member(guild, payload["team_b"])
+    if captain is None:
+        return None
+    msg = await delivery.router.deliver(
+        captain,
+        content,
+        view=view,
+        fallback=lambda: delivery.open_fallback(
+            guild,
+            f"proposed-match-{payload['team_a']}-vs-{payload['team_b']}",
+            [*members, captain]
+        ),
+        ttl=fallback_channel_ttl()
+    )
+    if msg is not None:
+        pending.attach(key, msg)
+    return msg
+
+def expiry_handler(panel, prompt_cls):
+    async def expire(key):
+        record = pending.claim(key)
+        if record:
+            await prompt_cls.expire(panel, record)
+    return expire
+
+async def setup_prompts(bot, panel):
+    """Register the prompt buttons' dynamic handler and put every stored deadline back on the scheduler."""
+    PromptButton.panel = panel
+    bot.add_dynamic_items(PromptButton)
+    for kind, prompt_cls in PROMPTS.items():
+        scheduler.on(kind, expiry_handler(panel, prompt_cls))
+    scheduler.start()
+
+    records = pending.reschedule_all()
+    print(f"[📨] {len(records)} pending prompts waiting on an answer.")
+
 class LeaguePanel(View):
-    def __init__(self, bot, spreadsheet, players_sheet, teams_sheet, matches_sheet, scoring_sheet, leaderboard_sheet, proposed_sheet, scheduled_sheet, weekly_matches_sheet, challenge_sheet, send_to_channel, send_notification, DEV_OVERRIDE_IDS):
+    def __init__(self, bot, spreadsheet, players_sheet, teams_sheet, matches_sheet, scoring_sheet, leaderboard_sheet, proposed_sheet, scheduled_sheet, weekly_matches_sheet, challenge_sheet, send_to_channel, send_notification):
         super().__init__(timeout=None)
         self.bot = bot
         self.spreadsheet = spreadsheet
@@ -49,10 +738,8 @@ class LeaguePanel(View):
         self.send_to_channel = send_to_channel
         self.challenge_sheet = challenge_sheet
         self.send_notification = send_notification
-        self.DEV_OVERRIDE_IDS = DEV_OVERRIDE_IDS
 
-        with open("config.json") as f:
-            self.config = json.load(f)
+        self.config = settings
 
     def player_signed_up(self, user_id):
         user_id = str(user_id).strip()
@@ -66,7 +753,7 @@ class LeaguePanel(View):
 
 # -------------------- PLAYER SIGNUP --------------------
 
-    @discord.ui.button(label="✅ Player Signup", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="✅ Player Signup", style=discord.ButtonStyle.blurple, custom_id="league:player_signup")
     async def player_signup(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = str(interaction.user.id)
         username = interaction.user.display_name
@@ -87,13 +774,14 @@ class LeaguePanel(View):
 
         # Signup
         self.players_sheet.append_row([user_id, username])
+        search_index.add_player(user_id, username)
         await interaction.response.send_message("✅ You have been signed up!", ephemeral=True)
         await self.send_notification(f"📌 {interaction.user.mention} has signed up for the league!")
 
 
 # -------------------- CREATE TEAM --------------------
 
-    @discord.ui.button(label="🏷️ Create Team", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="🏷️ Create Team", style=discord.ButtonStyle.blurple, custom_id="league:create_team")
     async def create_team(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = str(interaction.user.id)
 
@@ -126,6 +814,12 @@ class LeaguePanel(View):
                 super().__init__()
                 self.parent = parent_view
 
+                # Role-free leagues only make team roles for teams that ask for them
+                self.want_roles = None
+                if settings.role_free_teams:
+                    self.want_roles = discord.ui.TextInput(label="Create Discord roles for this team? (yes/no)", required=False, default="no", max_length=3)
+                    self.add_item(self.want_roles)
+
             async def on_submit(self, modal_interaction: discord.Interaction):
                 team_name = self.team_name.value.strip()
 
@@ -137,15 +831,13 @@ class LeaguePanel(View):
 
                 guild = modal_interaction.guild
 
-                # Create team roles
-                team_role = await guild.create_role(name=f"Team {team_name}")
-                captain_role = await guild.create_role(name=f"Team {team_name} Captain")
-
-                # Assign roles to captain
-                await modal_interaction.user.add_roles(team_role, captain_role)
+                # Create team roles and assign them to the captain (skipped in role-free mode unless asked for)
+                opt_in = bool(self.want_roles) and self.want_roles.value.strip().lower() in ("yes", "y")
+                await teamroles.create(guild, team_name, modal_interaction.user, opt_in)
 
                 # Add team to sheet with captain only
                 self.parent.teams_sheet.append_row([team_name, f"{modal_interaction.user.display_name} ({modal_interaction.user.id})"] + [""] * 5)
+                roster.invalidate()
 
                 # ✅ Check if interaction still active
                 if interaction.response.is_done():
@@ -162,209 +854,15 @@ class LeaguePanel(View):
 
     # -------------------- PROPOSE MATCH --------------------
 
-    @discord.ui.button(label="📅 Propose Match", style=discord.ButtonStyle.green)
+    @discord.ui.button(label="📅 Propose Match", style=discord.ButtonStyle.green, custom_id="league:propose_match")
     async def propose_match(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.start_propose(interaction)
 
-        async def create_private_channel(guild, category_id, channel_name, members):
-            # Ensure the ID is an int
-            category = discord.utils.get(guild.categories, id=int(category_id))
-            if not category:
-                print(f"❗ Category with ID {category_id} not found.")
-                return None
-
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                guild.me: discord.PermissionOverwrite(read_messages=True)
-            }
-
-            for member in members:
-                overwrites[member] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-
-            return await guild.create_text_channel(
-                name=channel_name,
-                category=category,
-                overwrites=overwrites
-            )
+    async def start_propose(self, interaction: discord.Interaction, challenge_team=None):
+        """Propose flow shared by the panel button and /challenge (opponent already picked)."""
 
         # -------------------- VIEWS --------------------
 
-        class AcceptDenyMatchView(discord.ui.View):
-            def __init__(self, parent, team_a, team_b, proposed_date_str, match_id, match_type="assigned", week_number=None, proposed_datetime=None):
-                super().__init__(timeout=300)
-                self.parent = parent
-                self.team_a = team_a
-                self.team_b = team_b
-                self.proposed_date = proposed_date_str
-                self.match_id = match_id
-                self.match_type = match_type
-                self.week_number = week_number
-                self.proposed_datetime = proposed_datetime
-                self.message = None
-                self.channel_to_delete = None
-
-            @discord.ui.button(label="✅ Accept", style=discord.ButtonStyle.success)
-            async def accept(self, interaction: discord.Interaction, button: discord.ui.Button):
-                await interaction.response.defer(ephemeral=True)  # ✅ prevent timeout
-
-                discord_ts = int(self.proposed_datetime.timestamp())
-                discord_time_fmt = f"<t:{discord_ts}:f>"
-                discord_relative = f"<t:{discord_ts}:R>"
-
-                # Add to scheduled sheet
-                self.parent.scheduled_sheet.append_row([self.match_id, self.team_a, self.team_b, self.proposed_date])
-
-                # Add to Matches if it's a challenge
-                if self.match_type == "challenge":
-                    self.parent.matches_sheet.append_row([
-                        self.match_id, self.team_a, self.team_b,
-                        self.proposed_date, self.proposed_date,
-                        "Scheduled", "", "", ""
-                    ])
-
-                # Update existing Matches row
-                match_sheet = get_or_create_sheet(
-                    self.parent.spreadsheet, "Matches",
-                    ["Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date", "Status", "Winner", "Loser", "Proposed By"]
-                )
-
-                for idx, row in enumerate(match_sheet.get_all_values()[1:], start=2):
-                    if row[0].strip().lower() == self.match_id.strip().lower():
-                        print(f"[✅] Updating dates and status for match {self.match_id}")
-                        match_sheet.update_cell(idx, 4, self.proposed_date)
-                        match_sheet.update_cell(idx, 5, self.proposed_date)
-                        match_sheet.update_cell(idx, 6, "Scheduled")
-                        break
-                else:
-                    print(f"[⚠️] Match ID {self.match_id} not found in Matches sheet")
-
-                msg = (
-                    f"✅ **Match Accepted:** `{self.team_a} vs {self.team_b}`\n"
-                    f"🕓 Scheduled for {discord_time_fmt} ({discord_relative})"
-                )
-                await interaction.followup.send(msg, ephemeral=True)  # ✅ safe after defer()
-
-                # Send to scheduled match channel
-                match_channel = self.parent.bot.get_channel(self.parent.config.get("scheduled_channel_id"))
-                if match_channel:
-                    match_type_str = "Challenge Match" if self.match_type == "challenge" else f"Assigned Match (Week {self.week_number})"
-
-                    embed = discord.Embed(
-                        title="📅 Match Scheduled",
-                        description=(
-                            f"**{self.team_a}** vs **{self.team_b}**\n"
-                            f"🕓 {discord_time_fmt} ({discord_relative})\n"
-                            f"🏷️ {match_type_str}"
-                        ),
-                        color=discord.Color.green()
-                    )
-
-                    def get_mentions(team_name):
-                        row = next((r for r in self.parent.teams_sheet.get_all_values() if r[0] == team_name), [])
-                        mentions = []
-                        guild = discord.utils.get(self.parent.bot.guilds)  # works in DMs
-
-                        for cell in row[1:]:
-                            if "(" in cell and ")" in cell:
-                                user_id = cell.split("(")[-1].split(")")[0]
-                                try:
-                                    if guild:
-                                        member = guild.get_member(int(user_id))
-                                        if member:
-                                            mentions.append(member.mention)
-                                except Exception as e:
-                                    print(f"[⚠️] Couldn't resolve user {user_id}: {e}")
-                        return mentions
-
-                    mentions_a = get_mentions(self.team_a)
-                    mentions_b = get_mentions(self.team_b)
-
-                    await match_channel.send(
-                        content=f"{' '.join(mentions_a)} vs {' '.join(mentions_b)}",
-                        embed=embed
-                    )
-
-                # Clean up message & channel
-                try:
-                    if interaction.message:
-                        await interaction.message.delete()
-                    if interaction.channel and isinstance(interaction.channel, discord.TextChannel):
-                        if interaction.channel.name.startswith("proposed-match"):
-                            await interaction.channel.delete()
-                except Exception:
-                    pass
-
-            @discord.ui.button(label="❌ Decline", style=discord.ButtonStyle.danger)
-            async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
-                await interaction.response.send_message("❌ Match proposal declined.", ephemeral=True)
-
-                # ✅ Remove from Proposed Matches
-                proposed_rows = self.parent.proposed_sheet.get_all_values()
-                for idx, row in enumerate(proposed_rows, start=1):
-                    if (
-                        row[0] == self.team_a and
-                        row[1] == self.team_b and
-                        row[3] == self.proposed_date
-                    ):
-                        self.parent.proposed_sheet.delete_rows(idx)
-                        break
-
-                # ✅ Remove from Challenge Matches if it was a challenge
-                if self.match_type == "challenge":
-                    challenge_rows = self.parent.challenge_sheet.get_all_values()
-                    for idx, row in enumerate(challenge_rows[1:], start=2):  # skip header
-                        if (
-                            row[2] == self.team_a and
-                            row[3] == self.team_b and
-                            row[5] == self.proposed_date
-                        ):
-                            print(f"[🗑️] Challenge match declined, removing from sheet: {row}")
-                            self.parent.challenge_sheet.delete_rows(idx)
-                            break
-
-                # Delete original message if in channel (safe check)
-                if interaction.message:
-                    try:
-                        await interaction.message.delete()
-                    except discord.Forbidden:
-                        pass  # no perms, ignore
-
-                # Delete channel if it was a private proposed match channel
-                if interaction.channel and isinstance(interaction.channel, discord.TextChannel):
-                    if interaction.channel.name.startswith("proposed-match"):
-                        await interaction.channel.delete()
-            
-            async def on_timeout(self):
-                # ✅ Remove from Proposed Match sheet by match ID
-                proposed_rows = self.parent.proposed_sheet.get_all_values()[1:]
-                for idx, row in enumerate(proposed_rows, start=2):
-                    if row and row[0].strip().lower() == self.match_id.strip().lower():
-                        self.parent.proposed_sheet.delete_rows(idx)
-                        print(f"[⌛] Match {self.match_id} auto-removed from Proposed Match sheet after timeout.")
-                        break
-
-                # ✅ Remove from Challenge Match sheet if it was a challenge match
-                if self.match_type == "challenge":
-                    challenge_rows = self.parent.challenge_sheet.get_all_values()[1:]
-                    for idx, row in enumerate(challenge_rows, start=2):
-                        if row and row[1].strip().lower() == self.match_id.strip().lower():
-                            self.parent.challenge_sheet.delete_rows(idx)
-                            print(f"[⌛] Challenge match {self.match_id} removed from Challenge Matches sheet after timeout.")
-                            break
-
-                # ✅ Delete original proposal message if still present
-                try:
-                    if self.message:
-                        await self.message.delete()
-                except Exception:
-                    pass
-
-                # ✅ Delete fallback private channel if one was created
-                try:
-                    if self.channel_to_delete:
-                        await self.channel_to_delete.delete()
-                except Exception:
-                    pass
-
         class ProposeOpponentView(discord.ui.View):
             def __init__(self, parent, user_team,  opponents, is_challenge,):
                 super().__init__(timeout=300)
@@ -373,7 +871,7 @@ class LeaguePanel(View):
                 self.opponents = opponents
                 self.is_challenge = is_challenge
 
-                select = discord.ui.Select(placeholder="Select Opponent", options=[discord.SelectOption(label=op, value=op) for op in opponents])
+                select = discord.ui.Select(placeholder="Select Opponent", options=[discord.SelectOption(label=op, value=op) for op in opponents[:25]])
                 select.callback = self.opponent_selected
                 self.add_item(select)
 
@@ -390,6 +888,45 @@ class LeaguePanel(View):
                 self.is_challenge = is_challenge
                 self.date_time = {}
 
+            @discord.ui.button(label="⚡ Suggest Times", style=discord.ButtonStyle.success)
+            async def suggest_times(self, interaction: discord.Interaction, button: discord.ui.Button):
+                bits_a = availability.get_bitmap(self.parent.spreadsheet, self.team_a)
+                bits_b = availability.get_bitmap(self.parent.spreadsheet, self.team_b)
+                if not bits_a or not bits_b:
+                    missing = self.team_a if not bits_a else self.team_b
+                    await interaction.response.send_message(f"❗ **{missing}** has not set their availability yet. Pick a time manually.", ephemeral=True)
+                    return
+
+                match_minutes = settings.match_length_minutes
+                slots = availability.suggest_slots(bits_a, bits_b, match_minutes)
+                if not slots:
+                    await interaction.response.send_message("❗ No shared free time in the next two weeks. Pick a time manually.", ephemeral=True)
+                    return
+
+                options = [discord.SelectOption(label=dt.strftime("%a %b %d @ %I:%M %p"), value=dt.strftime("%Y-%m-%d %H:%M")) for dt in slots]
+                select_slot = discord.ui.Select(placeholder="Select a suggested time", options=options)
+
+                async def selected(inner: discord.Interaction):
+                    dt = datetime.strptime(select_slot.values[0], "%Y-%m-%d %H:%M")
+                    hour = dt.hour % 12 or 12
+                    self.date_time.update({
+                        "year": str(dt.year),
+                        "month": str(dt.month),
+                        "day": str(dt.day),
+                        "hour": str(hour),
+                        "minute": str(dt.minute).zfill(2),
+                        "am_pm": "AM" if dt.hour < 12 else "PM"
+                    })
+                    league_week_sheet = get_or_create_sheet(self.parent.spreadsheet, "LeagueWeek", ["League Week"])
+                    week_number = int(league_week_sheet.get_all_values()[1][0])
+                    view = SubmitProposalView(self.parent, self.date_time, self.team_a, self.team_b, self.is_challenge, week_number=week_number)
+                    await inner.response.send_message(f"✅ Time selected: {dt.strftime('%a %b %d @ %I:%M %p')}. Ready to submit your match proposal:", view=view, ephemeral=True)
+
+                select_slot.callback = selected
+                view = discord.ui.View(timeout=300)
+                view.add_item(select_slot)
+                await interaction.response.send_message("Times both teams are available:", view=view, ephemeral=True)
+
             @discord.ui.button(label="📅 Select Date (Month & Day)", style=discord.ButtonStyle.primary)
             async def select_date(self, interaction: discord.Interaction, button: discord.ui.Button):
                 months = [discord.SelectOption(label=str(m), value=str(m)) for m in range(1, 13)]
@@ -503,7 +1040,7 @@ class LeaguePanel(View):
                     elif am_pm.upper() == "AM" and hour == 12:
                         hour = 0
 
-                    year = datetime.utcnow().year
+                    year = int(self.date_time.get("year", datetime.utcnow().year))
                     naive_dt = datetime(year, month, day, hour, minute)
 
                     # Final timestamp for Discord (no UTC conversion)
@@ -548,56 +1085,25 @@ class LeaguePanel(View):
                     ])
 
                 # Notify captain (DM or fallback channel)
-                guild = interaction.guild
-                team_role = discord.utils.get(guild.roles, name=f"Team {self.team_b}")
-                captain_role = discord.utils.get(guild.roles, name=f"Team {self.team_b} Captain")
-
-                captain = None
-                if team_role and captain_role:
-                    for member in captain_role.members:
-                        if team_role in member.roles:
-                            captain = member
-                            break
-
-                view = AcceptDenyMatchView(
-                    self.parent,
+                payload = MatchProposalPrompt.payload(
                     self.team_a,
                     self.team_b,
                     proposed_date,
-                    match_id=match_id,
-                    match_type="challenge" if self.is_challenge else "assigned",
-                    week_number=self.week_number if not self.is_challenge else None,
-                    proposed_datetime=proposed_datetime
+                    match_id,
+                    "challenge" if self.is_challenge else "assigned",
+                    self.week_number if not self.is_challenge else None,
+                    proposed_datetime
                 )
-
-                if captain:
-                    try:
-                        msg = await captain.send(
-                            f"📨 Proposed Match from **{self.team_a}** on {proposed_date}. Accept?",
-                            view=view
-                        )
-                        if 'msg' in locals():
-                            view.message = msg
-                            view.channel_to_delete = None
-                    except discord.Forbidden:
-                        fallback_id = int(self.parent.config.get("fallback_category_id"))
-                        private_channel = await create_private_channel(
-                            guild, fallback_id,
-                            f"proposed-match-{self.team_a}-vs-{self.team_b}",
-                            [interaction.user, captain]
-                        )
-
-                        if private_channel:
-                            msg = await private_channel.send(
-                                f"{captain.mention} 📨 Proposed Match from **{self.team_a}** on {proposed_date}. Accept?",
-                                view=view
-                            )
-                            view.message = msg
-                            view.channel_to_delete = private_channel
-                        else:
-                            # fallback failed, notify proposer
-                            await interaction.followup.send("❗ Failed to create fallback channel. Could not deliver proposal.", ephemeral=True)
-                            return  # avoid running `view.message = msg` if msg is not defined
+                msg = await deliver_match_proposal(
+                    interaction.guild,
+                    payload,
+                    f"📨 Proposed Match from **{self.team_a}** on {proposed_date}. Accept?",
+                    [interaction.user]
+                )
+                if msg is None:
+                    # no captain or the fallback failed, notify proposer
+                    await safe_send(interaction, "❗ Could not deliver the proposal to the other captain.")
+                    return  # the stored proposal expires and cleans up its sheet rows
 
                 # Final ack to proposer
                 msg = (
@@ -622,9 +1128,10 @@ class LeaguePanel(View):
                 self.user_team = user_team
 
             async def on_submit(self, interaction: discord.Interaction):
+                await self.find_opponents(interaction, self.query.value)
+
+            async def find_opponents(self, interaction: discord.Interaction, search):
                 await interaction.response.defer(ephemeral=True)
-                search = self.query.value.lower()
-                valid_teams = []
 
                 # ✅ Challenge match weekly limit check
                 from datetime import datetime
@@ -636,7 +1143,7 @@ class LeaguePanel(View):
 
                 league_week_sheet = get_or_create_sheet(self.parent.spreadsheet, "LeagueWeek", ["League Week"])
                 current_week = int(league_week_sheet.get_all_values()[1][0])
-                weekly_limit = self.parent.config.get("weekly_challenge_limit", 2)
+                weekly_limit = settings.weekly_challenge_limit
 
                 team_challenges = [
                     row for row in challenge_sheet.get_all_values()[1:]
@@ -650,17 +1157,28 @@ class LeaguePanel(View):
                     )
                     return
 
-                for row in self.parent.teams_sheet.get_all_values()[1:]:
-                    team_name = row[0]
-                    players = [p for p in row[1:] if p.strip()]
-                    if team_name.lower() != self.user_team.lower() and len(players) >= self.parent.config.get("team_min_players", 3):
-                        if search in team_name.lower():
-                            valid_teams.append(team_name)
+                # ✅ Ranked matches from the search index, limited to other teams with enough players
+                roster.ensure()
+
+                def eligible(entry):
+                    team = roster.get(entry.value)
+                    return entry.value.lower() != self.user_team.lower() and team and len(team["players"]) >= settings.team_min_players
+
+                valid_teams = [e.value for e in search_index.teams.search(search, accept=eligible)]
 
                 if not valid_teams:
                     await interaction.followup.send("❗ No valid teams found.", ephemeral=True)
                     return
 
+                # An exact pick (e.g. from /challenge autocomplete) goes straight to date and time
+                if valid_teams[0].lower() == search.strip().lower():
+                    await interaction.followup.send(
+                        "Select date and time:",
+                        view=DateTimeView(self.parent, self.user_team, valid_teams[0], True),
+                        ephemeral=True
+                    )
+                    return
+
                 await interaction.followup.send(
                     "Select opponent:",
                     view=ProposeOpponentView(self.parent, self.user_team, valid_teams, is_challenge=True),
@@ -698,7 +1216,7 @@ class LeaguePanel(View):
         user_team = None
 
         for row in self.teams_sheet.get_all_values()[1:]:
-            player_ids = [str(extract_user_id(p)).strip() for p in row[1:] if p]
+            player_ids = [str(extract_user_id(p)).strip() for p in row[1:7] if p]
             if user_id in player_ids:
                 user_team = row[0]
                 break
@@ -716,339 +1234,18 @@ class LeaguePanel(View):
             elif row[2] == user_team:
                 assigned_opponents.append(row[1])
 
+        if challenge_team:
+            await ChallengeSearchModal(self, user_team).find_opponents(interaction, challenge_team)
+            return
+
         view = SelectTypeView(self, user_team, assigned_opponents)
         await interaction.response.send_message("Select match type:", view=view, ephemeral=True)
 
     # -------------------- PROPOSE SCORE--------------------
 
-    @discord.ui.button(label="🏆 Propose Score", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="🏆 Propose Score", style=discord.ButtonStyle.blurple, custom_id="league:propose_score")
     async def propose_score(self, interaction: discord.Interaction, button: discord.ui.Button):
 
-        async def create_private_channel(guild, category_id, channel_name, members):
-            category = guild.get_channel(int(category_id))
-            if not isinstance(category, discord.CategoryChannel):
-                print("❌ Invalid category object passed.")
-                return None
-
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                guild.me: discord.PermissionOverwrite(read_messages=True)
-            }
-
-            for member in members:
-                overwrites[member] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-
-            return await guild.create_text_channel(name=channel_name, category=category, overwrites=overwrites)
-
-        class ConfirmScoreView(discord.ui.View):
-            def __init__(self, parent, match, map_scores, proposer, private_channel=None):
-                super().__init__(timeout=300)
-                self.parent = parent
-                self.match = match
-                self.map_scores = map_scores
-                self.proposer = proposer
-                self.private_channel = private_channel  # ← allows private channel deletion
-                self.message = None
-                self.channel_to_delete = private_channel
-
-            @discord.ui.button(label="✅ Accept Scores", style=discord.ButtonStyle.green)
-            async def accept(self, interaction: discord.Interaction, button: discord.ui.Button):
-                await interaction.response.defer(ephemeral=True)
-                from match import update_team_rating 
-                # Calculate totals and maps won
-                map_scores = [(m["gamemode"], int(m["team1_score"]), int(m["team2_score"])) for m in self.map_scores]
-                total_a = sum([score[1] for score in map_scores])  # Team A scores
-                total_b = sum([score[2] for score in map_scores])  # Team B scores
-                maps_won_a = sum(1 for score in map_scores if score[1] > score[2])
-                maps_won_b = sum(1 for score in map_scores if score[2] > score[1])
-
-
-                if total_a > total_b:
-                    winner = self.match["team1"]
-                elif total_b > total_a:
-                    winner = self.match["team2"]
-                else:
-                    if maps_won_a > maps_won_b:
-                        winner = self.match["team1"]
-                    elif maps_won_b > maps_won_a:
-                        winner = self.match["team2"]
-                    else:
-                        winner = "Tie"
-
-                # Update leaderboard
-                elo_win = self.parent.bot.config.get("elo_win_points", 25)
-                elo_loss = self.parent.bot.config.get("elo_loss_points", -25)
-
-                if winner != "Tie":
-                    update_team_rating(self.parent.leaderboard_sheet, winner, True, elo_win, elo_loss)
-                    loser = self.match["team2"] if winner == self.match["team1"] else self.match["team1"]
-                    update_team_rating(self.parent.leaderboard_sheet, loser, False, elo_win, elo_loss)
-
-                # Append to scoring sheet (NEW WAY)
-                self.parent.scoring_sheet.append_row([
-                    self.match.get("match_id", "challenge"),
-                    self.match["team1"],
-                    self.match["team2"],
-                    map_scores[0][0], map_scores[0][1], map_scores[0][2],  # Map 1: Mode, A, B
-                    map_scores[1][0], map_scores[1][1], map_scores[1][2],  # Map 2: Mode, A, B
-                    map_scores[2][0] if len(map_scores) > 2 else "",
-                    map_scores[2][1] if len(map_scores) > 2 else "",
-                    map_scores[2][2] if len(map_scores) > 2 else "",
-                    total_a,
-                    total_b,
-                    maps_won_a,
-                    maps_won_b,
-                    winner
-                ])
-
-                # ✅ REMOVE MATCH FROM WEEKLY OR PROPOSED SHEET
-                from datetime import datetime
-
-                # Data
-                league_week_sheet = get_or_create_sheet(self.parent.spreadsheet, "LeagueWeek", ["League Week"])
-                week_number = int(league_week_sheet.get_all_values()[1][0])
-                match_id = self.match.get("match_id")
-                team_a = self.match["team1"]
-                team_b = self.match["team2"]
-                winner = winner
-                total_a = total_a
-                total_b = total_b
-                maps_won_a = maps_won_a
-                maps_won_b = maps_won_b
-
-                proposed_date = ""
-                scheduled_date = ""
-
-                # ✅ Update Match Sheet status to "Finished"
-                if match_id:
-                    match_sheet = get_or_create_sheet(
-                        self.parent.spreadsheet,
-                        "Matches",
-                        ["Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date", "Status", "Winner", "Loser", "Proposed By"]
-                    )
-
-                    found = False
-                    for idx, row in enumerate(match_sheet.get_all_values()[1:], start=2):
-                        if row[0].strip().lower() == str(match_id).strip().lower():
-                            print(f"[✅] Updating match {match_id} status to Finished")
-                            match_sheet.update_cell(idx, 6, "Finished")  # Column 6 = "Status"
-                            match_sheet.update_cell(idx, 7, winner if winner != "Tie" else "")  # Winner
-                            match_sheet.update_cell(idx, 8, loser if winner != "Tie" else "")  # Loser
-                            found = True
-                            break
-
-                    if not found:
-                        print(f"[⚠️] match_id {match_id} not found in Matches sheet")
-
-                # --- Find proposed match
-                for idx, row in enumerate(self.parent.proposed_sheet.get_all_values()[1:], start=2):
-                    if (row[0] == team_a and row[1] == team_b) or (row[0] == team_b and row[1] == team_a):
-                        proposed_date = row[3]
-                        self.parent.proposed_sheet.delete_rows(idx)
-                        break
-
-                # --- Find and remove scheduled match (by match ID)
-                for idx, row in enumerate(self.parent.scheduled_sheet.get_all_values()[1:], start=2):
-                    if row[0].strip().lower() == match_id.strip().lower():
-                        scheduled_date = row[3] if len(row) > 3 else ""
-                        self.parent.scheduled_sheet.delete_rows(idx)
-                        print(f"[🧹] Removed scheduled match {match_id}")
-                        break
-
-                # --- Clean up Weekly Matches
-                for idx, row in enumerate(self.parent.weekly_matches_sheet.get_all_values()[1:], start=2):
-                    if (row[1] == team_a and row[2] == team_b) or (row[1] == team_b and row[2] == team_a):
-                        self.parent.weekly_matches_sheet.delete_rows(idx)
-                        break
-
-                # --- Prepare map scores
-                map1 = self.map_scores[0] if len(self.map_scores) > 0 else {"gamemode": "", "team1_score": "", "team2_score": ""}
-                map2 = self.map_scores[1] if len(self.map_scores) > 1 else {"gamemode": "", "team1_score": "", "team2_score": ""}
-                map3 = self.map_scores[2] if len(self.map_scores) > 2 else {"gamemode": "", "team1_score": "", "team2_score": ""}
-
-                # --- Append to Match History
-                match_history_sheet = get_or_create_sheet(
-                    self.parent.spreadsheet,
-                    "Match History",
-                    [
-                        "Week", "Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date",
-                        "Map 1 Mode", "Map 1 A", "Map 1 B",
-                        "Map 2 Mode", "Map 2 A", "Map 2 B",
-                        "Map 3 Mode", "Map 3 A", "Map 3 B",
-                        "Total A", "Total B", "Maps Won A", "Maps Won B", "Winner"
-                    ]
-                )
-
-                match_history_sheet.append_row([
-                    week_number,
-                    match_id,
-                    team_a,
-                    team_b,
-                    proposed_date,
-                    scheduled_date,
-                    map1["gamemode"], map1["team1_score"], map1["team2_score"],
-                    map2["gamemode"], map2["team1_score"], map2["team2_score"],
-                    map3["gamemode"], map3["team1_score"], map3["team2_score"],
-                    total_a,
-                    total_b,
-                    maps_won_a,
-                    maps_won_b,
-                    winner
-                ])
-
-                # ✅ Log completed challenge match (for enforcement)
-                if self.match.get("is_challenge"):
-                    from datetime import datetime
-                    league_week_sheet = get_or_create_sheet(self.parent.spreadsheet, "LeagueWeek", ["League Week"])
-                    week_number = int(league_week_sheet.get_all_values()[1][0])
-
-                    challenge_sheet = get_or_create_sheet(
-                        self.parent.spreadsheet,
-                        "Challenge Matches",
-                        ["Week", "Team A", "Team B", "Proposer ID", "Completion Date"]
-                    )
-
-                    challenge_sheet.append_row([
-                        week_number,
-                        self.match["team1"],
-                        self.match["team2"],
-                        str(self.proposer.id),
-                        datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
-                    ])
-
-                
-                # Announce final result to score/results channel
-                score_channel_id = self.parent.bot.config.get("score_channel_id")
-                score_channel = self.parent.bot.get_channel(score_channel_id)
-
-                if score_channel:
-                    result_embed = discord.Embed(
-                        title="🏆 Final Match Result",
-                        description=f"**{self.match['team1']}** vs **{self.match['team2']}**",
-                        color=discord.Color.gold()
-                    )
-                    for i, s in enumerate(self.map_scores, 1):
-                        result_embed.add_field(
-                            name=f"Map {i} ({s['gamemode']})",
-                            value=f"{self.match['team1']} {s['team1_score']} - {s['team2_score']} {self.match['team2']}",
-                            inline=False
-                        )
-                    result_embed.add_field(name="Winner", value=winner, inline=False)
-                    await score_channel.send(embed=result_embed)
-
-                # 🛎️ Ping both teams in the same message
-                def get_mentions(team_name, guild):
-                    row = next((r for r in self.parent.teams_sheet.get_all_values() if r[0] == team_name), [])
-                    mentions = []
-                    for cell in row[1:]:
-                        if "(" in cell and ")" in cell:
-                            user_id = cell.split("(")[-1].split(")")[0]
-                            try:
-                                member = guild.get_member(int(user_id))
-                                if member:
-                                    mentions.append(member.mention)
-                            except Exception:
-                                continue
-                    return mentions
-
-                guild = interaction.guild or discord.utils.get(self.parent.bot.guilds)
-                mentions_a = get_mentions(self.match["team1"], guild)
-                mentions_b = get_mentions(self.match["team2"], guild)
-
-                # Safely format match time (UTC fallback)
-                match_time = self.match.get("proposed_datetime")
-                if isinstance(match_time, str):
-                    try:
-                        match_time = datetime.fromisoformat(match_time)
-                    except:
-                        match_time = None
-
-                if not match_time:
-                    match_time = datetime.utcnow()
-
-                formatted_dt = match_time.strftime("%Y-%m-%d %I:%M %p %Z").strip()
-                discord_ts = int(match_time.replace(tzinfo=timezone.utc).timestamp())
-
-                await score_channel.send(
-                    f"🏁 Final score submitted for **{self.match['team1']}** vs **{self.match['team2']}**\n"
-                    f"{' '.join(mentions_a)} vs {' '.join(mentions_b)}\n"
-                    f"🕒 <t:{discord_ts}:F> (<t:{discord_ts}:R>)\n"
-                )
-
-                # Notify and cleanup
-                await safe_send(interaction, "✅ Score accepted and finalized!\n✅ Scores accepted and saved!", ephemeral=True)
-
-                # DM proposer (safe)
-                try:
-                    await self.proposer.send("✅ Your proposed match scores have been accepted and finalized.")
-                except discord.Forbidden:
-                    pass
-
-                # Delete the message (safe)
-                try:
-                    await interaction.message.delete()
-                except (discord.NotFound, AttributeError):
-                    pass
-
-                # Delete private channel or proposed-score channel
-                if self.private_channel:
-                    try:
-                        if self.private_channel:
-                            await self.private_channel.delete()
-                    except discord.NotFound:
-                        print(f"[⚠️] Tried to delete channel but it no longer exists: {self.private_channel}")
-                    except Exception as e:
-                        print(f"[❌] Failed to delete private channel: {e}")
-                elif isinstance(interaction.channel, discord.TextChannel) and interaction.channel.name.startswith("proposed-score"):
-                    await interaction.channel.delete()
-
-            @discord.ui.button(label="❌ Deny Scores", style=discord.ButtonStyle.red)
-            async def deny(self, interaction: discord.Interaction, button: discord.ui.Button):
-                await interaction.response.send_message("❌ Scores denied.", ephemeral=True)
-
-                # DM proposer (safe)
-                try:
-                    await self.proposer.send("❌ Your proposed match scores were denied.")
-                except discord.Forbidden:
-                    pass
-
-                await interaction.message.delete()
-
-                # Delete private channel or proposed-score channel
-                if self.private_channel:
-                    await self.private_channel.delete()
-                elif isinstance(interaction.channel, discord.TextChannel) and interaction.channel.name.startswith("proposed-score"):
-                    await interaction.channel.delete()
-
-            async def on_timeout(self):
-                try:
-                    await self.proposer.send("⏳ Your proposed scores expired due to no response.")
-                except:
-                    pass
-
-                # Delete private channel or message
-                try:
-                    if self.private_channel:
-                        await self.private_channel.delete()
-                except:
-                    pass
-
-                try:
-                    if self.message:
-                        await self.message.delete()
-                except:
-                    pass
-
-                # Remove from proposed sheet
-                for idx, row in enumerate(self.parent.proposed_sheet.get_all_values()[1:], start=2):
-                    if (
-                        row[0] == self.match["team1"] and row[1] == self.match["team2"]
-                    ) or (
-                        row[0] == self.match["team2"] and row[1] == self.match["team1"]
-                    ):
-                        self.parent.proposed_sheet.delete_rows(idx)
-                        break
-
         class MapScoreModal(discord.ui.Modal, title="Enter Map Score"):
             def __init__(self, parent, match, map_scores, map_number, gamemode):
                 super().__init__()
@@ -1128,40 +1325,36 @@ class LeaguePanel(View):
 
                 await interaction.response.send_message("✅ Proposed scores submitted. Waiting for opponent confirmation...", ephemeral=True)
 
-                opponent_team = self.match["team2"] if interaction.user in [m for m in discord.utils.get(interaction.guild.roles, name=f"Team {self.match['team1']} Captain").members] else self.match["team1"]
-                opponent_role = discord.utils.get(interaction.guild.roles, name=f"Team {opponent_team} Captain")
-                opponent_captain = opponent_role.members[0] if opponent_role and opponent_role.members else None
+                opponent_team = self.match["team2"] if teamroles.is_captain(interaction.user.id, self.match["team1"]) else self.match["team1"]
+                opponent_captain = await teamroles.captain_member(interaction.guild, opponent_team)
 
                 embed = discord.Embed(title="Proposed Match Scores", description=f"**{self.match['team1']}** vs **{self.match['team2']}**")
                 for i, s in enumerate(self.map_scores, 1):
                     embed.add_field(name=f"Map {i} ({s['gamemode']})", value=f"{self.match['team1']} {s['team1_score']} - {s['team2_score']} {self.match['team2']}", inline=False)
 
                 if opponent_captain:
+                    payload = ScoreConfirmPrompt.payload(self.match, self.map_scores, interaction.user.id)
+                    key, view = ScoreConfirmPrompt.open(payload)
                     try:
-                        await opponent_captain.send(embed=embed, view=ConfirmScoreView(self.parent, self.match, self.map_scores, interaction.user))
-                    except discord.Forbidden:
-                        try:
-                            category_id = self.parent.config.get("fallback_category_id")
-
-                            private_channel = await create_private_channel(
+                        msg = await delivery.router.deliver(
+                            opponent_captain,
+                            embed=embed,
+                            view=view,
+                            fallback=lambda: delivery.open_fallback(
                                 interaction.guild,
-                                int(category_id),
                                 f"proposed-score-{self.match['team1']}-vs-{self.match['team2']}",
                                 [opponent_captain]
-                            )
-
-                            if private_channel:
-                                await private_channel.send(
-                                    f"{opponent_captain.mention} 📨 Proposed Match Scores from **{self.match['team1']}**.",
-                                    embed=embed,
-                                    view=ConfirmScoreView(self.parent, self.match, self.map_scores, interaction.user, private_channel)
-                                )
-                                view.private_channel = private_channel
-                            else:
-                                await interaction.followup.send("❌ Failed to create fallback channel.", ephemeral=True)
+                            ),
+                            fallback_content=f"{opponent_captain.mention} 📨 Proposed Match Scores from **{self.match['team1']}**.",
+                            ttl=fallback_channel_ttl()
+                        )
+                        if msg is None:
+                            await interaction.followup.send("❌ Failed to create fallback channel.", ephemeral=True)
+                        else:
+                            pending.attach(key, msg)
 
-                        except Exception as e:
-                            await interaction.followup.send(f"❌ Error creating fallback channel: {e}", ephemeral=True)
+                    except Exception as e:
+                        await interaction.followup.send(f"❌ Error creating fallback channel: {e}", ephemeral=True)
 
         class MatchSelectView(discord.ui.View):
             def __init__(self, parent, matches):
@@ -1209,10 +1402,7 @@ class LeaguePanel(View):
             team2 = match[2]
             date = match[3]
 
-            team1_role = discord.utils.get(interaction.guild.roles, name=f"Team {team1} Captain")
-            team2_role = discord.utils.get(interaction.guild.roles, name=f"Team {team2} Captain")
-
-            if (team1_role and user_id in [str(m.id) for m in team1_role.members]) or (team2_role and user_id in [str(m.id) for m in team2_role.members]):
+            if teamroles.is_captain(user_id, team1) or teamroles.is_captain(user_id, team2):
                 matches.append({
                     "match_id": match_id,
                     "match_type": "weekly",
@@ -1229,10 +1419,65 @@ class LeaguePanel(View):
         view = MatchSelectView(self, matches)
         await interaction.response.send_message("Select match to propose score:", view=view, ephemeral=True)
 
+    # -------------------- SET AVAILABILITY --------------------
+
+    @discord.ui.button(label="🕒 Set Availability", style=discord.ButtonStyle.secondary, custom_id="league:set_availability")
+    async def set_availability(self, interaction: discord.Interaction, button: discord.ui.Button):
+        user_id = str(interaction.user.id)
+        team_name = None
+        for row in self.teams_sheet.get_all_values()[1:]:
+            if len(row) > 1 and extract_user_id(row[1]) == user_id:
+                team_name = row[0]
+                break
+
+        if not team_name:
+            await interaction.response.send_message("❗ Only team captains can set availability.", ephemeral=True)
+            return
+
+        current = availability.get_bitmap(self.spreadsheet, team_name)
+
+        class AvailabilityModal(discord.ui.Modal, title="Weekly Availability"):
+            slots = discord.ui.TextInput(
+                label="Free times (server time)",
+                style=discord.TextStyle.paragraph,
+                placeholder="Mon 18:00-22:00, Sat-Sun 12pm-4pm, weekdays 8pm-11pm",
+                default=availability.describe(current) if current else None,
+                required=True
+            )
+
+            def __init__(self, parent):
+                super().__init__()
+                self.parent = parent
+
+            async def on_submit(self, modal_interaction: discord.Interaction):
+                try:
+                    bits = availability.parse_availability(self.slots.value)
+                except ValueError as e:
+                    await modal_interaction.response.send_message(f"❗ {e}", ephemeral=True)
+                    return
+
+                availability.save_bitmap(self.parent.spreadsheet, team_name, bits)
+                await modal_interaction.response.send_message(
+                    f"✅ Availability saved for **{team_name}**:\n{availability.describe(bits)}",
+                    ephemeral=True
+                )
+
+        await interaction.response.send_modal(AvailabilityModal(self))
+
+    # -------------------- MY RANK --------------------
+
+    @discord.ui.button(label="📈 My Rank", style=discord.ButtonStyle.secondary, custom_id="league:my_rank")
+    async def my_rank(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await standings.send_rank(interaction)
+
     # -------------------- JOIN TEAM --------------------
     
-    @discord.ui.button(label="👥 Join Team", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="👥 Join Team", style=discord.ButtonStyle.blurple, custom_id="league:join_team")
     async def join_team(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.start_join(interaction)
+
+    async def start_join(self, interaction: discord.Interaction, team=None):
+        """Join flow shared by the panel button (search modal) and /join (team already picked)."""
         user_id = str(interaction.user.id)
 
         # Check if user is signed up
@@ -1248,12 +1493,14 @@ class LeaguePanel(View):
                 self.parent_view = parent_view
 
             async def on_submit(self, interaction: discord.Interaction):
-                search = self.query.value.lower()
-                all_teams = [row[0] for row in self.parent_view.teams_sheet.get_all_values() if row[0]]
-
-                matches = [team for team in all_teams if search in team.lower()]
+                # ✅ Ranked from the in-memory index; capped at the 25 options a select can hold
+                roster.ensure()
+                matches = [e.value for e in search_index.teams.search(self.query.value)]
+                if not matches:
+                    matches = [e.value for e in search_index.teams.search("")]
                 if not matches:
-                    matches = all_teams[:25]
+                    await interaction.response.send_message("❗ No teams found.", ephemeral=True)
+                    return
 
                 view = TeamSelectView(self.parent_view, matches, interaction.user)
                 await interaction.response.send_message("Select the team you want to join:", view=view, ephemeral=True)
@@ -1271,8 +1518,9 @@ class LeaguePanel(View):
                 self.add_item(select)
 
             async def select_team(self, interaction: discord.Interaction):
-                selected_team = self.children[0].values[0]
+                await self.request_join(interaction, self.children[0].values[0])
 
+            async def request_join(self, interaction: discord.Interaction, selected_team):
                 headers = self.parent_view.teams_sheet.row_values(1)
                 if "Locked" in headers:
                     locked_col = headers.index("Locked") + 1
@@ -1289,31 +1537,20 @@ class LeaguePanel(View):
                             return
 
                 guild = interaction.guild
-                team_role = discord.utils.get(guild.roles, name=f"Team {selected_team}")
-
-                if not team_role:
-                    await interaction.response.send_message("❗ Team role does not exist.", ephemeral=True)
+                if not roster.get(selected_team):
+                    await interaction.response.send_message("❗ Team does not exist.", ephemeral=True)
                     return
 
-                captain = None
-                for member in team_role.members:
-                    cap_role = discord.utils.get(guild.roles, name=f"Team {selected_team} Captain")
-                    if cap_role and cap_role in member.roles:
-                        captain = member
-                        break
+                captain = await teamroles.captain_member(guild, selected_team)
 
                 if not captain:
                     await interaction.response.send_message("❗ Could not find team captain.", ephemeral=True)
                     return
 
-                try:
-                    await captain.send(
-                        f"📥 **{self.user.display_name}** wants to join **{selected_team}**. Approve?",
-                        view=AcceptDenyJoinRequestView(self.parent_view, selected_team, self.user, guild.id)
-                    )
-                    await interaction.response.send_message("✅ Request sent to team captain via DM.", ephemeral=True)
+                payload = JoinRequestPrompt.payload(selected_team, self.user.id, guild.id)
+                key, view = JoinRequestPrompt.open(payload)
 
-                except discord.Forbidden:
+                async def team_requests_channel():
                     fallback_channel = discord.utils.get(guild.text_channels, name="team-requests")
                     if fallback_channel is None:
                         overwrites = {
@@ -1321,126 +1558,46 @@ class LeaguePanel(View):
                             captain: discord.PermissionOverwrite(read_messages=True, send_messages=True),
                             guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
                         }
-                        fallback_channel = await guild.create_text_channel("team-requests", overwrites=overwrites)
-                    else:
-                        await fallback_channel.set_permissions(captain, read_messages=True, send_messages=True)
-
-                    # After fallback_channel.send(...)
-                    await fallback_channel.send(
-                        f"📥 {captain.mention} **{self.user.display_name}** wants to join **{selected_team}**. Approve?",
-                        view=AcceptDenyJoinRequestView(self.parent_view, selected_team, self.user, guild.id)
-                    )
-
-                    # Use safe send response to user
-                    await safe_send(interaction, "✅ Captain's DMs closed, sent request to private channel.")
-
-                    # Define auto_delete
-                    async def auto_delete(channel):
-                        await discord.utils.sleep_until(datetime.utcnow() + timedelta(minutes=5))
-                        try:
-                            if len([m async for m in channel.history(limit=1)]) > 0:
-                                await channel.delete()
-                        except discord.NotFound:
-                            print("❗ Tried to auto-delete, but channel no longer exists.")
-
-                    # Schedule it
-                    self.parent_view.bot.loop.create_task(auto_delete(fallback_channel))
-
-
-        class AcceptDenyJoinRequestView(discord.ui.View):
-            def __init__(self, parent_view, team_name, invitee, guild_id):
-                super().__init__(timeout=300)
-                self.parent_view = parent_view
-                self.team_name = team_name
-                self.invitee = invitee
-                self.guild_id = guild_id
-
-            @discord.ui.button(label="✅ Accept", style=discord.ButtonStyle.success)
-            async def accept(self, interaction: discord.Interaction, button: discord.ui.Button):
-                guild = self.parent_view.bot.get_guild(self.guild_id)
-                team_role = discord.utils.get(guild.roles, name=f"Team {self.team_name}")
-
-                if not team_role:
-                    await interaction.response.send_message("❗ Team role no longer exists.", ephemeral=True)
-                    return
-
-                already_on_team = False
-                for row in self.parent_view.teams_sheet.get_all_values():
-                    for cell in row[1:7]:
-                        if cell.strip() == f"{self.invitee.display_name} ({self.invitee.id})":
-                            already_on_team = True
-                            break
-                    if already_on_team:
-                        break
-
-                if already_on_team:
-                    await interaction.response.send_message("❗ Player is already on another team.", ephemeral=True)
+                        return await guild.create_text_channel("team-requests", overwrites=overwrites)
+                    await fallback_channel.set_permissions(captain, read_messages=True, send_messages=True)
+                    return fallback_channel
+
+                # ✅ Each fallback request pushes the shared channel's removal back past its own expiry
+                msg = await delivery.router.deliver(
+                    captain,
+                    f"📥 **{self.user.display_name}** wants to join **{selected_team}**. Approve?",
+                    view=view,
+                    fallback=team_requests_channel,
+                    fallback_content=f"📥 {captain.mention} **{self.user.display_name}** wants to join **{selected_team}**. Approve?",
+                    ttl=fallback_channel_ttl()
+                )
+                if msg is None:
+                    await safe_send(interaction, "❗ Could not reach the team captain.")
                     return
+                pending.attach(key, msg)
 
-                await self.invitee.add_roles(team_role)
-
-                for idx, row in enumerate(self.parent_view.teams_sheet.get_all_values(), 1):
-                    if row[0].lower() == self.team_name.lower():
-                        max_players = self.parent_view.config.get("team_max_players", 6)
-                        current_players = [p for p in row[1:7] if p.strip()]
-                        if len(current_players) >= max_players:
-                            await interaction.response.send_message(
-                                f"❗ This team already has the maximum number of players ({max_players}).",
-                                ephemeral=True
-                            )
-                            return
-                        for i in range(1, 7):
-                            if row[i] == "":
-                                self.parent_view.teams_sheet.update_cell(idx, i + 1, f"{self.invitee.display_name} ({self.invitee.id})")
-                                break
-                        # ✅ Check minimum player count
-                        team_row = self.parent_view.teams_sheet.row_values(idx)
-                        player_count = sum(1 for cell in team_row[1:7] if cell.strip())
-                        min_required = self.parent_view.config.get("team_min_players", 3)
-
-                        if player_count == min_required:
-                            try:
-                                await self.parent_view.send_notification(
-                                    f"✅ **{self.team_name}** has reached the minimum required players ({min_required}) and is now eligible for matches!"
-                                )
-                            except Exception as e:
-                                print(f"❗ Failed to send team eligibility notification: {e}")    
-                        break
-
-                await interaction.response.send_message("✅ Player added to team.", ephemeral=True)
-
-                # ✅ Send notification to league announcement channel
-                try:
-                    await self.parent_view.send_notification(
-                        f"👥 {self.invitee.mention} has joined **{self.team_name}**!"
-                    )
-                except Exception as e:
-                    print(f"❗ Failed to send join team notification: {e}")
-
-                await interaction.message.delete()
-
-                if interaction.channel and interaction.channel.name == "team-requests":
-                    await interaction.channel.delete()
-
-            @discord.ui.button(label="❌ Deny", style=discord.ButtonStyle.danger)
-            async def deny(self, interaction: discord.Interaction, button: discord.ui.Button):
-                await interaction.response.send_message("❌ Request denied.", ephemeral=True)
+                if isinstance(msg.channel, discord.DMChannel):
+                    await safe_send(interaction, "✅ Request sent to team captain via DM.")
+                else:
+                    await safe_send(interaction, "✅ Captain's DMs closed, sent request to private channel.")
 
-                await interaction.message.delete()
 
-                if interaction.channel and interaction.channel.name == "team-requests":
-                    await interaction.channel.delete()
+        if team:
+            await TeamSelectView(self, [team], interaction.user).request_join(interaction, team)
+            return
 
         await interaction.response.send_modal(TeamSearchModal(self))
 
     # -------------------- LEAVE TEAM --------------------
 
-    @discord.ui.button(label="🚪 Leave Team", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="🚪 Leave Team", style=discord.ButtonStyle.red, custom_id="league:leave_team")
     async def leave_team(self, interaction: discord.Interaction, button: discord.ui.Button):
         username_id = f"{interaction.user.display_name} ({interaction.user.id})"
 
-        for idx, team in enumerate(self.teams_sheet.get_all_values(), 1):
-            if username_id in team:
+        guard = GuardedSheet(self.teams_sheet)
+        for team_row in guard.read():
+            team = team_row.values
+            if username_id in team[1:7]:
                 team_name = team[0]
 
                 if username_id == team[1]:
@@ -1448,15 +1605,19 @@ class LeaguePanel(View):
                     return
 
                 # Remove from sheet
-                self.teams_sheet.update_cell(idx, team.index(username_id) + 1, "")
+                try:
+                    guard.update(
+                        team_row,
+                        lambda v: v[:2] + ["" if cell == username_id else cell for cell in v[2:7]] + v[7:],
+                        predicate=lambda v: username_id in v[2:7]
+                    )
+                except RowConflict as e:
+                    await interaction.response.send_message(f"❗ {e} Try again.", ephemeral=True)
+                    return
+                roster.invalidate()
 
                 # Remove team role
-                team_role = discord.utils.get(interaction.guild.roles, name=f"Team {team_name}")
-                if team_role:
-                    try:
-                        await interaction.user.remove_roles(team_role)
-                    except discord.Forbidden:
-                        print(f"❗ Failed to remove role from {interaction.user.display_name}")
+                await teamroles.remove_member(interaction.guild, team_name, interaction.user)
 
                 await interaction.response.send_message(f"✅ You left **{team_name}**.", ephemeral=True)
 
@@ -1472,42 +1633,43 @@ class LeaguePanel(View):
 
     # -------------------- UNSIGNUP --------------------
 
-    @discord.ui.button(label="❌ Unsignup", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="❌ Unsignup", style=discord.ButtonStyle.red, custom_id="league:unsignup")
     async def unsignup(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = str(interaction.user.id)
 
         # Check if on a team first
         for team in self.teams_sheet.get_all_values():
-            for cell in team[1:]:
+            for cell in team[1:7]:
                 if extract_user_id(cell) == user_id:
                     await interaction.response.send_message("❗ You are currently on a team. Leave your team before unsigning.", ephemeral=True)
                     return
 
         # Check if signed up
-        for idx, row in enumerate(self.players_sheet.get_all_values(), 1):
-            if len(row) > 0 and row[0].strip() == user_id:
-                self.players_sheet.delete_rows(idx)
-                await interaction.response.send_message("✅ You have been removed from the league.", ephemeral=True)
-
-                try:
-                    await self.send_notification(f"❌ {interaction.user.mention} has left the league.")
-                except Exception as e:
-                    print(f"❗ Failed to send unsignup notification: {e}")
-                return
+        if GuardedSheet(self.players_sheet).delete_where(lambda row: row[0].strip() == user_id):
+            search_index.remove_player(user_id)
+            await interaction.response.send_message("✅ You have been removed from the league.", ephemeral=True)
+
+            try:
+                await self.send_notification(f"❌ {interaction.user.mention} has left the league.")
+            except Exception as e:
+                print(f"❗ Failed to send unsignup notification: {e}")
+            return
 
         await interaction.response.send_message("❗ You are not signed up.", ephemeral=True)
 
     # -------------------- PROMOTE PLAYER ------------------
 
-    @discord.ui.button(label="⭐ Promote Player", style=discord.ButtonStyle.green)
+    @discord.ui.button(label="⭐ Promote Player", style=discord.ButtonStyle.green, custom_id="league:promote_player")
     async def promote_player(self, interaction: discord.Interaction, button: discord.ui.Button):
         username_id = f"{interaction.user.display_name} ({interaction.user.id})"
 
         # Find team and check if user is captain
-        for idx, team in enumerate(self.teams_sheet.get_all_values(), 1):
+        guard = GuardedSheet(self.teams_sheet)
+        for team_row in guard.read():
+            team = team_row.values
             if team[1] == username_id:
                 team_name = team[0]
-                members = [player for player in team[1:] if player]
+                members = [player for player in team[1:7] if player]
 
                 # Build dropdown options (skip self / captain)
                 options = [
@@ -1520,12 +1682,12 @@ class LeaguePanel(View):
                     return
 
                 class PromoteSelect(discord.ui.View):
-                    def __init__(self, parent, team_name, old_captain, team_idx):
+                    def __init__(self, parent, team_name, old_captain, team_row):
                         super().__init__(timeout=300)
                         self.parent = parent
                         self.team_name = team_name
                         self.old_captain = old_captain
-                        self.team_idx = team_idx
+                        self.team_row = team_row
 
                         select = discord.ui.Select(placeholder="Select player to promote", options=options)
                         select.callback = self.promote
@@ -1538,18 +1700,13 @@ class LeaguePanel(View):
                         old_captain_member = guild.get_member(int(extract_user_id(self.old_captain)))
                         new_captain_member = guild.get_member(int(new_captain_user_id))
 
-                        captain_role = discord.utils.get(guild.roles, name=f"Team {self.team_name} Captain")
-                        if captain_role:
-                            await old_captain_member.remove_roles(captain_role)
-                            await new_captain_member.add_roles(captain_role)
-
                         # Update sheet: move old captain to player spot and new captain to spot 2
-                        row = self.parent.teams_sheet.row_values(self.team_idx)
+                        row = self.team_row.values
                         new_row = [self.team_name, f"{new_captain_member.display_name} ({new_captain_member.id})"]
                         added = False
 
                         new_captain_str = f"{new_captain_member.display_name} ({new_captain_member.id})"
-                        for val in row[1:]:
+                        for val in row[1:7]:
                             if val in [self.old_captain, new_captain_str]:
                                 continue  # Skip old and new captain from old positions
                             if not added and len(new_row) < 7:
@@ -1561,19 +1718,28 @@ class LeaguePanel(View):
                         while len(new_row) < 7:
                             new_row.append("")
 
-                        self.parent.teams_sheet.update(f"A{self.team_idx}:G{self.team_idx}", [new_row])
+                        # Only write if nobody edited the team since the dropdown was built
+                        try:
+                            guard.update(self.team_row, new_row + row[7:],
+                                         predicate=lambda v: v[0] == self.team_name and v[1] == self.old_captain)
+                        except RowConflict:
+                            await select_interaction.response.send_message("❗ Your team changed while you were choosing. Please open Promote again.", ephemeral=True)
+                            return
+                        roster.invalidate()
+
+                        await teamroles.move_captain(guild, self.team_name, old_captain_member, new_captain_member)
 
                         await select_interaction.response.send_message(f"✅ {new_captain_member.mention} is now the captain of **{self.team_name}**!", ephemeral=True)
                         await self.parent.send_notification(f"⭐ {new_captain_member.mention} has been promoted to **Captain of {self.team_name}**.")
 
-                await interaction.response.send_message("Select player to promote to captain:", view=PromoteSelect(self, team_name, username_id, idx), ephemeral=True)
+                await interaction.response.send_message("Select player to promote to captain:", view=PromoteSelect(self, team_name, username_id, team_row), ephemeral=True)
                 return
 
         await interaction.response.send_message("❗ You are not a captain or on a team.", ephemeral=True)
 
     # -------------------- DISBAND TEAM --------------------
 
-    @discord.ui.button(label="❗ Disband Team", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="❗ Disband Team", style=discord.ButtonStyle.red, custom_id="league:disband_team")
     async def disband_team(self, interaction: discord.Interaction, button: discord.ui.Button):
 
         class DisbandModal(Modal, title="Disband Team"):
@@ -1585,8 +1751,10 @@ class LeaguePanel(View):
 
             async def on_submit(self, modal_interaction: discord.Interaction):
                 team_name = self.team_name.value.strip()
+                guard = GuardedSheet(self.parent_view.teams_sheet)
 
-                for idx, team in enumerate(self.parent_view.teams_sheet.get_all_values(), 1):
+                for team_row in guard.read():
+                    team = team_row.values
                     if team[0].lower() == team_name.lower():
 
                         team_captain_raw = team[1]
@@ -1595,25 +1763,26 @@ class LeaguePanel(View):
                         if captain_id:
                             # Compare by ID
                             if str(modal_interaction.user.id) != str(captain_id):
-                                if str(modal_interaction.user.id) not in self.parent_view.DEV_OVERRIDE_IDS:
+                                if modal_interaction.user.id not in settings.dev_override_ids:
                                     await modal_interaction.response.send_message("❗ Only the captain or a developer can disband this team.", ephemeral=True)
                                     return
                         else:
                             # Fallback → compare display name
                             if str(modal_interaction.user.display_name) not in team_captain_raw:
-                                if str(modal_interaction.user.id) not in self.parent_view.DEV_OVERRIDE_IDS:
+                                if modal_interaction.user.id not in settings.dev_override_ids:
                                     await modal_interaction.response.send_message("❗ Only the captain or a developer can disband this team.", ephemeral=True)
                                     return
 
-                        team_role = discord.utils.get(modal_interaction.guild.roles, name=f"Team {team_name}")
-                        captain_role = discord.utils.get(modal_interaction.guild.roles, name=f"Team {team_name} Captain")
-
-                        if team_role:
-                            await team_role.delete()
-                        if captain_role:
-                            await captain_role.delete()
+                        # ✅ Delete the row before the role awaits; the stamp check catches rows moved by hand
+                        async with locks.hold(team_key(team[0]), sheet_key("Teams")):
+                            try:
+                                guard.delete(team_row, predicate=lambda v: v[0].lower() == team_name.lower())
+                            except RowConflict:
+                                await modal_interaction.response.send_message("❗ The team changed while disbanding. Please try again.", ephemeral=True)
+                                return
+                            roster.invalidate()
 
-                        self.parent_view.teams_sheet.delete_rows(idx)
+                        await teamroles.delete(modal_interaction.guild, team[0])
 
                         await modal_interaction.response.send_message("✅ Team disbanded successfully.", ephemeral=True)
                         await self.parent_view.send_notification(f"💥 **{team_name}** has been disbanded.")
@@ -0,0 +1,166 @@
+import time
+from collections import Counter
+
+import discord
+
+from janitor import janitor
+from outbound import outbound, INTERACTIVE, NOTIFY
+from scheduler import scheduler
+from settings import settings
+
+# -------------------- Fallback Delivery --------------------
+# Where a prompt goes when the captain's DMs are closed. "channel" mode makes a
+# private text channel in the fallback category (slow, rate limited, 50 per category,
+# 500 per guild, and each one has to be deleted later). "thread" mode opens a private
+# thread in one parent channel and adds just the people involved; finished threads
+# are archived rather than deleted. Either way the janitor owns the cleanup.
+
+THREAD_ARCHIVE_MINUTES = 1440
+
+async def create_private_channel(guild, category_id, channel_name, members):
+    category = guild.get_channel(int(category_id)) if category_id else None
+    if not isinstance(category, discord.CategoryChannel):
+        print(f"❗ Category with ID {category_id} not found.")
+        return None
+
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False),
+        guild.me: discord.PermissionOverwrite(read_messages=True)
+    }
+
+    for member in members:
+        overwrites[member] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+
+    return await guild.create_text_channel(name=channel_name, category=category, overwrites=overwrites)
+
+async def open_private_thread(guild, parent_id, thread_name, members):
+    parent = guild.get_channel(int(parent_id)) if parent_id else None
+    if not isinstance(parent, discord.TextChannel):
+        print(f"❗ Fallback thread channel with ID {parent_id} not found.")
+        return None
+
+    thread = await parent.create_thread(
+        name=thread_name[:100],
+        type=discord.ChannelType.private_thread,
+        invitable=False,
+        auto_archive_duration=THREAD_ARCHIVE_MINUTES
+    )
+    for member in members:
+        await thread.add_user(member)
+    return thread
+
+async def open_fallback(guild, name, members):
+    """Private place to post a prompt for members whose DMs are closed. None if it could not be made."""
+    if settings.fallback_mode == "thread":
+        return await open_private_thread(guild, settings.fallback_thread_channel_id, name, members)
+    return await create_private_channel(guild, settings.fallback_category_id, name, members)
+
+def is_fallback(channel, prefix):
+    """True for a fallback channel or thread created for this kind of prompt."""
+    return isinstance(channel, (discord.TextChannel, discord.Thread)) and channel.name.startswith(prefix)
+
+# -------------------- Delivery Router --------------------
+# Remembers which users have closed DMs, so a prompt for them goes straight to the
+# fallback instead of paying for a failed DM (and its 403) every time. An
+# unreachable mark lasts "dm_recheck_minutes"; when it runs out on the shared
+# scheduler the mark is dropped and the user's next prompt tries their DMs again.
+# Per-route counts and latency are kept for the dev panel.
+
+RECHECK_KIND = "dm-recheck"
+
+def recheck_key(user_id):
+    return f"dm:{user_id}"
+
+class DeliveryRouter:
+    def __init__(self):
+        self.unreachable = {}   # user id -> unix time their DMs were found closed
+        self.counts = Counter()
+        self.latency = {}       # route -> [count, total seconds, max seconds]
+        scheduler.on(RECHECK_KIND, self._recheck)
+
+    # --- Reachability ---
+
+    def reachable(self, user_id):
+        """False while the user's DMs are known to be closed, True otherwise (including unknown)."""
+        return user_id not in self.unreachable
+
+    def mark_unreachable(self, user_id):
+        self.unreachable[user_id] = time.time()
+        scheduler.schedule(recheck_key(user_id), time.time() + settings.dm_recheck_minutes * 60, RECHECK_KIND)
+
+    def mark_reachable(self, user_id):
+        if self.unreachable.pop(user_id, None) is not None:
+            scheduler.cancel(recheck_key(user_id))
+
+    async def _recheck(self, key):
+        if self.unreachable.pop(int(key.split(":", 1)[1]), None) is not None:
+            self.counts["rechecks"] += 1
+
+    # --- Sending ---
+
+    def _record(self, route, started):
+        took = time.monotonic() - started
+        entry = self.latency.setdefault(route, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += took
+        entry[2] = max(entry[2], took)
+
+    async def _dm(self, user, *args, priority=NOTIFY, **kwargs):
+        """DM user unless they are known unreachable. The sent message, or None."""
+        if not self.reachable(user.id):
+            self.counts["dm_skipped"] += 1
+            return None
+        started = time.monotonic()
+        try:
+            msg = await outbound.send(user, *args, priority=priority, **kwargs)
+        except discord.Forbidden:
+            self.mark_unreachable(user.id)
+            self.counts["dm_forbidden"] += 1
+            return None
+        self._record("dm", started)
+        self.mark_reachable(user.id)
+        return msg
+
+    async def deliver(self, member, content=None, *, fallback, fallback_content=None, ttl=None, priority=INTERACTIVE, **kwargs):
+        """Send a prompt to member by DM, or in the place fallback() opens if their DMs are closed.
+
+        fallback is an async callable returning a channel or thread (None if it could not
+        be made); the janitor removes it after ttl seconds. Prompts go out at INTERACTIVE
+        priority, since someone is waiting on them. Returns the sent message or None.
+        """
+        msg = await self._dm(member, content, priority=priority, **kwargs)
+        if msg is not None:
+            return msg
+
+        started = time.monotonic()
+        place = await fallback()
+        if place is None:
+            self.counts["failed"] += 1
+            return None
+        if ttl is not None:
+            janitor.register(place, ttl)
+        if fallback_content is None:
+            fallback_content = f"{member.mention} {content}" if content else member.mention
+        msg = await outbound.send(place, fallback_content, priority=priority, **kwargs)
+        self._record("thread" if isinstance(place, discord.Thread) else "channel", started)
+        return msg
+
+    async def notify(self, user, content):
+        """One-way DM. Users with closed DMs are skipped. True if it was sent."""
+        return await self._dm(user, content) is not None
+
+    # --- Reporting ---
+
+    def report(self):
+        lines = []
+        for route, (count, total, worst) in sorted(self.latency.items()):
+            lines.append(f"**{route}**: {count} sent, avg {total / count * 1000:.0f} ms, max {worst * 1000:.0f} ms")
+        lines.append(
+            f"DMs refused: {self.counts['dm_forbidden']} · skipped: {self.counts['dm_skipped']} · "
+            f"fallback failures: {self.counts['failed']}"
+        )
+        lines.append(f"Users marked unreachable: {len(self.unreachable)} (re-tested: {self.counts['rechecks']})")
+        return "\n".join(lines)
+
+# Shared instance used by every module
+router = DeliveryRouter()
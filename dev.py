@@ -1,6 +1,21 @@
 import discord
 from discord.ui import View, Modal, TextInput
-import json
+from gspread.utils import rowcol_to_a1
+import time
+from standings import standings, request_leaderboard_refresh
+from roster import roster, parse_player
+from rowguard import GuardedSheet, RowConflict
+import announcer
+from outbound import BULK
+from webhooks import webhooks
+import panels as panel_store
+import startup
+import teamroles
+import search as search_index
+from delivery import router
+from locks import locks, sheet_key
+import replay
+from settings import settings
 
 def get_or_create_sheet(spreadsheet, name, headers):
     try:
@@ -10,7 +25,70 @@ def get_or_create_sheet(spreadsheet, name, headers):
         sheet.append_row(headers)
         return sheet
 
-async def check_dev(interaction, dev_ids):
+TEAMS_HEADERS = ["Team Name", "Captain", "Player 2", "Player 3", "Player 4", "Player 5", "Player 6"]
+
+def cleared_cells(team_rows, matches):
+    """batch_update entries blanking every player cell where matches(cell) is true."""
+    updates = []
+    for idx, row in enumerate(team_rows, start=2):
+        for col in range(1, 7):
+            if col < len(row) and row[col].strip() and matches(row[col]):
+                updates.append({"range": rowcol_to_a1(idx, col + 1), "values": [[""]]})
+    return updates
+
+def locked_column(sheet, headers):
+    """1-based index of the Teams 'Locked' column, adding the header (and column) if missing."""
+    if "Locked" in headers:
+        return headers.index("Locked") + 1
+    col = len(headers) + 1
+    if sheet.col_count < col:
+        sheet.resize(cols=col)
+    return col
+
+def remove_league_player(spreadsheet, user_id, action):
+    """Kick or ban a player: drop them from Players, clear every roster cell, log bans. Returns the row or None."""
+    players = get_or_create_sheet(spreadsheet, "Players", ["User ID","Username"])
+    row = GuardedSheet(players).delete_where(lambda v: v[0] == str(user_id))
+    if row is None:
+        return None
+
+    if action == "Ban":
+        get_or_create_sheet(spreadsheet, "Banned", ["User ID","Username"]).append_row(row)
+    search_index.remove_player(row[0])
+
+    # ✅ Clear the player from every roster at once; match on id, or exact name for id-less cells
+    def is_player(cell):
+        name, cell_id = parse_player(cell)
+        return cell_id == row[0] if cell_id else name == row[1]
+
+    teams = get_or_create_sheet(spreadsheet, "Teams", TEAMS_HEADERS)
+    updates = cleared_cells(teams.get_all_values()[1:], is_player)
+    if updates:
+        teams.batch_update(updates)
+    roster.invalidate()
+    return row
+
+async def slash_remove_player(interaction, player, action):
+    """/kick and /ban: player is an id from autocomplete, or free text resolved through the index."""
+    if not await check_dev(interaction):
+        return
+    if player not in search_index.players.entries:
+        found = search_index.players.search(player, limit=1)
+        if not found:
+            await interaction.response.send_message("❗ Player not found.", ephemeral=True)
+            return
+        player = found[0].value
+
+    await interaction.response.defer(ephemeral=True)
+    row = remove_league_player(interaction.client.spreadsheet, player, action)
+    if row:
+        await interaction.followup.send(f"✅ {action}ed **{row[1]}**.", ephemeral=True)
+    else:
+        await interaction.followup.send("❗ Player not found.", ephemeral=True)
+
+async def check_dev(interaction):
+    # ✅ Read at call time so edits to dev_override_ids apply without a restart
+    dev_ids = settings.dev_override_ids
     if interaction.user.id in dev_ids or any(role.id in dev_ids for role in interaction.user.roles):
         return True
     await interaction.response.send_message("❗ No permission.", ephemeral=True)
@@ -27,16 +105,15 @@ class SafeView(View):
 # -------------------- MATCH TOOLS --------------------
 
 class DevPanel_Match(SafeView):
-    def __init__(self, bot, spreadsheet, dev_ids):
+    def __init__(self, bot, spreadsheet):
         super().__init__(timeout=None)
         self.bot = bot
         self.spreadsheet = spreadsheet
-        self.dev_ids = dev_ids
 
     async def interaction_check(self, interaction):
-        return await check_dev(interaction, self.dev_ids)
+        return await check_dev(interaction)
 
-    @discord.ui.button(label="📥 Force Weekly Matchups", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="📥 Force Weekly Matchups", style=discord.ButtonStyle.red, custom_id="dev:force_weekly")
     async def force_weekly(self, interaction, button):
         class ForceWeeklyMatchups(Modal, title="Force Weekly Matchups"):
             week = TextInput(label="League Week", required=True)
@@ -73,46 +150,165 @@ class DevPanel_Match(SafeView):
 
         await interaction.response.send_modal(ForceWeeklyMatchups(self))
 
-    @discord.ui.button(label="📢 Announce Unscheduled Matches", style=discord.ButtonStyle.green)
+    @discord.ui.button(label="🗓️ Plan Season Schedule", style=discord.ButtonStyle.blurple, custom_id="dev:plan_season")
+    async def plan_season(self, interaction, button):
+        class PlanSeasonModal(Modal, title="Plan Season Schedule"):
+            weeks = TextInput(label="Number of Weeks", required=True)
+            games = TextInput(label="Games per Team per Week (blank = config)", required=False)
+            start = TextInput(label="First Week Number (blank = 1)", required=False)
+
+            def __init__(self, parent):
+                super().__init__()
+                self.parent = parent
+
+            async def on_submit(self, i):
+                import season
+
+                try:
+                    weeks = int(self.weeks.value)
+                    games = int(self.games.value) if self.games.value.strip() else None
+                    start = int(self.start.value) if self.start.value.strip() else 1
+                except ValueError:
+                    await self.parent.safe_send(i, "❗ Weeks, games and first week must be numbers.")
+                    return
+
+                await i.response.defer(ephemeral=True)
+                stats = season.plan_and_store(self.parent.spreadsheet, settings, weeks, games, start)
+                kind = "full round robin" if stats["complete"] else "balanced partial round robin"
+                await i.followup.send(
+                    f"✅ Planned {stats['matches']} matches for {stats['teams']} eligible teams over {weeks} weeks "
+                    f"({stats['rounds']} rounds, {kind}) in {stats['elapsed_ms']:.0f} ms.\n"
+                    f"Force Weekly Matchups will now activate each week from the **Season Schedule** tab.",
+                    ephemeral=True
+                )
+
+        await interaction.response.send_modal(PlanSeasonModal(self))
+
+    @discord.ui.button(label="📢 Announce Unscheduled Matches", style=discord.ButtonStyle.green, custom_id="dev:announce_unscheduled")
     async def announce_unscheduled(self, interaction, button):
         await interaction.response.defer(ephemeral=True)
 
-        with open("config.json") as f:
-            config = json.load(f)
-
-        match_channel = interaction.guild.get_channel(int(config.get("match_channel_id")))
+        match_channel = interaction.guild.get_channel(settings.match_channel_id)
         match_sheet = get_or_create_sheet(self.spreadsheet, "Matches", ["Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date", "Status", "Winner", "Loser", "Proposed By"])
-        team_sheet = get_or_create_sheet(self.spreadsheet, "Teams", ["Team Name", "Captain", "Player 2", "Player 3", "Player 4", "Player 5", "Player 6"])
-
-        # Helper to get mentions for a team
-        def get_mentions(team_name):
-            row = next((r for r in team_sheet.get_all_values() if r[0] == team_name), None)
-            if not row:
-                return ""
-            mentions = []
-            for cell in row[1:]:
-                if "(" in cell and ")" in cell:
-                    user_id = cell.split("(")[-1].split(")")[0]
-                    member = interaction.guild.get_member(int(user_id))
-                    if member:
-                        mentions.append(member.mention)
-            return " ".join(mentions)
 
+        lines = []
         for row in match_sheet.get_all_values()[1:]:
             scheduled_date = row[4]
             status = row[5]
             if scheduled_date in ["", "TBD"] and status not in ["Finished", "Cancelled", "Forfeited"]:
                 team_a, team_b = row[1], row[2]
-                mentions_a = get_mentions(team_a)
-                mentions_b = get_mentions(team_b)
-                await match_channel.send(
+                mentions_a = roster.mentions(team_a)
+                mentions_b = roster.mentions(team_b)
+                lines.append(
                     f"📢 **Unscheduled Match:** {team_a} vs {team_b}\n"
                     f"{mentions_a} vs {mentions_b}"
                 )
 
-        await interaction.followup.send("✅ Announced unscheduled matches with pings.", ephemeral=True)
+        if not lines:
+            await interaction.followup.send("✅ No unscheduled matches to announce.", ephemeral=True)
+            return
+
+        # ✅ Pack into as few messages as possible and report progress while sending
+        chunks = announcer.pack_lines(lines)
+        status_msg = await interaction.followup.send(f"📢 Announcing {len(lines)} matches in {len(chunks)} messages... 0/{len(chunks)}", ephemeral=True, wait=True)
+
+        async def progress(sent, total):
+            if sent == total or sent % 5 == 0:
+                await status_msg.edit(content=f"📢 Announcing {len(lines)} matches in {total} messages... {sent}/{total}")
+
+        send = lambda content: webhooks.announce(match_channel, content, priority=BULK)
+        job = announcer.BulkAnnouncer("unscheduled", chunks, send, progress, match_channel.id)
+        try:
+            await job.run()
+        except Exception as e:
+            await interaction.followup.send(f"❗ Stopped at {job.sent}/{len(chunks)} ({e}). Press again or use 🔁 Resume Announcements to continue.", ephemeral=True)
+            return
+
+        note = " (resumed)" if job.resumed else ""
+        await interaction.followup.send(f"✅ Announced {len(lines)} unscheduled matches with pings in {len(chunks)} messages{note}.", ephemeral=True)
+
+    @discord.ui.button(label="🔁 Resume Announcements", style=discord.ButtonStyle.gray, custom_id="dev:resume_announcements")
+    async def resume_announcements(self, interaction, button):
+        await interaction.response.defer(ephemeral=True)
+        if not announcer.unfinished_jobs():
+            await interaction.followup.send("✅ No unfinished announcements.", ephemeral=True)
+            return
+        results = await announcer.resume_unfinished(self.bot)
+        lines = [f"• `{job_id}`: {sent}/{total}" for job_id, sent, total in results]
+        await interaction.followup.send("🔁 Resumed announcements:\n" + "\n".join(lines or ["(none could be resumed)"]), ephemeral=True)
+
+    @discord.ui.button(label="🕒 Auto-Propose Match Times", style=discord.ButtonStyle.green, custom_id="dev:auto_assign_times")
+    async def auto_assign_times(self, interaction, button):
+        import availability
+        import command_buttons
+
+        await interaction.response.defer(ephemeral=True)
+        weekly = get_or_create_sheet(self.spreadsheet, "Weekly Matches", ["Week","Team A","Team B","Match ID","Scheduled Date"])
+        matches = get_or_create_sheet(self.spreadsheet, "Matches", ["Match ID","Team A","Team B","Proposed Date","Scheduled Date","Status","Winner","Loser","Proposed By"])
+
+        panel = command_buttons.PromptButton.panel
+        if panel is None:
+            await interaction.followup.send("❗ League panel is not set up yet.", ephemeral=True)
+            return
+
+        # ✅ Skip matches already scheduled or with an open proposal
+        taken = {row[0].strip().lower() for row in panel.proposed_sheet.get_all_values()[1:] + panel.scheduled_sheet.get_all_values()[1:] if row}
+        taken |= {row[0].strip().lower() for row in matches.get_all_values()[1:] if len(row) > 5 and row[5] in ["Scheduled", "Finished", "Cancelled", "Forfeited"]}
+
+        weekly_rows = weekly.get_all_values()[1:]
+        unscheduled = {}
+        for row in weekly_rows:
+            if len(row) >= 4 and (len(row) < 5 or row[4] in ["", "TBD"]) and row[3].strip().lower() not in taken:
+                unscheduled[row[3]] = (row[0], row[1], row[2])
+
+        if not unscheduled:
+            await interaction.followup.send("❗ No unscheduled weekly matches without an open proposal.", ephemeral=True)
+            return
+
+        bitmaps = availability.load_bitmaps(self.spreadsheet)
+        match_minutes = settings.match_length_minutes
+        assigned = availability.assign_week([(a, b, mid) for mid, (_, a, b) in unscheduled.items()], bitmaps, match_minutes)
+
+        # ✅ Each slot goes to team B's captain as a normal proposal; nothing counts as scheduled until accepted
+        proposals = [(match_id, dt) for match_id, dt in assigned.items() if dt]
+        if proposals:
+            panel.proposed_sheet.append_rows([
+                [match_id, unscheduled[match_id][1], unscheduled[match_id][2], "System", f"<t:{int(dt.timestamp())}:f>"]
+                for match_id, dt in proposals
+            ])
+
+        sent = 0
+        for match_id, dt in proposals:
+            week, team_a, team_b = unscheduled[match_id]
+            proposed_date = f"<t:{int(dt.timestamp())}:f>"
+            payload = command_buttons.MatchProposalPrompt.payload(
+                team_a, team_b, proposed_date, match_id, "assigned",
+                int(week) if str(week).isdigit() else None, dt
+            )
+            msg = await command_buttons.deliver_match_proposal(
+                interaction.guild,
+                payload,
+                f"📨 Suggested time for **{team_a}** vs **{team_b}**: {proposed_date}, picked from both teams' availability. Accept?"
+            )
+            if msg is None:
+                continue
+            sent += 1
+            if roster.captain_id(team_a):
+                await command_buttons.notify_user(
+                    self.bot, roster.captain_id(team_a),
+                    f"🕒 Suggested {proposed_date} for **{team_a}** vs **{team_b}**; waiting on **{team_b}**'s captain."
+                )
+
+        unplaced = [mid for mid, dt in assigned.items() if not dt]
+        undelivered = len(proposals) - sent
+        await interaction.followup.send(
+            f"✅ Proposed times for {sent}/{len(assigned)} matches from team availability; captains must accept them."
+            + (f"\n⚠️ {undelivered} proposal(s) could not be delivered and will expire." if undelivered else "")
+            + (f"\n⚠️ No shared slot for: {', '.join(unplaced[:20])}" if unplaced else ""),
+            ephemeral=True
+        )
 
-    @discord.ui.button(label="📅 Force Schedule Match", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="📅 Force Schedule Match", style=discord.ButtonStyle.blurple, custom_id="dev:force_schedule")
     async def force_schedule(self, interaction, button):
         class ForceScheduleMatch(Modal, title="Force Schedule Match"):
             team_a = TextInput(label="Team A")
@@ -128,7 +324,7 @@ class DevPanel_Match(SafeView):
                 await self.parent.safe_send(i, "✅ Match scheduled.")
         await interaction.response.send_modal(ForceScheduleMatch(self))
 
-    @discord.ui.button(label="♻️ Reset Weekly Matches", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="♻️ Reset Weekly Matches", style=discord.ButtonStyle.red, custom_id="dev:reset_weekly")
     async def reset_weekly(self, interaction, button):
         sheet = get_or_create_sheet(self.spreadsheet, "Weekly Matches", ["Week","Team A","Team B","Match ID","Scheduled Date"])
         sheet.clear(); sheet.append_row(["Week","Team A","Team B","Match ID","Scheduled Date"])
@@ -137,24 +333,24 @@ class DevPanel_Match(SafeView):
 # -------------------- SCORE TOOLS --------------------
 
 class DevPanel_Score(SafeView):
-    def __init__(self, bot, spreadsheet, dev_ids):
+    def __init__(self, bot, spreadsheet):
         super().__init__(timeout=None)
         self.bot = bot
         self.spreadsheet = spreadsheet
-        self.dev_ids = dev_ids
 
     async def interaction_check(self, interaction):
-        return await check_dev(interaction, self.dev_ids)
+        return await check_dev(interaction)
 
     async def generic_clear(self, interaction, sheet_name):
         sheet = get_or_create_sheet(self.spreadsheet, sheet_name, [])
-        rows = sheet.get_all_values()[1:]
+        guard = GuardedSheet(sheet)
+        rows = {row.key: row for row in guard.read()[:25]}
         options = []
-        for idx, row in enumerate(rows, 2):
-            label = " | ".join(row)
+        for key, row in rows.items():
+            label = " | ".join(v for v in row.values if v)
             if len(label) > 100:
                 label = label[:97] + "..."
-            options.append(discord.SelectOption(label=label, value=str(idx)))
+            options.append(discord.SelectOption(label=label or "(empty row)", value=key))
         if not options:
             await self.safe_send(interaction, "❗ No data found.")
             return
@@ -162,26 +358,32 @@ class DevPanel_Score(SafeView):
         class Confirm(View):
             @discord.ui.select(placeholder="Select to delete", options=options)
             async def select(self, i, select):
-                sheet.delete_rows(int(select.values[0]))
+                # Delete by stamp, not row number: rows may have shifted since the list was shown
+                row = rows[select.values[0]]
+                try:
+                    guard.delete(row, predicate=lambda v: v == row.values)
+                except RowConflict:
+                    await self.parent.safe_send(i, "❗ That row changed since the list was shown; open it again.")
+                    return
                 await self.parent.safe_send(i, "✅ Deleted.")
 
         view = Confirm()
         view.parent = self
         await interaction.response.send_message("Select to delete:", view=view, ephemeral=True)
 
-    @discord.ui.button(label="❌ Clear Proposed Match", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="❌ Clear Proposed Match", style=discord.ButtonStyle.primary, custom_id="dev:clear_proposed")
     async def clear_proposed(self, interaction, button):
         await self.generic_clear(interaction, "Match Proposed")
 
-    @discord.ui.button(label="❌ Clear Proposed Score", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="❌ Clear Proposed Score", style=discord.ButtonStyle.blurple, custom_id="dev:clear_proposed_score")
     async def clear_proposed_score(self, interaction, button):
         await self.generic_clear(interaction, "Scoring")
 
-    @discord.ui.button(label="🏆 Undo Score For Match", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="🏆 Undo Score For Match", style=discord.ButtonStyle.blurple, custom_id="dev:undo_score")
     async def undo_score(self, interaction, button):
         await self.generic_clear(interaction, "Scoring")
 
-    @discord.ui.button(label="✅ Force Submit Final Score", style=discord.ButtonStyle.green)
+    @discord.ui.button(label="✅ Force Submit Final Score", style=discord.ButtonStyle.green, custom_id="dev:force_submit_final")
     async def force_submit_final(self, interaction, button):
         class ForceSubmitFinalScore(Modal, title="Force Final Score"):
             match = TextInput(label="Match ID", required=True)
@@ -191,65 +393,68 @@ class DevPanel_Score(SafeView):
             def __init__(self, parent): super().__init__(); self.parent = parent
             async def on_submit(self, i):
                 m = get_or_create_sheet(self.parent.spreadsheet, "Matches", ["Match ID","Team A","Team B","Proposed Date","Scheduled Date","Status","Winner","Loser","Proposed By"])
-                for idx, row in enumerate(m.get_all_values()[1:], 2):
-                    if row[0] == self.match.value:
-                        m.update_cell(idx, 8, self.score.value)
-                        m.update_cell(idx, 9, self.winner.value)
-                        m.update_cell(idx, 10, self.loser.value)
-                        m.update_cell(idx, 6, "Finished")
-                        await self.parent.safe_send(i, "✅ Final score set.")
-                        return
+                # Status, Winner, Loser (columns 6-8); Matches has no score column
+                result = ["Finished", self.winner.value, self.loser.value]
+                if GuardedSheet(m).update_where(lambda v: v[0] == self.match.value, lambda v: v[:5] + result + v[8:]):
+                    await self.parent.safe_send(i, f"✅ Final score set ({self.score.value}).")
+                    return
                 await self.parent.safe_send(i, "❗ Match ID not found.")
         await interaction.response.send_modal(ForceSubmitFinalScore(self))
 
 # -------------------- TEAM TOOLS --------------------
 
 class DevPanel_Team(SafeView):
-    def __init__(self, bot, spreadsheet, dev_ids):
+    def __init__(self, bot, spreadsheet):
         super().__init__(timeout=None)
         self.bot = bot
         self.spreadsheet = spreadsheet
-        self.dev_ids = dev_ids
 
     async def interaction_check(self, interaction):
-        return await check_dev(interaction, self.dev_ids)
+        return await check_dev(interaction)
 
-    @discord.ui.button(label="💥 Force Disband Team", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="💥 Force Disband Team", style=discord.ButtonStyle.red, custom_id="dev:force_disband")
     async def force_disband(self, interaction, button):
         class DisbandModal(Modal, title="Force Disband Team"):
             team = TextInput(label="Team Name", required=True)
             def __init__(self, parent): super().__init__(); self.parent = parent
             async def on_submit(self, i):
-                sheet = get_or_create_sheet(self.parent.spreadsheet, "Teams", ["Team Name","Captain","Player 2","Player 3","Player 4","Player 5","Player 6"])
-                for idx, row in enumerate(sheet.get_all_values(), 1):
-                    if row[0].lower() == self.team.value.lower():
-                        team_role = discord.utils.get(i.guild.roles, name=f"Team {row[0]}")
-                        captain_role = discord.utils.get(i.guild.roles, name=f"Team {row[0]} Captain")
-                        if team_role: await team_role.delete()
-                        if captain_role: await captain_role.delete()
-                        sheet.delete_rows(idx)
-                        await self.parent.safe_send(i, "✅ Team disbanded.")
+                sheet = get_or_create_sheet(self.parent.spreadsheet, "Teams", TEAMS_HEADERS)
+                guard = GuardedSheet(sheet)
+                wanted = self.team.value.strip().lower()
+                team_row = guard.find(lambda v: v[0].lower() == wanted)
+                if team_row:
+                    row = team_row.values
+                    try:
+                        guard.delete(team_row, predicate=lambda v: v[0].lower() == wanted)
+                    except RowConflict as e:
+                        await self.parent.safe_send(i, f"❗ {e}")
                         return
+                    roster.invalidate()
+                    await teamroles.delete(i.guild, row[0])
+                    await self.parent.safe_send(i, "✅ Team disbanded.")
+                    return
                 await self.parent.safe_send(i, "❗ Team not found.")
         await interaction.response.send_modal(DisbandModal(self))
 
-    @discord.ui.button(label="👤 Force Remove Player", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="👤 Force Remove Player", style=discord.ButtonStyle.red, custom_id="dev:force_remove_player")
     async def force_remove_player(self, interaction, button):
         class RemovePlayerModal(Modal, title="Force Remove Player"):
             player = TextInput(label="Player (partial OK)", required=True)
             def __init__(self, parent): super().__init__(); self.parent = parent
             async def on_submit(self, i):
-                sheet = get_or_create_sheet(self.parent.spreadsheet, "Teams", ["Team Name","Captain","Player 2","Player 3","Player 4","Player 5","Player 6"])
-                for idx, row in enumerate(sheet.get_all_values(), 1):
-                    for col in range(1, 7):
-                        if self.player.value.lower() in row[col].lower():
-                            sheet.update_cell(idx, col + 1, "")
-                            await self.parent.safe_send(i, "✅ Player removed.")
-                            return
-                await self.parent.safe_send(i, "❗ Player not found.")
+                sheet = get_or_create_sheet(self.parent.spreadsheet, "Teams", TEAMS_HEADERS)
+                search = self.player.value.lower()
+                # ✅ First matching cell only (partial names are allowed), written in one request
+                updates = cleared_cells(sheet.get_all_values()[1:], lambda cell: search in cell.lower())[:1]
+                if not updates:
+                    await self.parent.safe_send(i, "❗ Player not found.")
+                    return
+                sheet.batch_update(updates)
+                roster.invalidate()
+                await self.parent.safe_send(i, "✅ Player removed.")
         await interaction.response.send_modal(RemovePlayerModal(self))
 
-    @discord.ui.button(label="📊 Adjust Team ELO", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="📊 Adjust Team ELO", style=discord.ButtonStyle.blurple, custom_id="dev:adjust_elo")
     async def adjust_elo(self, interaction, button):
         class AdjustTeamELO(Modal, title="Adjust Team ELO"):
             team = TextInput(label="Team Name", required=True)
@@ -261,124 +466,177 @@ class DevPanel_Team(SafeView):
                     if row[0].lower() == self.team.value.lower():
                         new_elo = int(row[1]) + int(self.change.value)
                         sheet.update_cell(idx, 2, new_elo)
+                        standings.set_rating(row[0], new_elo)
+                        request_leaderboard_refresh()
                         await self.parent.safe_send(i, f"✅ ELO now {new_elo}.")
                         return
                 await self.parent.safe_send(i, "❗ Team not found.")
         await interaction.response.send_modal(AdjustTeamELO(self))
 
+    @discord.ui.button(label="🔁 Replay Ratings", style=discord.ButtonStyle.gray, custom_id="dev:replay_ratings")
+    async def replay_ratings(self, interaction, button):
+        class ReplayRatings(Modal, title="Replay Ratings From History"):
+            rule = TextInput(label="Rule (flat or elo)", default="flat", required=True)
+            k_factor = TextInput(label="K-factor (elo only)", default=str(settings.elo_k_factor), required=True)
+            def __init__(self, parent): super().__init__(); self.parent = parent
+            async def on_submit(self, i):
+                rule = self.rule.value.strip().lower()
+                if rule not in replay.RULES or not self.k_factor.value.strip().isdigit():
+                    await self.parent.safe_send(i, "❗ Rule must be flat or elo, K-factor a whole number.")
+                    return
+                await i.response.defer(ephemeral=True)
+
+                history_rows = get_or_create_sheet(self.parent.spreadsheet, "Match History", replay.HEADERS["Match History"]).get_all_values()[1:]
+                leaderboard = get_or_create_sheet(self.parent.spreadsheet, "Leaderboard", replay.HEADERS["Leaderboard"])
+                snapshot = leaderboard.get_all_values()
+
+                started = time.perf_counter()
+                history = replay.load_history(history_rows, settings.forfeit_affects_elo)
+                result = replay.replay(history, rule, settings.elo_win_points, settings.elo_loss_points, int(self.k_factor.value))
+                table, changes = replay.rebuild_leaderboard(snapshot[1:], result)
+                took = (time.perf_counter() - started) * 1000
+
+                summary = f"🔁 **{rule}** replay of {len(history.score)} matches in {took:.1f} ms"
+                if history.skipped:
+                    summary += f" ({history.skipped} unreadable rows skipped)"
+                if not changes:
+                    await self.parent.safe_send(i, f"{summary}\n✅ Leaderboard already matches Match History.")
+                    return
+
+                lines = [summary, f"{len(changes)} team(s) change:"]
+                for team, old, new in changes[:20]:
+                    lines.append(f"`{team}`: {old[1]} → {new[1]} · {old[2]}-{old[3]} ({old[4]}) → {new[2]}-{new[3]} ({new[4]})")
+                if len(changes) > 20:
+                    lines.append(f"…and {len(changes) - 20} more")
+
+                class Confirm(View):
+                    @discord.ui.button(label="✅ Write Leaderboard", style=discord.ButtonStyle.green)
+                    async def apply(self, i2, b):
+                        async with locks.hold(sheet_key("Leaderboard")):
+                            # ✅ Only write over the leaderboard that was previewed
+                            if leaderboard.get_all_values() != snapshot:
+                                await self.parent.safe_send(i2, "❗ Leaderboard changed since the preview; run the replay again.")
+                                return
+                            replay.write_leaderboard(self.parent.spreadsheet, table, len(snapshot))
+                            standings.load(table[1:])
+                        self.stop()
+                        await self.parent.safe_send(i2, f"✅ Leaderboard rewritten ({len(changes)} team(s) changed).")
+
+                    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.gray)
+                    async def cancel(self, i2, b):
+                        self.stop()
+                        await self.parent.safe_send(i2, "Cancelled.")
+
+                view = Confirm(timeout=300)
+                view.parent = self.parent
+                await i.followup.send("\n".join(lines)[:2000], view=view, ephemeral=True)
+        await interaction.response.send_modal(ReplayRatings(self))
+
 # -------------------- PLAYER ENFORCEMENT --------------------
 
 class DevPanel_Player(SafeView):
-    def __init__(self, bot, spreadsheet, dev_ids):
+    def __init__(self, bot, spreadsheet):
         super().__init__(timeout=None)
         self.bot = bot
         self.spreadsheet = spreadsheet
-        self.dev_ids = dev_ids
 
     async def interaction_check(self, interaction):
-        return await check_dev(interaction, self.dev_ids)
+        return await check_dev(interaction)
 
     async def player_remove(self, interaction, action):
         class KickPlayerModal(Modal, title=f"{action} Player"):
             search = TextInput(label="Player Name / ID", required=True)
             def __init__(self, parent): super().__init__(); self.parent = parent
             async def on_submit(self, i):
-                players = get_or_create_sheet(self.parent.spreadsheet, "Players", ["User ID","Username"])
-                banned = get_or_create_sheet(self.parent.spreadsheet, "Banned", ["User ID","Username"])
-                rows = players.get_all_values()[1:]
-                options = [discord.SelectOption(label=f"{row[1]} ({row[0]})", value=str(idx)) for idx, row in enumerate(rows, 2) if self.search.value.lower() in row[1].lower() or self.search.value in row[0]]
+                # ✅ Ranked suggestions from the search index (max 25, the select limit)
+                options = [discord.SelectOption(label=e.label[:100], value=e.value) for e in search_index.players.search(self.search.value)]
                 if not options:
                     await self.parent.safe_send(i, "❗ Player not found.")
                     return
                 class Confirm(View):
                     @discord.ui.select(placeholder="Select player", options=options)
                     async def select(self, si, select):
-                        idx = int(select.values[0])
-                        row = players.row_values(idx)
-                        if action == "Ban": banned.append_row(row)
-                        players.delete_rows(idx)
-                        teams = get_or_create_sheet(self.parent.spreadsheet, "Teams", ["Team Name","Captain","Player 2","Player 3","Player 4","Player 5","Player 6"])
-                        for tidx, trow in enumerate(teams.get_all_values(), 1):
-                            for col in range(1, 7):
-                                if row[0] in trow[col] or row[1] in trow[col]:
-                                    teams.update_cell(tidx, col + 1, "")
+                        row = remove_league_player(self.parent.spreadsheet, select.values[0], action)
+                        if not row:
+                            await self.parent.safe_send(si, "❗ Player not found.")
+                            return
                         await self.parent.safe_send(si, f"✅ {action}ed player.")
                 view = Confirm()
                 view.parent = self.parent
                 await i.response.send_message("Select player:", view=view, ephemeral=True)
         await interaction.response.send_modal(KickPlayerModal(self))
 
-    @discord.ui.button(label="🚫 Kick Player", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="🚫 Kick Player", style=discord.ButtonStyle.danger, custom_id="dev:kick_player")
     async def kick_player(self, interaction, button):
         await self.player_remove(interaction, "Kick")
 
-    @discord.ui.button(label="🚫 Ban Player", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="🚫 Ban Player", style=discord.ButtonStyle.red, custom_id="dev:ban_player")
     async def ban_player(self, interaction, button):
         await self.player_remove(interaction, "Ban")
 
 # -------------------- SYSTEM TOOLS --------------------
 
 class DevPanel_System(SafeView):
-    def __init__(self, bot, spreadsheet, dev_ids):
+    def __init__(self, bot, spreadsheet):
         super().__init__(timeout=None)
         self.bot = bot
         self.spreadsheet = spreadsheet
-        self.dev_ids = dev_ids
 
     async def interaction_check(self, interaction):
-        return await check_dev(interaction, self.dev_ids)
+        return await check_dev(interaction)
 
-    @discord.ui.button(label="♻️ Reload Views", style=discord.ButtonStyle.green)
+    @discord.ui.button(label="♻️ Reload Views", style=discord.ButtonStyle.green, custom_id="dev:reload_views")
     async def reload_views(self, interaction, button):
         await interaction.response.defer(ephemeral=True)
-        await self.bot.tree.sync()
-        await interaction.followup.send("✅ Views reloaded.", ephemeral=True)
+        synced = await startup.sync_commands(self.bot)
+        note = "commands synced" if synced else "command tree unchanged, sync skipped"
+        await interaction.followup.send(f"✅ Views reloaded ({note}).", ephemeral=True)
 
-    @discord.ui.button(label="🔒 Lock Rosters", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="🔒 Lock Rosters", style=discord.ButtonStyle.red, custom_id="dev:lock_rosters")
     async def lock_rosters(self, interaction, button):
-        s = get_or_create_sheet(self.spreadsheet, "Teams", ["Team Name","Captain","Player 2","Player 3","Player 4","Player 5","Player 6"])
-        v = s.get_all_values()
-        if s.col_count < len(v[0]) + 1:
-            s.resize(cols=len(v[0]) + 1)
-
-        for idx in range(2, len(v) + 1):
-            s.update_cell(idx, len(v[0]) + 1, "Locked")
+        await self.set_roster_lock(interaction, True)
 
-        await self.safe_send(interaction, "✅ Rosters locked.")
-
-    @discord.ui.button(label="🔓 Unlock Rosters", style=discord.ButtonStyle.green)
+    @discord.ui.button(label="🔓 Unlock Rosters", style=discord.ButtonStyle.green, custom_id="dev:unlock_rosters")
     async def unlock_rosters(self, interaction, button):
-        s = get_or_create_sheet(self.spreadsheet, "Teams", ["Team Name","Captain","Player 2","Player 3","Player 4","Player 5","Player 6"])
+        await self.set_roster_lock(interaction, False)
+
+    async def set_roster_lock(self, interaction, locked):
+        # ✅ Whole "Locked" column (header + every team) in a single write, whatever the team count
+        s = get_or_create_sheet(self.spreadsheet, "Teams", TEAMS_HEADERS)
         v = s.get_all_values()
-        if v and v[0][-1] == "Locked":
-            for idx in range(2, len(v) + 1): s.update_cell(idx, len(v[0]), "")
-        await self.safe_send(interaction, "✅ Rosters unlocked.")
+        col = locked_column(s, v[0] if v else TEAMS_HEADERS)
+        value = "Yes" if locked else ""
+        column = [["Locked"]] + [[value] for _ in v[1:]]
+        s.batch_update([{"range": f"{rowcol_to_a1(1, col)}:{rowcol_to_a1(len(column), col)}", "values": column}])
+        await self.safe_send(interaction, f"✅ Rosters {'locked' if locked else 'unlocked'} ({len(column) - 1} teams).")
+
+    @discord.ui.button(label="📬 Delivery Stats", style=discord.ButtonStyle.gray, custom_id="dev:delivery_stats")
+    async def delivery_stats(self, interaction, button):
+        await self.safe_send(interaction, router.report())
 
 # -------------------- Dev Panel Poster --------------------
 
-async def post_dev_panel(bot, spreadsheet, dev_ids):
+async def post_dev_panel(bot, spreadsheet):
 
-    channel_id = bot.config.get("dev_channel_id")
+    channel_id = settings.dev_channel_id
     if not channel_id: return
     channel = await bot.fetch_channel(channel_id)
 
     panels = [
-        ("📥 Match Tools", DevPanel_Match),
-        ("📊 Score Tools", DevPanel_Score),
-        ("🏷️ Team Tools", DevPanel_Team),
-        ("🚫 Player Tools", DevPanel_Player),
-        ("⚙️ System Tools", DevPanel_System),
+        ("dev:match", "📥 Match Tools", DevPanel_Match),
+        ("dev:score", "📊 Score Tools", DevPanel_Score),
+        ("dev:team", "🏷️ Team Tools", DevPanel_Team),
+        ("dev:player", "🚫 Player Tools", DevPanel_Player),
+        ("dev:system", "⚙️ System Tools", DevPanel_System),
     ]
 
-    for title, view_cls in panels:
-        deleted = 0
-        async for msg in channel.history(limit=100, oldest_first=False):
-            if msg.author == bot.user and msg.embeds:
-                if title in msg.embeds[0].title:
-                    await msg.delete()
-                    deleted += 1
-        print(f"✅ Cleaned {deleted} old {title} panels.")
+    # ✅ Reattach to the stored panel messages; only missing panels are reposted
+    entries = []
+    for key, title, view_cls in panels:
         embed = discord.Embed(title=title, description=f"{title} for developer/admin usage.", color=discord.Color.red())
-        await channel.send(embed=embed, view=view_cls(bot, spreadsheet, dev_ids))
+        entries.append((key, embed, view_cls(bot, spreadsheet)))
+
+    counts = await panel_store.attach_panels(bot, channel, entries)
+    print(f"✅ Dev panels: {counts['reattached']} reattached, {counts['updated']} updated, {counts['posted']} posted.")
 
 
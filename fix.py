@@ -1,13 +1,7 @@
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-import json
-
-CONFIG_FILE = "config.json"
-
-with open(CONFIG_FILE) as f:
-    config = json.load(f)
-
-SHEET_NAME = config["sheet_name"]
+from rowguard import GUARD_HEADER
+from settings import settings
 
 scope = [
     "https://spreadsheets.google.com/feeds",
@@ -15,15 +9,6 @@ scope = [
     "https://www.googleapis.com/auth/drive"
 ]
 
-creds = ServiceAccountCredentials.from_json_keyfile_name("credentials.json", scope)
-client = gspread.authorize(creds)
-
-try:
-    spreadsheet = client.open(SHEET_NAME)
-except gspread.SpreadsheetNotFound:
-    print("Spreadsheet not found.")
-    exit()
-
 # Updated headers for all known sheets
 SHEETS = {
     "Players": ["User ID", "Username",],
@@ -49,10 +34,19 @@ SHEETS = {
         "Map 3 Mode", "Map 3 A", "Map 3 B",
         "Total A", "Total B", "Maps Won A", "Maps Won B", "Winner"
     ],
+    "Season Schedule": ["Week", "Team A", "Team B", "Match ID", "Status"],
+    "Availability": ["Team Name", "Slots"],
     "LeagueWeek": ["League Week"]
 }
 
-def get_or_create_sheet(name, headers):
+def headers_match(row, headers):
+    """True if row is headers, allowing for the hidden row-version column the bot adds."""
+    cells = [cell for cell in row if cell != GUARD_HEADER]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells == headers
+
+def get_or_create_sheet(spreadsheet, name, headers):
     try:
         sheet = spreadsheet.worksheet(name)
     except gspread.WorksheetNotFound:
@@ -62,7 +56,7 @@ def get_or_create_sheet(name, headers):
         return sheet
 
     all_rows = sheet.get_all_values()
-    if len(all_rows) == 0 or all_rows[0] != headers:
+    if len(all_rows) == 0 or not headers_match(all_rows[0], headers):
         print(f"Fixing headers for '{name}'")
         sheet.clear()
         sheet.append_row(headers)
@@ -74,6 +68,9 @@ def is_fake_team(name):
 def clean_sheet(sheet, headers, fake_team_check_columns=[]):
     all_rows = sheet.get_all_values()
     new_rows = []
+    # ✅ Keep the existing header so a row-version column (and its stamps) survives the rewrite
+    if all_rows and headers_match(all_rows[0], headers):
+        headers = all_rows[0]
 
     for row in all_rows[1:]:
         if len(row) == 0 or row[0].strip() == "":
@@ -96,12 +93,25 @@ def clean_sheet(sheet, headers, fake_team_check_columns=[]):
     for row in new_rows:
         sheet.append_row(row)
 
-# Start fixing
+def main():
+    creds = ServiceAccountCredentials.from_json_keyfile_name("credentials.json", scope)
+    client = gspread.authorize(creds)
+
+    try:
+        spreadsheet = client.open(settings.sheet_name)
+    except gspread.SpreadsheetNotFound:
+        print("Spreadsheet not found.")
+        return
+
+    print("✅ Starting smart fix...")
+
+    for sheet_name, headers in SHEETS.items():
+        fix_sheet(spreadsheet, sheet_name, headers)
 
-print("✅ Starting smart fix...")
+    print("✅ All sheets fixed and cleaned up smartly.")
 
-for sheet_name, headers in SHEETS.items():
-    sheet = get_or_create_sheet(sheet_name, headers)
+def fix_sheet(spreadsheet, sheet_name, headers):
+    sheet = get_or_create_sheet(spreadsheet, sheet_name, headers)
 
     if sheet_name == "Leaderboard":
         clean_sheet(sheet, headers, fake_team_check_columns=[0])
@@ -112,11 +122,12 @@ for sheet_name, headers in SHEETS.items():
     elif sheet_name == "Scoring":
         clean_sheet(sheet, headers, fake_team_check_columns=[1, 2, 17])  # Team A/B/Winner
 
-    elif sheet_name in ["Match Propose", "Match Scheduled", "Challenge Matches", "Match History"]:
+    elif sheet_name in ["Match Propose", "Match Scheduled", "Challenge Matches", "Match History", "Season Schedule"]:
         clean_sheet(sheet, headers, fake_team_check_columns=[1, 2])
 
     else:
         clean_sheet(sheet, headers)
 
-print("✅ All sheets fixed and cleaned up smartly.")
+if __name__ == "__main__":
+    main()
 
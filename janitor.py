@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+import time
+
+import discord
+
+from outbound import outbound, route_of, BULK
+from pending import pending
+from scheduler import scheduler
+
+# -------------------- Channel Janitor --------------------
+# Every temporary channel or fallback thread (proposed-match-*, proposed-score-*,
+# team-requests) is registered here with a deadline. Deadlines are kept in janitor.json and run from
+# the shared scheduler, so they survive restarts; due channels are removed in small
+# batches through the outbound queue; threads are archived and locked instead of
+# deleted. Flows that finish early release their channel instead of deleting it
+# themselves. On startup, channels and threads left in the fallback category or
+# thread channel with no registration are reconciled against the pending prompts.
+
+JANITOR_FILE = "janitor.json"
+KIND = "channel"
+TEMP_PREFIXES = ("proposed-match-", "proposed-score-")
+SHARED_CHANNELS = ("team-requests",)
+BATCH_SIZE = 5
+DEFAULT_TTL = 15 * 60
+ORPHAN_GRACE = 60
+
+def timer_key(channel_id):
+    return f"channel:{channel_id}"
+
+class ChannelJanitor:
+    def __init__(self):
+        self.bot = None
+        self.deadlines = self._load()   # channel id (str) -> unix deadline
+        self._due = []
+        self._sweeping = False
+        self.stats = {"deleted": 0, "gone": 0, "failed": 0}
+
+    # --- Storage ---
+
+    def _load(self):
+        if not os.path.exists(JANITOR_FILE):
+            return {}
+        try:
+            with open(JANITOR_FILE) as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return {}
+
+    def _save(self):
+        tmp = f"{JANITOR_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.deadlines, f, indent=2)
+        os.replace(tmp, JANITOR_FILE)
+
+    # --- Registration ---
+
+    def register(self, channel, ttl=DEFAULT_TTL):
+        """Remove channel after ttl seconds. Registering again only ever pushes the deadline back."""
+        when = max(time.time() + ttl, self.deadlines.get(str(channel.id), 0))
+        self.deadlines[str(channel.id)] = when
+        self._save()
+        scheduler.schedule(timer_key(channel.id), when, KIND)
+
+    def release(self, channel):
+        """The flow using channel is done; remove it with the next sweep."""
+        if channel is None:
+            return
+        scheduler.cancel(timer_key(channel.id))
+        self._queue(channel.id)
+
+    def tracks(self, channel_id):
+        return str(channel_id) in self.deadlines
+
+    # --- Sweeping ---
+
+    async def _expired(self, key):
+        self._queue(int(key.split(":", 1)[1]))
+
+    def _queue(self, channel_id):
+        if channel_id not in self._due:
+            self._due.append(channel_id)
+        if not self._sweeping:
+            self._sweeping = True
+            asyncio.get_running_loop().create_task(self._sweep())
+
+    async def _sweep(self):
+        try:
+            while self._due:
+                batch, self._due = self._due[:BATCH_SIZE], self._due[BATCH_SIZE:]
+                channels = []
+                for channel_id in batch:
+                    self.deadlines.pop(str(channel_id), None)
+                    channel = self.bot.get_channel(channel_id) if self.bot else None
+                    if channel is None:
+                        self.stats["gone"] += 1
+                    else:
+                        channels.append(channel)
+                self._save()
+
+                results = await asyncio.gather(
+                    *(outbound.submit(BULK, route_of(channel, "guild"), self._retire(channel)) for channel in channels),
+                    return_exceptions=True
+                )
+                for channel, result in zip(channels, results):
+                    if isinstance(result, discord.NotFound):
+                        self.stats["gone"] += 1
+                    elif isinstance(result, Exception):
+                        self.stats["failed"] += 1
+                        print(f"[❌] Janitor could not delete #{channel.name}: {result}")
+                    else:
+                        self.stats["deleted"] += 1
+                if channels:
+                    print(f"[🧹] Janitor removed {len(channels)} temporary channel(s).")
+        finally:
+            self._sweeping = False
+
+    def _retire(self, channel):
+        if isinstance(channel, discord.Thread):
+            return lambda: channel.edit(archived=True, locked=True)
+        return channel.delete
+
+    # --- Startup ---
+
+    async def start(self, bot, config):
+        """Reload deadlines, then pick up temporary channels nobody registered (e.g. from before a crash)."""
+        self.bot = bot
+        scheduler.on(KIND, self._expired)
+        scheduler.start()
+
+        now = time.time()
+        for channel_id, when in list(self.deadlines.items()):
+            if bot.get_channel(int(channel_id)) is None:
+                del self.deadlines[channel_id]
+            else:
+                scheduler.schedule(timer_key(channel_id), when, KIND)
+
+        # Channels still hosting an open prompt live until that prompt expires
+        prompt_deadlines = {}
+        for record in pending.all():
+            if record.channel_id:
+                prompt_deadlines[record.channel_id] = max(record.expires_at, prompt_deadlines.get(record.channel_id, 0))
+
+        candidates = []
+        category = bot.get_channel(config.fallback_category_id) if config.fallback_category_id else None
+        if isinstance(category, discord.CategoryChannel):
+            candidates += [c for c in category.text_channels if c.name.startswith(TEMP_PREFIXES)]
+        thread_parent = bot.get_channel(config.fallback_thread_channel_id) if config.fallback_thread_channel_id else None
+        if isinstance(thread_parent, discord.TextChannel):
+            candidates += [t for t in thread_parent.threads if not t.archived and t.name.startswith(TEMP_PREFIXES)]
+        for guild in bot.guilds:
+            candidates += [c for c in guild.text_channels if c.name in SHARED_CHANNELS]
+
+        adopted = 0
+        for channel in candidates:
+            if self.tracks(channel.id):
+                continue
+            when = prompt_deadlines.get(channel.id, now) + ORPHAN_GRACE
+            self.deadlines[str(channel.id)] = when
+            scheduler.schedule(timer_key(channel.id), when, KIND)
+            adopted += 1
+
+        self._save()
+        print(f"[🧹] Janitor tracking {len(self.deadlines)} temporary channel(s) ({adopted} orphaned).")
+
+# Shared instance used by every module
+janitor = ChannelJanitor()
@@ -1,20 +1,25 @@
 import discord
 import gspread
+import hashlib
 import json
 import os
 from discord.ext import commands
 from oauth2client.service_account import ServiceAccountCredentials
 from discord.ext import tasks
+from settings import settings
+from standings import REFRESH_FILE
 
 print("🤖 Bot starting leaderboard check...")
-# === Load config ===
-with open("config.json") as f:
-    config = json.load(f)
+# === Load config (parsed and validated by settings.py) ===
 
-SHEET_NAME = config["sheet_name"]
-CHANNEL_ID = int(config["leaderboard_channel_id"])
+SHEET_NAME = settings.sheet_name
 MESSAGE_ID_FILE = "leaderboard_msg_id.txt"
 
+# Discord embed limits
+FIELD_VALUE_LIMIT = 1024
+EMBED_TOTAL_LIMIT = 6000
+EMBED_FIELD_LIMIT = 25
+
 # === Google Sheets setup ===
 scope = [
     "https://spreadsheets.google.com/feeds",
@@ -30,6 +35,15 @@ leaderboard_sheet = spreadsheet.worksheet("Leaderboard")
 intents = discord.Intents.default()
 bot = commands.Bot(command_prefix="!", intents=intents)
 
+TIERS = [
+    "🟪 **Master**",
+    "🟦 **Platinum**",
+    "💎 **Diamond**",
+    "🟨 **Gold**",
+    "⚪ **Silver**",
+    "🟫 **Bronze**"
+]
+
 def get_tier_label(rating):
     r = int(rating)
     if r >= 1400:
@@ -45,61 +59,196 @@ def get_tier_label(rating):
     else:
         return "🟫 **Bronze**"
 
+# -------------------- Page Cache --------------------
+
+# Pages are rendered once per standings change and served from here by the buttons
+leaderboard_cache = {
+    "digest": None,
+    "pages": [],
+    "tier_pages": {},
+    "refresh_mtime": 0.0
+}
+
+def chunk_entries(entries, limit=FIELD_VALUE_LIMIT):
+    """Split entry lines into field values that each fit under the field limit."""
+    chunks, current, size = [], [], 0
+    for entry in entries:
+        entry = entry[:limit]
+        added = len(entry) + (1 if current else 0)
+        if current and size + added > limit:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+            added = len(entry)
+        current.append(entry)
+        size += added
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def build_leaderboard_pages(rows, per_page=None):
+    """Render sorted leaderboard rows into embeds that stay within Discord's limits.
+
+    Returns (pages, tier_pages) where tier_pages maps a tier label to the first page showing it.
+    """
+    per_page = per_page or settings.leaderboard_page_size
+    sorted_rows = sorted(rows, key=lambda r: int(r[1]), reverse=True)
+    title = "🏆 League Leaderboard"
+
+    # Group ranked entries into pages, keeping tier order inside each page
+    pages_entries = []
+    current = []
+    for rank, row in enumerate(sorted_rows, 1):
+        team, rating, wins, losses, matches = row[:5]
+        label = get_tier_label(rating)
+        entry = f"`#{rank}` **{team}** — {rating}  |  W: {wins} L: {losses} GP: {matches}"
+        if len(current) >= per_page:
+            pages_entries.append(current)
+            current = []
+        current.append((label, entry))
+    if current:
+        pages_entries.append(current)
+
+    pages = []
+    tier_pages = {}
+    seen_tiers = set()
+
+    def new_embed():
+        return discord.Embed(title=title, color=discord.Color.purple())
+
+    for entries in pages_entries:
+        embed = new_embed()
+        size = len(title)
+        grouped = []
+        for label, entry in entries:
+            if grouped and grouped[-1][0] == label:
+                grouped[-1][1].append(entry)
+            else:
+                grouped.append((label, [entry]))
+
+        for label, tier_entries in grouped:
+            name = label if label not in seen_tiers else f"{label} (cont.)"
+            for value in chunk_entries(tier_entries):
+                # Start a new page if this field would break the embed limits
+                if len(embed.fields) >= EMBED_FIELD_LIMIT or size + len(name) + len(value) > EMBED_TOTAL_LIMIT - 100:
+                    pages.append(embed)
+                    embed = new_embed()
+                    size = len(title)
+                embed.add_field(name=name, value=value, inline=False)
+                size += len(name) + len(value)
+                tier_pages.setdefault(label, len(pages))
+                seen_tiers.add(label)
+                name = f"{label} (cont.)"
+        pages.append(embed)
+
+    total = len(pages)
+    for idx, embed in enumerate(pages, 1):
+        embed.set_footer(text=f"Tiered by Rating • Page {idx}/{total} • {len(sorted_rows)} teams")
+
+    return pages, tier_pages
+
+def refresh_leaderboard_cache():
+    """Re-read the sheet and re-render pages only when the standings changed. Returns True if re-rendered."""
+    data = leaderboard_sheet.get_all_values()
+    rows = [r for r in data[1:] if r and r[0].strip()]
+
+    # ✅ The page size is part of the key, so a config edit re-renders without a restart
+    digest = hashlib.sha1(json.dumps([settings.leaderboard_page_size, rows]).encode()).hexdigest()
+    if digest == leaderboard_cache["digest"]:
+        return False
+
+    pages, tier_pages = build_leaderboard_pages(rows) if rows else ([], {})
+    leaderboard_cache["pages"] = pages
+    leaderboard_cache["tier_pages"] = tier_pages
+    leaderboard_cache["digest"] = digest
+    return True
+
+def page_index_from_message(message):
+    """Read the current page back from the footer so the view needs no per-message state."""
+    try:
+        footer = message.embeds[0].footer.text
+        return int(footer.split("Page ")[1].split("/")[0]) - 1
+    except Exception:
+        return 0
+
+# -------------------- Persistent View --------------------
+
+class LeaderboardView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    async def show_page(self, interaction, index):
+        pages = leaderboard_cache["pages"]
+        if not pages:
+            await interaction.response.send_message("📊 Leaderboard is currently empty.", ephemeral=True)
+            return
+        index = max(0, min(index, len(pages) - 1))
+        await interaction.response.edit_message(embed=pages[index], view=self)
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary, custom_id="leaderboard:prev")
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, page_index_from_message(interaction.message) - 1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary, custom_id="leaderboard:next")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, page_index_from_message(interaction.message) + 1)
+
+    @discord.ui.select(
+        placeholder="Jump to tier",
+        custom_id="leaderboard:tier",
+        options=[discord.SelectOption(label=t.split("**")[1], value=t, emoji=t.split(" ")[0]) for t in TIERS]
+    )
+    async def jump_to_tier(self, interaction: discord.Interaction, select: discord.ui.Select):
+        tier = select.values[0]
+        tier_pages = leaderboard_cache["tier_pages"]
+        if tier not in tier_pages:
+            await interaction.response.send_message("❗ No teams in that tier right now.", ephemeral=True)
+            return
+        await self.show_page(interaction, tier_pages[tier])
+
+leaderboard_view = LeaderboardView()
+
 @bot.event
 async def on_ready():
     print(f"✅ Logged in as {bot.user}")
-    await post_or_update_leaderboard_embed()
+    bot.add_view(leaderboard_view)  # ✅ Buttons keep working on the existing message after restarts
+    if os.path.exists(REFRESH_FILE):
+        leaderboard_cache["refresh_mtime"] = os.path.getmtime(REFRESH_FILE)
+    await post_or_update_leaderboard_embed(force=True)
     update_leaderboard_loop.start()
+    watch_refresh_requests.start()
 
-@tasks.loop(minutes=3600)               # Update leaderboard timer here
+@tasks.loop(minutes=5)               # Update leaderboard timer here (pages only re-render when standings change)
 async def update_leaderboard_loop():
     await post_or_update_leaderboard_embed()
 
-async def post_or_update_leaderboard_embed():
-    channel = bot.get_channel(CHANNEL_ID)
+@tasks.loop(seconds=15)
+async def watch_refresh_requests():
+    # The league bot touches REFRESH_FILE after every rating write; only a local stat, no Sheets call
+    try:
+        mtime = os.path.getmtime(REFRESH_FILE)
+    except OSError:
+        return
+    if mtime > leaderboard_cache["refresh_mtime"]:
+        leaderboard_cache["refresh_mtime"] = mtime
+        await post_or_update_leaderboard_embed()
+
+async def post_or_update_leaderboard_embed(force=False):
+    """Re-read the standings and edit the leaderboard message. Skips the edit when nothing changed unless forced."""
+    if not refresh_leaderboard_cache() and not force:
+        return
+
+    channel = bot.get_channel(settings.leaderboard_channel_id)
     if not channel:
         print("❗ Score channel not found.")
         return
 
-    data = leaderboard_sheet.get_all_values()
-    headers, rows = data[0], data[1:]
-
-    # Filter out inactive teams
-    filtered = rows
+    pages = leaderboard_cache["pages"]
 
-    if not filtered:
+    if not pages:
         await channel.send("📊 Leaderboard is currently empty or all teams are inactive.")
         return
 
-    # Sort by rating descending
-    sorted_rows = sorted(filtered, key=lambda r: int(r[1]), reverse=True)
-
-    # Group by tiers
-    tiers = {
-        "🟪 **Master**": [],
-        "🟦 **Platinum**": [],
-        "💎 **Diamond**": [],
-        "🟨 **Gold**": [],
-        "⚪ **Silver**": [],
-        "🟫 **Bronze**": []
-    }
-
-    for row in sorted_rows:
-        team, rating, wins, losses, matches = row[:5]
-        label = get_tier_label(rating)
-        entry = f"**{team}** — {rating}  |  W: {wins} L: {losses} GP: {matches}"
-        tiers[label].append(entry)
-
-    embed = discord.Embed(title="🏆 League Leaderboard", color=discord.Color.purple())
-    embed.set_footer(text="Tiered by Rating")
-
-    for tier_label, team_entries in tiers.items():
-        if team_entries:
-            embed.add_field(
-                name=tier_label,
-                value="\n".join(team_entries),
-                inline=False
-            )
+    embed = pages[0]
 
     # Load saved message ID
     message_id = None
@@ -115,7 +264,7 @@ async def post_or_update_leaderboard_embed():
             msg = await channel.fetch_message(message_id)
             if msg.channel.id != channel.id:
                 raise discord.NotFound(response=None, message="Message in wrong channel", data=None)
-            await msg.edit(embed=embed)
+            await msg.edit(embed=embed, view=leaderboard_view)
             print("✅ Leaderboard message updated.")
             return
         except discord.NotFound:
@@ -124,10 +273,10 @@ async def post_or_update_leaderboard_embed():
     print("📤 Posting new leaderboard message...")
     if os.path.exists(MESSAGE_ID_FILE):
         os.remove(MESSAGE_ID_FILE)
-    new_msg = await channel.send(embed=embed)
+    new_msg = await channel.send(embed=embed, view=leaderboard_view)
     with open(MESSAGE_ID_FILE, "w") as f:
         f.write(str(new_msg.id))
     print("✅ Leaderboard message created and saved.")
 
 # === Run bot ===
-bot.run(config["bot_token"])
+bot.run(settings.bot_token)
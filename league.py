@@ -2,28 +2,25 @@ import discord
 from discord.ext import commands
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-import json
 import match
 import dev
+import standings
+from roster import roster
+from settings import settings
+from webhooks import webhooks
+from janitor import janitor
+from reminders import reminders
+import panels
+import startup
+import search
+import asyncio
 import command_buttons  # <-- League Command Panel buttons
 
 # -------------------- Load config --------------------
 
-with open("config.json") as f:
-    config = json.load(f)
-
-BOT_TOKEN = config["bot_token"]
-SHEET_NAME = config["sheet_name"]
-DEV_OVERRIDE_IDS = config.get("dev_override_ids", [])
-NOTIFICATIONS_CHANNEL_ID = config.get("notifications_channel_id")
-MATCH_CHANNEL_ID = config.get("match_channel_id")
-SCORE_CHANNEL_ID = config.get("score_channel_id")
-RESULTS_CHANNEL_ID = config.get("results_channel_id")
-PANEL_CHANNEL_ID = config.get("panel_channel_id")
-TEAM_MIN_PLAYERS = int(config.get("team_min_players", 3))
-TEAM_MAX_PLAYERS = int(config.get("team_max_players", 6))
-ELO_WIN_POINTS = config.get("elo_win_points", 25)
-ELO_LOSS_POINTS = config.get("elo_loss_points", -25)
+# ✅ Parsed and validated once in settings.py; other values are read as settings.<key>
+BOT_TOKEN = settings.bot_token
+SHEET_NAME = settings.sheet_name
 
 # -------------------- Google Sheets Setup --------------------
 
@@ -84,22 +81,15 @@ intents = discord.Intents.default()
 intents.members = True  # ✅ FIXED: Required to use fetch_members and see all members
 
 bot = commands.Bot(command_prefix="!", intents=intents)
-bot.config = config  # ✅ Very important → allows match.py and others to access config
+bot.config = settings  # ✅ Very important → allows match.py and others to access config
 bot.spreadsheet = spreadsheet
 
+roster.bind(teams_sheet)
+webhooks.configure(bot, settings)
+settings.on_reload(lambda s: webhooks.configure(bot, s))
 match.setup_match_module(bot, spreadsheet)
-@bot.event
-async def on_ready():
-    print(f"Bot is ready as {bot.user}")
-
-    # ✅ Delete old Dev Panels first
-    await dev.cleanup_dev_panels(bot)
-
-    # ✅ Post new Dev Panels
-    await dev.post_dev_panel(bot, spreadsheet, DEV_OVERRIDE_IDS)
-
-    # ✅ Post other panels (League etc) if needed
-
+standings.setup_standings_module(bot, leaderboard_sheet)
+search.setup_search_module(bot, players_sheet, lambda: make_league_panel(), dev.slash_remove_player)
 
 # -------------------- Helper Functions --------------------
 
@@ -107,10 +97,10 @@ async def send_to_channel(channel_id, message=None, embed=None):
     if channel_id:
         channel = bot.get_channel(channel_id)
         if channel:
-            await channel.send(content=message, embed=embed)
+            await webhooks.announce(channel, content=message, embed=embed)
 
 async def send_notification(message=None, embed=None):
-    await send_to_channel(NOTIFICATIONS_CHANNEL_ID, message, embed)
+    await send_to_channel(settings.notifications_channel_id, message, embed)
 
 def get_team_rating(team_name):
     for idx, row in enumerate(leaderboard_sheet.get_all_values(), 1):
@@ -122,7 +112,7 @@ def update_team_rating(team_name, won):
     team = get_team_rating(team_name)
     if team:
         idx, rating, wins, losses, matches = team
-        new_rating = rating + ELO_WIN_POINTS if won else rating + ELO_LOSS_POINTS
+        new_rating = rating + settings.elo_win_points if won else rating + settings.elo_loss_points
         leaderboard_sheet.update(f"B{idx}", [[new_rating, wins + (1 if won else 0), losses + (0 if won else 1), matches + 1]])
     else:
         starting = 1025 if won else 975
@@ -209,40 +199,27 @@ def update_team_rating(team_name, won):
 
 # -------------------- Bot Ready Event --------------------
 
-@bot.event
-async def on_ready():
-    await bot.tree.sync()
-    print(f"Bot ready as {bot.user}")
-
-    panel_channel = bot.get_channel(PANEL_CHANNEL_ID)
+def make_league_panel():
+    return command_buttons.LeaguePanel(
+        bot,
+        spreadsheet,
+        players_sheet,
+        teams_sheet,
+        matches_sheet,
+        scoring_sheet,
+        leaderboard_sheet,
+        proposed_sheet,
+        scheduled_sheet,
+        weekly_matches_sheet,
+        challenge_sheet,
+        send_to_channel,
+        send_notification
+    )
+
+async def post_league_panel():
+    panel_channel = bot.get_channel(settings.panel_channel_id)
     if panel_channel:
-        # --- DELETE old panel messages ---
-        try:
-            async for msg in panel_channel.history(limit=50):
-                if msg.author == bot.user and msg.embeds:
-                    if msg.embeds[0].title == "📋 League Command Panel":
-                        await msg.delete()
-                        print("Deleted old League Command Panel.")
-        except Exception as e:
-            print(f"Failed to delete old panel: {e}")
-
-        # --- POST new panel ---
-        view = command_buttons.LeaguePanel(
-            bot,
-            spreadsheet,
-            players_sheet,
-            teams_sheet,
-            matches_sheet,
-            scoring_sheet,
-            leaderboard_sheet,
-            proposed_sheet,
-            scheduled_sheet,
-            weekly_matches_sheet,
-            challenge_sheet,
-            send_to_channel,
-            send_notification,
-            DEV_OVERRIDE_IDS
-        )
+        view = make_league_panel()
 
         embed = discord.Embed(
             title="📋 League Command Panel",
@@ -252,22 +229,36 @@ async def on_ready():
 
         embed.add_field(name="✅ Player Signup", value="Sign up to participate in the league and become eligible to join or create teams.", inline=False)
         embed.add_field(name="🏷️ Create Team", value="Register a new team. Captains can form teams and receive matches once the minimum players requirement is met.", inline=False)
-        embed.add_field(name="➕ Request to Join Team", value="Request to join an existing team. The team captain must approve your request.", inline=False)
+        embed.add_field(name="➕ Request to Join Team", value="Request to join an existing team. The team captain must approve your request. Also available as `/join`.", inline=False)
         embed.add_field(name="⭐ Promote Player", value="Team captains can promote another player to become the new captain.", inline=False)
         embed.add_field(name="🚪 Leave Team", value="Leave your current team (only if you're not the captain).", inline=False)
         embed.add_field(name="❌ Unsignup", value="Remove yourself from the league. You must leave your team first to do this.", inline=False)
         embed.add_field(name="❗ Disband Team", value="Disband your team permanently (Captains and Developers only).", inline=False)
         embed.add_field(name="📅 Propose Match", value="Propose a match against another team. The opponent captain must accept. If they can't be DMed, a fallback private channel is used.", inline=False)
         embed.add_field(name="📊 Propose Score", value="Submit map-by-map scores after a match. Opponent captain must confirm. Uses fallback channel if needed.", inline=False)
+        embed.add_field(name="🕒 Set Availability", value="Captains register the times their team can play each week. Match proposals can then suggest times both teams are free.", inline=False)
+        embed.add_field(name="📈 My Rank", value="See your team's leaderboard rank, the teams just above and below, and the points gap. Also available as `/rank`.", inline=False)
 
         embed.set_footer(text="⚡ Some actions require being a captain or developer. Captains manage teams and approve join requests.")
 
-        await panel_channel.send(embed=embed, view=view)
-        print("Posted new League Command Panel!")
+        # --- Reattach to the stored panel message (posts only if it is missing) ---
+        counts = await panels.attach_panels(bot, panel_channel, [("league", embed, view)])
+        print("Posted new League Command Panel!" if counts["posted"] else "Reattached League Command Panel.")
+
+@bot.event
+async def on_ready():
+    print(f"Bot ready as {bot.user}")
 
-    # ✅ POST DEV PANEL TOO
-    await dev.post_dev_panel(bot, spreadsheet, DEV_OVERRIDE_IDS)
-    print("Posted Dev Panel!")
+    # ✅ Runs once per process; reconnects and resumes skip straight past it
+    await startup.run_once([
+        ("command sync", lambda: startup.sync_commands(bot)),
+        ("league panel", post_league_panel),
+        ("dev panels", lambda: dev.post_dev_panel(bot, spreadsheet)),
+        ("roster index", lambda: asyncio.to_thread(roster.ensure)),
+        ("pending prompts", lambda: command_buttons.setup_prompts(bot, make_league_panel())),
+        ("channel janitor", lambda: janitor.start(bot, settings)),
+        ("match reminders", lambda: reminders.start(bot, scheduled_sheet)),
+    ])
 
 bot.run(BOT_TOKEN)
 
@@ -0,0 +1,59 @@
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+
+# -------------------- Entity Locks --------------------
+# Handlers that read a sheet, await something (a role change, a reply) and then write
+# back hold the keys of what they touch: a team, a player, a match or a whole sheet.
+# Unrelated teams and matches never wait on each other. Keys are always taken in
+# sorted order, so two handlers needing overlapping keys cannot deadlock. Locks are
+# not re-entrant: take every key a handler needs in a single hold().
+
+def team_key(team_name):
+    return ("team", str(team_name).strip().lower())
+
+def player_key(user_id):
+    return ("player", str(user_id))
+
+def match_key(match_id):
+    return ("match", str(match_id).strip().lower())
+
+def sheet_key(sheet_name):
+    return ("sheet", sheet_name)
+
+class LockManager:
+    def __init__(self):
+        self._locks = {}
+        self._users = Counter()   # holders + waiters per key, so idle locks can be dropped
+
+    def _release_user(self, key):
+        self._users[key] -= 1
+        if self._users[key] <= 0:
+            del self._users[key]
+            self._locks.pop(key, None)
+
+    @asynccontextmanager
+    async def hold(self, *keys):
+        ordered = sorted({key for key in keys if key})
+        acquired = []
+        try:
+            for key in ordered:
+                lock = self._locks.setdefault(key, asyncio.Lock())
+                self._users[key] += 1
+                try:
+                    await lock.acquire()
+                except BaseException:
+                    self._release_user(key)
+                    raise
+                acquired.append((key, lock))
+            yield
+        finally:
+            for key, lock in reversed(acquired):
+                lock.release()
+                self._release_user(key)
+
+    def busy(self):
+        return sorted(self._locks)
+
+# Shared instance used by every module
+locks = LockManager()
@@ -0,0 +1,257 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+# -------------------- Outbound Queue --------------------
+# Every send/delete the bot makes outside an interaction response goes through one
+# queue. Jobs run in priority order, each Discord route (channel, DM, guild channel
+# list) is paced by its own bucket, and bulk work only ever gets one worker slot,
+# so announcements and cleanup never hold up a captain's button press.
+
+INTERACTIVE = 0   # messages a user is waiting on right now
+NOTIFY = 1        # DMs and channel notifications caused by a user action
+BULK = 2          # announcements, cleanup, anything that can wait
+
+# (requests, seconds) per route kind; conservative versions of Discord's buckets
+ROUTE_LIMITS = {
+    "channel": (5, 5.0),
+    "dm": (5, 5.0),
+    "delete": (5, 1.0),
+    "guild": (5, 5.0),
+    "webhook": (5, 2.0),
+}
+
+BULK_DELETE_MAX = 100
+BULK_DELETE_AGE = timedelta(days=14)
+MAX_RETRIES = 3
+
+class RouteBucket:
+    def __init__(self, rate, per):
+        self.rate = rate
+        self.per = per
+        self.calls = deque()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now):
+        while self.calls and now - self.calls[0] >= self.per:
+            self.calls.popleft()
+        wait = self.blocked_until - now
+        if len(self.calls) >= self.rate:
+            wait = max(wait, self.per - (now - self.calls[0]))
+        return wait
+
+    def record(self, now):
+        self.calls.append(now)
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class Job:
+    __slots__ = ("priority", "seq", "route", "factory", "future", "background", "attempts")
+
+    def __init__(self, priority, seq, route, factory, future, background):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.factory = factory
+        self.future = future
+        self.background = background
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+def route_of(target, kind="channel"):
+    """Bucket key for a send/delete target."""
+    if isinstance(target, (discord.User, discord.Member)):
+        return ("dm", target.id)
+    if isinstance(target, (discord.Message, discord.PartialMessage)):
+        return (kind, target.channel.id)
+    if isinstance(target, discord.abc.GuildChannel) and kind == "guild":
+        return ("guild", target.guild.id)
+    if isinstance(target, discord.Role):
+        return ("guild", target.guild.id)
+    return (kind, getattr(target, "id", 0))
+
+class OutboundQueue:
+    def __init__(self, concurrency=4, bulk_concurrency=1):
+        self.concurrency = concurrency
+        self.bulk_concurrency = bulk_concurrency
+        self.stats = Counter()
+        self._heap = []
+        self._seq = itertools.count()
+        self._buckets = {}
+        self._active = 0
+        self._active_bulk = 0
+        self._wakeup = None
+        self._task = None
+        self._pending_deletes = {}   # channel id -> (channel, [messages], future)
+
+    # --- Public API ---
+
+    async def send(self, target, *args, priority=NOTIFY, **kwargs):
+        """Queue target.send(...) and wait for the sent message."""
+        return await self.submit(priority, route_of(target), lambda: target.send(*args, **kwargs))
+
+    def delete(self, obj, priority=BULK, **kwargs):
+        """Queue obj.delete() for a message, channel or role. Fire-and-forget; await the result to wait.
+
+        Plain message deletes are coalesced per channel (see delete_message).
+        """
+        if isinstance(obj, (discord.Message, discord.PartialMessage)) and not kwargs:
+            return self.delete_message(obj, priority)
+        kind = "delete" if isinstance(obj, (discord.Message, discord.PartialMessage)) else "guild"
+        return self.submit(priority, route_of(obj, kind), lambda: obj.delete(**kwargs), background=True)
+
+    def delete_message(self, message, priority=BULK):
+        """Queue a message delete, coalesced with other pending deletes in the same channel."""
+        channel = message.channel
+        pending = self._pending_deletes.get(channel.id)
+        if pending:
+            pending[1].append(message)
+            return pending[2]
+
+        messages = [message]
+
+        async def flush():
+            self._pending_deletes.pop(channel.id, None)
+            await self._delete_batch(channel, messages)
+
+        future = self.submit(priority, ("delete", channel.id), flush, background=True)
+        self._pending_deletes[channel.id] = (channel, messages, future)
+        return future
+
+    async def delete_messages(self, channel, messages, priority=BULK):
+        """Delete many messages with as few requests as Discord allows."""
+        messages = list(messages)
+        if not messages:
+            return
+        await self.submit(priority, ("delete", channel.id), lambda: self._delete_batch(channel, messages))
+
+    def submit(self, priority, route, factory, background=False):
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        job = Job(priority, next(self._seq), route, factory, future, background)
+        heapq.heappush(self._heap, job)
+        self.stats[f"queued_{priority}"] += 1
+        self._wakeup.set()
+        return future
+
+    def depth(self):
+        return len(self._heap)
+
+    # --- Internals ---
+
+    async def _delete_batch(self, channel, messages):
+        cutoff = datetime.now(timezone.utc) - BULK_DELETE_AGE
+        recent = [m for m in messages if m.created_at > cutoff]
+        old = [m for m in messages if m.created_at <= cutoff]
+
+        # Bulk delete takes 2-100 messages under 14 days old; everything else goes one by one
+        if len(recent) >= 2 and hasattr(channel, "delete_messages"):
+            for i in range(0, len(recent), BULK_DELETE_MAX):
+                await channel.delete_messages(recent[i:i + BULK_DELETE_MAX])
+                self.stats["bulk_deletes"] += 1
+        else:
+            old += recent
+
+        for message in old:
+            try:
+                await message.delete()
+            except discord.NotFound:
+                pass
+        self.stats["deleted_messages"] += len(messages)
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    def _bucket(self, route):
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = RouteBucket(*ROUTE_LIMITS.get(route[0], (5, 5.0)))
+        return bucket
+
+    def _has_slot(self, job):
+        if self._active >= self.concurrency:
+            return False
+        return job.priority != BULK or self._active_bulk < self.bulk_concurrency
+
+    def _next_ready(self):
+        """Pop the highest-priority job whose route and slot are free; return it and the soonest wait."""
+        now = time.monotonic()
+        skipped, picked, soonest = [], None, None
+        while self._heap:
+            job = heapq.heappop(self._heap)
+            wait = self._bucket(job.route).wait_time(now)
+            if wait <= 0 and self._has_slot(job):
+                picked = job
+                break
+            skipped.append(job)
+            if wait > 0:
+                soonest = wait if soonest is None else min(soonest, wait)
+        for job in skipped:
+            heapq.heappush(self._heap, job)
+        return picked, soonest
+
+    async def _dispatch(self):
+        while True:
+            job, soonest = self._next_ready()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=soonest)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._bucket(job.route).record(time.monotonic())
+            self._active += 1
+            if job.priority == BULK:
+                self._active_bulk += 1
+            asyncio.get_running_loop().create_task(self._run(job))
+
+    async def _run(self, job):
+        try:
+            result = await job.factory()
+        except discord.HTTPException as e:
+            if e.status == 429 and job.attempts < MAX_RETRIES:
+                # Route is hot: park it and put the job back in line
+                job.attempts += 1
+                self._bucket(job.route).block(getattr(e, "retry_after", 1.0) or 1.0)
+                heapq.heappush(self._heap, job)
+                self.stats["rate_limited"] += 1
+            else:
+                self._finish(job, error=e)
+        except Exception as e:
+            self._finish(job, error=e)
+        else:
+            self._finish(job, result=result)
+        finally:
+            self._active -= 1
+            if job.priority == BULK:
+                self._active_bulk -= 1
+            self._wakeup.set()
+
+    def _finish(self, job, result=None, error=None):
+        self.stats[f"done_{job.priority}"] += 1
+        if job.future.done():
+            return
+        if error is None:
+            job.future.set_result(result)
+        elif job.background:
+            # Nobody is waiting on background work; log it instead of raising into the void
+            if not isinstance(error, discord.NotFound):
+                print(f"[❌] Outbound {job.route[0]} job failed: {error}")
+            job.future.set_result(None)
+        else:
+            job.future.set_exception(error)
+
+# Shared instance used by every module
+outbound = OutboundQueue()
@@ -0,0 +1,118 @@
+import re
+import time
+from collections import defaultdict
+
+# -------------------- Weekly Pairing Engine --------------------
+
+DEFAULT_RATING = 800
+SEARCH_WINDOW = 8  # how many rating-neighbours below a team are considered per round
+
+def parse_week(value):
+    """Week numbers come from sheet cells or match ids like 'Week3-Foo-Bar'."""
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    found = re.match(r"(?:Week|Challenge)(\d+)", value)
+    return int(found.group(1)) if found else None
+
+def pair_key(team_a, team_b):
+    return (team_a, team_b) if team_a <= team_b else (team_b, team_a)
+
+def build_history_index(history_rows):
+    """Map each team pair to the most recent week they met, from Match History rows (no header)."""
+    index = {}
+    for row in history_rows:
+        if len(row) < 4 or not row[2] or not row[3]:
+            continue
+        week = parse_week(row[0])
+        if week is None:
+            week = parse_week(row[1])
+        if week is None:
+            continue
+        key = pair_key(row[2], row[3])
+        if week > index.get(key, -1):
+            index[key] = week
+    return index
+
+class PairingResult:
+    def __init__(self, matchups, metrics):
+        self.matchups = matchups
+        self.metrics = metrics
+
+    def summary(self):
+        m = self.metrics
+        return (
+            f"{m['matches']} matches for {m['teams']} teams • "
+            f"avg gap {m['avg_gap']:.0f} / max {m['max_gap']} • "
+            f"rematches {m['rematches']} • short of cap {m['under_cap']} • "
+            f"{m['elapsed_ms']:.1f} ms"
+        )
+
+def pair_teams(teams, ratings, history, week, games_per_week=2, cooldown_weeks=2, window=SEARCH_WINDOW):
+    """Pair teams with near-rating opponents.
+
+    Teams are sorted by rating once (O(n log n)); each round then walks the pool and
+    pairs every team with the closest unused opponent below it that it has not met
+    within `cooldown_weeks`, looking at most `window` places ahead. A recent rematch is
+    only used when no fresh opponent is in reach, and is counted in the metrics.
+    """
+    started = time.perf_counter()
+    pool = sorted(set(teams), key=lambda t: (-ratings.get(t, DEFAULT_RATING), t))
+
+    games = defaultdict(int)
+    scheduled = set()
+    matchups = []
+    gaps = []
+    rematches = 0
+
+    def recently_played(key):
+        last = history.get(key)
+        return last is not None and week - last <= cooldown_weeks
+
+    for _ in range(games_per_week):
+        available = [t for t in pool if games[t] < games_per_week]
+        used = set()
+
+        for i, team in enumerate(available):
+            if team in used:
+                continue
+
+            choice = None
+            fallback = None
+            for opponent in available[i + 1:i + 1 + window]:
+                if opponent in used:
+                    continue
+                key = pair_key(team, opponent)
+                if key in scheduled:
+                    continue
+                if recently_played(key):
+                    if fallback is None:
+                        fallback = opponent
+                    continue
+                choice = opponent
+                break
+
+            if choice is None and fallback is not None:
+                choice = fallback
+                rematches += 1
+            if choice is None:
+                continue
+
+            used.update((team, choice))
+            scheduled.add(pair_key(team, choice))
+            games[team] += 1
+            games[choice] += 1
+            matchups.append((team, choice))
+            gaps.append(abs(ratings.get(team, DEFAULT_RATING) - ratings.get(choice, DEFAULT_RATING)))
+
+    metrics = {
+        "teams": len(pool),
+        "matches": len(matchups),
+        "avg_gap": sum(gaps) / len(gaps) if gaps else 0,
+        "max_gap": max(gaps) if gaps else 0,
+        "rematches": rematches,
+        "under_cap": sum(1 for t in pool if games[t] < games_per_week),
+        "unpaired": sum(1 for t in pool if games[t] == 0),
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+    return PairingResult(matchups, metrics)
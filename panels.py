@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+
+import discord
+
+from outbound import outbound
+
+# -------------------- Persistent Panels --------------------
+# Panel views are registered with bot.add_view (stable custom_ids, timeout=None), so
+# their buttons keep working across restarts. The message id of every posted panel is
+# kept in panel_messages.json; startup fetches that one message and reuses it instead
+# of scanning channel history and reposting.
+
+PANEL_FILE = "panel_messages.json"
+
+def load_panels():
+    if not os.path.exists(PANEL_FILE):
+        return {}
+    try:
+        with open(PANEL_FILE) as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return {}
+
+def save_panels(data):
+    tmp = f"{PANEL_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, PANEL_FILE)
+
+def embed_digest(embed):
+    return hashlib.sha1(json.dumps(embed.to_dict(), sort_keys=True).encode()).hexdigest()
+
+async def remove_legacy_panels(bot, channel, titles):
+    """One-time cleanup of panels posted before message ids were stored."""
+    stale = [
+        msg async for msg in channel.history(limit=100)
+        if msg.author == bot.user and msg.embeds and any(t in (msg.embeds[0].title or "") for t in titles)
+    ]
+    await outbound.delete_messages(channel, stale)
+    if stale:
+        print(f"[🧹] Removed {len(stale)} untracked panel message(s) from #{channel.name}")
+
+async def attach_panels(bot, channel, panels):
+    """Reattach or post each (key, embed, view) panel in a channel.
+
+    Stored messages are reused (edited only when the embed changed); missing ones are
+    posted fresh. Returns {"reattached": n, "updated": n, "posted": n}.
+    """
+    stored = load_panels()
+    counts = {"reattached": 0, "updated": 0, "posted": 0}
+    updates = {}
+
+    untracked = [embed.title for key, embed, _ in panels if stored.get(key, {}).get("channel_id") != channel.id]
+    if untracked:
+        await remove_legacy_panels(bot, channel, untracked)
+
+    for key, embed, view in panels:
+        bot.add_view(view)
+        digest = embed_digest(embed)
+        entry = stored.get(key)
+
+        if entry and entry.get("channel_id") == channel.id:
+            try:
+                message = await channel.fetch_message(entry["message_id"])
+                if entry.get("digest") != digest:
+                    await message.edit(embed=embed, view=view)
+                    updates[key] = dict(entry, digest=digest)
+                    counts["updated"] += 1
+                else:
+                    counts["reattached"] += 1
+                continue
+            except discord.NotFound:
+                print(f"[⚠️] Stored panel '{key}' was deleted; posting a new one.")
+
+        message = await outbound.send(channel, embed=embed, view=view)
+        updates[key] = {"channel_id": channel.id, "message_id": message.id, "digest": digest}
+        counts["posted"] += 1
+
+    # Re-read before writing so panels attached concurrently in other channels are kept
+    if updates:
+        save_panels({**load_panels(), **updates})
+    return counts
@@ -0,0 +1,124 @@
+import base64
+import struct
+
+# -------------------- Custom ID Payloads --------------------
+# Prompt buttons carry their own state in the custom_id, so no View object has to be
+# kept per open prompt and the buttons keep working across restarts and deploys.
+# A payload is packed with struct (length-prefixed strings, fixed-width numbers)
+# and base85-encoded. Discord caps custom_ids at 100 characters; when a payload
+# does not fit (long team names), the id carries only the pending-store key and the
+# handler reads the payload from the store instead.
+
+MAX_CUSTOM_ID = 100
+STORE_MARK = "."   # not in the base85 alphabet
+
+KIND_CODES = {"match": "m", "score": "s", "join": "j"}
+CODE_KINDS = {code: kind for kind, code in KIND_CODES.items()}
+
+MATCH_TYPES = ["assigned", "challenge"]
+GAMEMODES = ["Payload", "Capture Point"]
+NO_WEEK = 0xFFFF
+KEY_BYTES = 5   # pending keys are 10 hex characters
+
+class Writer:
+    def __init__(self):
+        self.parts = []
+
+    def str(self, value):
+        raw = str(value).encode()
+        self.parts.append(struct.pack("B", len(raw)) + raw)
+
+    def pack(self, fmt, *values):
+        self.parts.append(struct.pack(fmt, *values))
+
+    def bytes(self):
+        return b"".join(self.parts)
+
+class Reader:
+    def __init__(self, raw):
+        self.raw = raw
+        self.pos = 0
+
+    def str(self):
+        size = self.raw[self.pos]
+        value = self.raw[self.pos + 1:self.pos + 1 + size].decode()
+        self.pos += 1 + size
+        return value
+
+    def unpack(self, fmt):
+        values = struct.unpack_from(fmt, self.raw, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values
+
+# --- Per-kind layouts ---
+
+def pack_match(w, p):
+    w.str(p["match_id"]); w.str(p["team_a"]); w.str(p["team_b"])
+    week = NO_WEEK if p["week_number"] is None else int(p["week_number"])
+    w.pack("<BHI", MATCH_TYPES.index(p["match_type"]), week, p["proposed_ts"])
+
+def unpack_match(r):
+    match_id, team_a, team_b = r.str(), r.str(), r.str()
+    match_type, week, ts = r.unpack("<BHI")
+    return {
+        "team_a": team_a, "team_b": team_b, "proposed_date": f"<t:{ts}:f>",
+        "match_id": match_id, "match_type": MATCH_TYPES[match_type],
+        "week_number": None if week == NO_WEEK else week, "proposed_ts": ts,
+    }
+
+def pack_score(w, p):
+    match = p["match"]
+    w.str(match.get("match_id", "")); w.str(match["team1"]); w.str(match["team2"])
+    w.pack("<QB", int(p["proposer_id"]), len(p["map_scores"]))
+    for m in p["map_scores"]:
+        w.pack("<BHH", GAMEMODES.index(m["gamemode"]), int(m["team1_score"]), int(m["team2_score"]))
+
+def unpack_score(r):
+    match = {"match_id": r.str(), "team1": r.str(), "team2": r.str()}
+    proposer_id, count = r.unpack("<QB")
+    map_scores = []
+    for _ in range(count):
+        mode, a, b = r.unpack("<BHH")
+        map_scores.append({"gamemode": GAMEMODES[mode], "team1_score": str(a), "team2_score": str(b)})
+    return {"match": match, "map_scores": map_scores, "proposer_id": proposer_id}
+
+def pack_join(w, p):
+    w.str(p["team_name"])
+    w.pack("<QQ", int(p["invitee_id"]), int(p["guild_id"]))
+
+def unpack_join(r):
+    team_name = r.str()
+    invitee_id, guild_id = r.unpack("<QQ")
+    return {"team_name": team_name, "invitee_id": invitee_id, "guild_id": guild_id}
+
+LAYOUTS = {
+    "match": (pack_match, unpack_match),
+    "score": (pack_score, unpack_score),
+    "join": (pack_join, unpack_join),
+}
+
+# --- Custom IDs ---
+
+def custom_id(kind, action, data):
+    return f"p:{KIND_CODES[kind]}{action}:{data}"
+
+def encode(kind, key, payload):
+    """Packed payload for a custom_id, or the store marker plus key if it will not fit."""
+    try:
+        w = Writer()
+        w.pack(f"{KEY_BYTES}s", bytes.fromhex(key))
+        LAYOUTS[kind][0](w, payload)
+        data = base64.b85encode(w.bytes()).decode()
+    except (ValueError, KeyError, struct.error):
+        data = None
+    if data is None or len(custom_id(kind, 0, data)) > MAX_CUSTOM_ID:
+        return STORE_MARK + key
+    return data
+
+def decode(kind, data):
+    """(key, payload) from a custom_id's data part; payload is None when it lives in the store."""
+    if data.startswith(STORE_MARK):
+        return data[len(STORE_MARK):], None
+    r = Reader(base64.b85decode(data))
+    key = r.unpack(f"{KEY_BYTES}s")[0].hex()
+    return key, LAYOUTS[kind][1](r)
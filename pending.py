@@ -0,0 +1,93 @@
+import json
+import secrets
+import sqlite3
+import time
+from collections import namedtuple
+
+from scheduler import scheduler
+
+# -------------------- Pending Proposals --------------------
+# Match proposals, score confirmations and join requests waiting on the other side.
+# Each one is a row in a local SQLite file (kind, payload, deadline, and where the
+# prompt message was posted), so a restart neither forgets them nor leaves their
+# sheet rows behind. Expiry runs through the shared deadline scheduler; a handler
+# claims a proposal by removing its row, so accept, decline and expiry can never
+# all act on the same one.
+
+DB_FILE = "pending.db"
+
+Pending = namedtuple("Pending", "key kind payload expires_at channel_id message_id")
+
+class PendingStore:
+    def __init__(self, path=DB_FILE):
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                channel_id INTEGER,
+                message_id INTEGER
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS pending_expiry ON pending (expires_at)")
+        self.db.commit()
+
+    def _row(self, row):
+        return Pending(row[0], row[1], json.loads(row[2]), row[3], row[4], row[5]) if row else None
+
+    def add(self, kind, payload, ttl):
+        """Store a new proposal and schedule its expiry. Returns its key."""
+        key = secrets.token_hex(5)
+        expires_at = time.time() + ttl
+        with self.db:
+            self.db.execute(
+                "INSERT INTO pending (key, kind, payload, expires_at) VALUES (?, ?, ?, ?)",
+                (key, kind, json.dumps(payload, separators=(",", ":")), expires_at)
+            )
+        scheduler.schedule(key, expires_at, kind)
+        return key
+
+    def attach(self, key, message):
+        """Remember where the prompt was posted so expiry can remove it after a restart."""
+        if message is None:
+            return
+        with self.db:
+            self.db.execute(
+                "UPDATE pending SET channel_id = ?, message_id = ? WHERE key = ?",
+                (message.channel.id, message.id, key)
+            )
+
+    def update(self, key, payload):
+        with self.db:
+            self.db.execute("UPDATE pending SET payload = ? WHERE key = ?", (json.dumps(payload, separators=(",", ":")), key))
+
+    def get(self, key):
+        return self._row(self.db.execute("SELECT * FROM pending WHERE key = ?", (key,)).fetchone())
+
+    def claim(self, key):
+        """Remove and return the proposal, or None if something else already resolved it."""
+        record = self.get(key)
+        if record is None:
+            return None
+        with self.db:
+            removed = self.db.execute("DELETE FROM pending WHERE key = ?", (key,)).rowcount
+        scheduler.cancel(key)
+        return record if removed else None
+
+    def all(self):
+        return [self._row(row) for row in self.db.execute("SELECT * FROM pending ORDER BY expires_at")]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def reschedule_all(self):
+        """Put every stored deadline back on the scheduler (overdue ones fire straight away)."""
+        records = self.all()
+        for record in records:
+            scheduler.schedule(record.key, record.expires_at, record.kind)
+        return records
+
+# Shared instance used by every module
+pending = PendingStore()
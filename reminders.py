@@ -0,0 +1,121 @@
+import asyncio
+import re
+import time
+
+import discord
+
+from roster import roster
+from scheduler import scheduler
+from settings import settings
+from webhooks import webhooks
+
+# -------------------- Match Reminders --------------------
+# Pings both teams in the scheduled channel ahead of each match in Match Scheduled,
+# once per offset in "reminder_offsets_minutes" (e.g. 24h and 30m before). The tab is
+# read once at startup; after that accepting a match adds its reminders and
+# finishing one removes them, so the sheet is never polled. Deadlines run on the
+# shared scheduler, which sleeps until the next one is due.
+
+KIND = "reminder"
+TIMESTAMP = re.compile(r"<t:(\d+)(?::[a-zA-Z])?>")
+
+def parse_timestamp(value):
+    """Unix time from a Discord timestamp string like <t:1718000000:f>, or None."""
+    found = TIMESTAMP.search(str(value))
+    return int(found.group(1)) if found else None
+
+def reminder_key(match_id, offset):
+    return f"{KIND}:{offset}:{match_id}"
+
+def match_id_key(match_id):
+    return str(match_id).strip().lower()
+
+def describe(minutes):
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}d"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
+
+class MatchReminders:
+    def __init__(self):
+        self.bot = None
+        self.matches = {}   # lowercased match id -> (match id, team a, team b, unix start)
+        self.sent = 0
+
+    def add(self, match_id, team_a, team_b, scheduled_date):
+        """Schedule every reminder still ahead for a match. False if the date is not a timestamp."""
+        start = parse_timestamp(scheduled_date)
+        if not match_id or start is None:
+            return False
+        key = match_id_key(match_id)
+        self.remove(key)
+        self.matches[key] = (str(match_id).strip(), team_a, team_b, start)
+        now = time.time()
+        for offset in settings.reminder_offsets_minutes:
+            when = start - offset * 60
+            if when > now:
+                scheduler.schedule(reminder_key(key, offset), when, KIND)
+        return True
+
+    def remove(self, match_id):
+        if not match_id:
+            return
+        key = match_id_key(match_id)
+        if self.matches.pop(key, None) is None:
+            return
+        for offset in settings.reminder_offsets_minutes:
+            scheduler.cancel(reminder_key(key, offset))
+
+    def clear(self):
+        for key in list(self.matches):
+            self.remove(key)
+
+    def load_rows(self, rows):
+        """Rebuild from Match Scheduled rows (match id, team a, team b, date; no header)."""
+        self.clear()
+        for row in rows:
+            if len(row) >= 4:
+                self.add(row[0], row[1], row[2], row[3])
+        return len(self.matches)
+
+    async def _due(self, key):
+        _, offset, id_key = key.split(":", 2)
+        match = self.matches.get(id_key)
+        if match is None:
+            return
+        match_id, team_a, team_b, start = match
+        if int(offset) == min(settings.reminder_offsets_minutes, default=0):
+            del self.matches[id_key]   # last reminder for this match
+
+        channel = self.bot.get_channel(settings.scheduled_channel_id) if self.bot and settings.scheduled_channel_id else None
+        if channel is None:
+            print(f"[⚠️] No scheduled channel for the reminder of match {match_id}")
+            return
+
+        ping_full_team = settings.match_ping_full_team
+        mentions_a = roster.mentions(team_a, ping_full_team, fallback=f"**{team_a}**")
+        mentions_b = roster.mentions(team_b, ping_full_team, fallback=f"**{team_b}**")
+        embed = discord.Embed(
+            title="⏰ Match Reminder",
+            description=(
+                f"**{team_a}** vs **{team_b}**\n"
+                f"🕓 <t:{start}:f> (<t:{start}:R>)"
+            ),
+            color=discord.Color.orange()
+        )
+        embed.set_footer(text=f"Match ID: {match_id} • {describe(int(offset))} reminder")
+        await webhooks.announce(channel, content=f"{mentions_a} vs {mentions_b}", embed=embed)
+        self.sent += 1
+
+    async def start(self, bot, scheduled_sheet):
+        """Read Match Scheduled once and schedule every upcoming reminder."""
+        self.bot = bot
+        scheduler.on(KIND, self._due)
+        scheduler.start()
+        rows = await asyncio.to_thread(scheduled_sheet.get_all_values)
+        count = self.load_rows(rows[1:])
+        print(f"[⏰] Reminders scheduled for {count} upcoming match(es).")
+
+# Shared instance used by every module
+reminders = MatchReminders()
@@ -0,0 +1,122 @@
+from collections import namedtuple
+
+import numpy as np
+
+from rollover import HEADERS, STARTING_RATING, pad, quoted
+
+# -------------------- Rating Replay --------------------
+# Rebuilds every team's rating, wins, losses and games played from Match History
+# alone, so a leaderboard bent by a bad forfeit, a deleted Scoring row or a manual
+# adjustment can be put right. History is loaded into NumPy arrays once. The flat
+# rule (elo_win_points / elo_loss_points per result, as live scoring applies it)
+# is a couple of bincounts. Expected-score Elo depends on match order, so matches
+# are grouped into waves in which no team plays twice; each wave is one vectorized
+# update and the result is the same as replaying one match at a time.
+
+HISTORY_WIDTH = len(HEADERS["Match History"])
+WINNER_COL = HISTORY_WIDTH - 1
+FORFEIT_SUFFIX = " Forfeit"
+RULES = ("flat", "elo")
+
+History = namedtuple("History", "teams team_a team_b score skipped")
+Replay = namedtuple("Replay", "teams rating wins losses played")
+
+def load_history(rows, forfeits_count=True):
+    """Match History rows (no header) -> History arrays; score is 1 (A won), 0 (B won) or 0.5 (tie)."""
+    index = {}
+    team_a, team_b, score = [], [], []
+    skipped = 0
+    for row in pad(rows, HISTORY_WIDTH):
+        a, b, result = row[2].strip(), row[3].strip(), row[WINNER_COL].strip()
+        if not a or not b:
+            continue
+        if result == a:
+            s = 1.0
+        elif result == b:
+            s = 0.0
+        elif result == "Tie":
+            s = 0.5
+        elif result == "Double Forfeit":
+            continue
+        elif result.endswith(FORFEIT_SUFFIX):
+            if not forfeits_count:
+                continue
+            loser = result[:-len(FORFEIT_SUFFIX)]
+            s = 0.0 if loser == a else 1.0 if loser == b else None
+        else:
+            s = None
+        if s is None:
+            skipped += 1
+            continue
+        team_a.append(index.setdefault(a, len(index)))
+        team_b.append(index.setdefault(b, len(index)))
+        score.append(s)
+    return History(
+        list(index),
+        np.array(team_a, dtype=np.intp),
+        np.array(team_b, dtype=np.intp),
+        np.array(score, dtype=float),
+        skipped
+    )
+
+def waves(team_a, team_b, team_count):
+    """Split matches into waves where no team appears twice, keeping each team's own order."""
+    last = [-1] * team_count
+    level = np.empty(len(team_a), dtype=np.intp)
+    for i, (a, b) in enumerate(zip(team_a.tolist(), team_b.tolist())):
+        level[i] = last[a] = last[b] = max(last[a], last[b]) + 1
+    order = np.argsort(level, kind="stable")
+    bounds = np.flatnonzero(np.diff(level[order])) + 1
+    return np.split(order, bounds)
+
+def replay(history, rule="flat", win_points=25, loss_points=-25, k_factor=32, start=STARTING_RATING):
+    """Recompute ratings from scratch. Ties count towards nothing under the flat rule, as in live
+    scoring; under Elo they pull both ratings towards each other but are not games played."""
+    n = len(history.teams)
+    a, b, s = history.team_a, history.team_b, history.score
+    decisive = s != 0.5
+    winners = np.where(s == 1.0, a, b)[decisive]
+    losers = np.where(s == 1.0, b, a)[decisive]
+    wins = np.bincount(winners, minlength=n)
+    losses = np.bincount(losers, minlength=n)
+
+    if rule == "flat":
+        rating = start + wins * win_points + losses * loss_points
+    else:
+        rating = np.full(n, float(start))
+        for wave in waves(a, b, n):
+            wa, wb = a[wave], b[wave]
+            expected = 1.0 / (1.0 + 10.0 ** ((rating[wb] - rating[wa]) / 400.0))
+            delta = k_factor * (s[wave] - expected)
+            rating[wa] += delta
+            rating[wb] -= delta
+        rating = np.rint(rating)
+
+    return Replay(history.teams, rating.astype(int), wins, losses, wins + losses)
+
+def rebuild_leaderboard(leaderboard_rows, result, start=STARTING_RATING):
+    """New Leaderboard table (header included, sorted by rating) for every team already on it,
+    plus (team, old row, new row) for each team whose row changes. Teams only found in history
+    (disbanded) are left out; teams with no history go back to the starting rating."""
+    position = {team: i for i, team in enumerate(result.teams)}
+    table, changes = [], []
+    for row in pad([r for r in leaderboard_rows if r and r[0].strip()], 5):
+        team = row[0]
+        i = position.get(team)
+        if i is None:
+            new = [team, start, 0, 0, 0]
+        else:
+            new = [team, int(result.rating[i]), int(result.wins[i]), int(result.losses[i]), int(result.played[i])]
+        if [str(v) for v in new[1:]] != [str(v).strip() for v in row[1:5]]:
+            changes.append((team, row[:5], new))
+        table.append(new)
+    table.sort(key=lambda r: r[1], reverse=True)
+    return [HEADERS["Leaderboard"]] + table, changes
+
+def write_leaderboard(spreadsheet, table, height):
+    """Whole Leaderboard in one request, blanking any stale rows below it."""
+    table = table + [[""] * 5] * max(0, height - len(table))
+    spreadsheet.values_batch_update(body={
+        "valueInputOption": "RAW",
+        "data": [{"range": quoted("Leaderboard", "A1"), "values": table}]
+    })
@@ -0,0 +1,259 @@
+import time
+from collections import defaultdict
+
+import pairing
+import season
+from standings import standings, request_leaderboard_refresh
+
+# -------------------- Weekly Rollover Pipeline --------------------
+# read (2 API calls) -> plan everything in memory -> commit (a handful of bulk writes)
+
+HEADERS = {
+    "Teams": ["Team Name", "Captain", "Player 2", "Player 3", "Player 4", "Player 5", "Player 6"],
+    "Leaderboard": ["Team Name", "Rating", "Wins", "Losses", "Matches Played"],
+    "Matches": ["Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date", "Status", "Winner", "Loser", "Proposed By"],
+    "Weekly Matches": ["Week", "Team A", "Team B", "Match ID", "Scheduled Date"],
+    "Match Propose": ["Team A", "Team B", "Proposer ID", "Proposed Date"],
+    "Match Scheduled": ["Match ID", "Team A", "Team B", "Scheduled Date"],
+    "Challenge Matches": ["Week", "Team A", "Team B", "Proposer ID", "Proposed Date", "Completion Date"],
+    "Match History": [
+        "Week", "Match ID", "Team A", "Team B", "Proposed Date", "Scheduled Date",
+        "Map 1 Mode", "Map 1 A", "Map 1 B", "Map 2 Mode", "Map 2 A", "Map 2 B",
+        "Map 3 Mode", "Map 3 A", "Map 3 B", "Total A", "Total B", "Maps Won A", "Maps Won B", "Winner"
+    ],
+    season.SCHEDULE_SHEET: season.SCHEDULE_HEADERS,
+}
+
+# Tabs whose data rows are wiped on a forced rollover (headers stay)
+RESET_SHEETS = ["Weekly Matches", "Match Propose", "Match Scheduled", "Challenge Matches"]
+
+STARTING_RATING = 800
+
+def quoted(name, cells="A1"):
+    return f"'{name}'!{cells}"
+
+def pad(rows, width):
+    return [row + [""] * (width - len(row)) for row in rows]
+
+# -------------------- Stage 1: Read --------------------
+
+def read_all(spreadsheet):
+    """Fetch every tab the rollover touches with one metadata call and one values call."""
+    sheets = {ws.title: ws for ws in spreadsheet.worksheets()}
+    for name, headers in HEADERS.items():
+        if name not in sheets:
+            ws = spreadsheet.add_worksheet(title=name, rows="100", cols=str(len(headers)))
+            ws.append_row(headers)
+            sheets[name] = ws
+
+    names = list(HEADERS)
+    response = spreadsheet.values_batch_get([quoted(n, "A:Z") for n in names])
+    data = {}
+    for name, value_range in zip(names, response.get("valueRanges", [])):
+        rows = value_range.get("values", [])
+        width = max([len(HEADERS[name])] + [len(r) for r in rows])
+        data[name] = pad(rows, width)
+    return sheets, data
+
+# -------------------- Stage 2: Plan --------------------
+
+class RolloverPlan:
+    def __init__(self):
+        self.history_rows = []        # archived challenges + forfeits, appended once
+        self.match_cell_updates = []  # (row, col, value) on Matches
+        self.new_match_rows = []
+        self.weekly_rows = []
+        self.leaderboard_table = None  # full sorted table incl. header, written once
+        self.leaderboard_height = 0
+        self.changed_ratings = {}
+        self.matchups = []
+        self.schedule_rows = []
+        self.archived = False
+        self.valid_teams = []
+        self.team_count = 0
+        self.summary = ""
+        self.timings = {}
+
+def archive_challenge_rows(challenge_rows):
+    rows = []
+    for row in challenge_rows:
+        rows.append([
+            row[0], "challenge", row[1], row[2],
+            "",       # proposed date
+            row[4],   # completion date -> scheduled date
+            "", "", "", "", "", "", "", "", "",
+            "", "", "", "", ""
+        ])
+    return rows
+
+def forfeit_history_row(week, match_id, team_a, team_b, reason):
+    return [week, match_id, team_a, team_b, "", ""] + [""] * 13 + [reason]
+
+def plan_forfeits(plan, match_rows, team_players, team_min_players, week_number, affect_elo, deltas):
+    for idx, row in enumerate(match_rows, start=2):
+        fields = row[:9]
+        if len(fields) < 9 or not fields[0]:
+            continue
+
+        match_id, team_a, team_b, _, _, status, _, _, _ = fields
+        if status.strip() in ["Finished", "Cancelled", "Forfeited"]:
+            continue
+
+        team_a_valid = team_players.get(team_a, 0) >= team_min_players
+        team_b_valid = team_players.get(team_b, 0) >= team_min_players
+
+        if team_a_valid != team_b_valid:
+            winner, loser = (team_a, team_b) if team_a_valid else (team_b, team_a)
+            plan.match_cell_updates += [(idx, 6, "Forfeited"), (idx, 7, winner), (idx, 8, loser)]
+            if affect_elo:
+                deltas[winner].append(True)
+                deltas[loser].append(False)
+            plan.history_rows.append(forfeit_history_row(week_number, match_id, team_a, team_b, f"{loser} Forfeit"))
+        else:
+            plan.match_cell_updates.append((idx, 6, "Double Forfeit"))
+            plan.history_rows.append(forfeit_history_row(week_number, match_id, team_a, team_b, "Double Forfeit"))
+
+def apply_rating_changes(plan, leaderboard_rows, deltas, elo_win, elo_loss):
+    """Apply every queued result to the leaderboard in a single pass, then sort once."""
+    table = []
+    seen = set()
+    for row in leaderboard_rows:
+        if not row or not row[0]:
+            continue
+        team = row[0]
+        seen.add(team)
+        try:
+            rating, wins, losses, played = (int(v) for v in row[1:5])
+        except ValueError:
+            table.append(row[:5])
+            continue
+        results = deltas.get(team)
+        if results:
+            won = sum(results)
+            lost = len(results) - won
+            rating += won * elo_win + lost * elo_loss
+            wins, losses, played = wins + won, losses + lost, played + len(results)
+            plan.changed_ratings[team] = rating
+        table.append([team, rating, wins, losses, played])
+
+    # Teams with results but no leaderboard row start from the default rating
+    for team, results in deltas.items():
+        if team in seen or not results:
+            continue
+        won = sum(results)
+        lost = len(results) - won
+        rating = STARTING_RATING + won * elo_win + lost * elo_loss
+        table.append([team, rating, won, lost, len(results)])
+        plan.changed_ratings[team] = rating
+
+    table.sort(key=lambda r: int(r[1]) if str(r[1]).lstrip("-").isdigit() else 0, reverse=True)
+    plan.leaderboard_table = [HEADERS["Leaderboard"]] + table
+
+def plan_rollover(data, config, week_number, force, archive):
+    plan = RolloverPlan()
+    started = time.perf_counter()
+
+    team_min_players = config.team_min_players
+    elo_win = config.elo_win_points
+    elo_loss = config.elo_loss_points
+    affect_elo = config.forfeit_affects_elo
+    games_per_week = config.weekly_games_per_team
+    rematch_cooldown = config.rematch_cooldown_weeks
+
+    # --- Archive challenges
+    plan.archived = archive
+    if archive:
+        plan.history_rows += archive_challenge_rows([r for r in data["Challenge Matches"][1:] if any(r)])
+
+    # --- Team eligibility and leaderboard sync (set lookups, no per-team writes)
+    team_players = {}
+    for row in data["Teams"][1:]:
+        if not row or not row[0]:
+            continue
+        team_players[row[0]] = len([p for p in row[1:7] if p.strip()])
+    plan.valid_teams = [t for t, n in team_players.items() if n >= team_min_players]
+
+    leaderboard_rows = [r for r in data["Leaderboard"][1:] if r and r[0]]
+    plan.leaderboard_height = len(data["Leaderboard"])
+    on_board = {r[0] for r in leaderboard_rows}
+    for team in plan.valid_teams:
+        if team not in on_board:
+            leaderboard_rows.append([team, STARTING_RATING, 0, 0, 0])
+            plan.changed_ratings[team] = STARTING_RATING
+    plan.team_count = len(leaderboard_rows)
+
+    # --- Forfeits and rating deltas
+    deltas = defaultdict(list)
+    if force:
+        plan_forfeits(plan, data["Matches"][1:], team_players, team_min_players, week_number, affect_elo, deltas)
+    apply_rating_changes(plan, leaderboard_rows, deltas, elo_win, elo_loss)
+    plan.timings["forfeits"] = time.perf_counter() - started
+
+    # --- New matchups: season schedule first, pairing engine otherwise
+    planned = season.load_week(data[season.SCHEDULE_SHEET][1:], week_number, plan.valid_teams)
+    if planned:
+        plan.matchups, plan.schedule_rows = planned
+        plan.summary = f"{len(plan.matchups)} matches activated from the season schedule"
+    else:
+        ratings = {str(r[0]): int(r[1]) for r in plan.leaderboard_table[1:] if str(r[1]).lstrip("-").isdigit()}
+        history = pairing.build_history_index(data["Match History"][1:])
+        result = pairing.pair_teams(
+            plan.valid_teams, ratings, history, week_number,
+            games_per_week=games_per_week,
+            cooldown_weeks=rematch_cooldown
+        )
+        plan.matchups = [(a, b, season.make_match_id(week_number, a, b)) for a, b in result.matchups]
+        plan.summary = result.summary()
+
+    for team_a, team_b, match_id in plan.matchups:
+        plan.weekly_rows.append([week_number, team_a, team_b, match_id, "TBD"])
+        plan.new_match_rows.append([match_id, team_a, team_b, "TBD", "", "Auto Proposed", "", "", "", "System"])
+
+    plan.timings["plan"] = time.perf_counter() - started
+    return plan
+
+# -------------------- Stage 3: Commit --------------------
+
+def commit_rollover(spreadsheet, sheets, plan, force):
+    started = time.perf_counter()
+    calls = 0
+
+    # 1) Wipe weekly tabs below their headers in one request
+    reset = RESET_SHEETS if force else (["Challenge Matches"] if plan.archived else [])
+    if reset:
+        spreadsheet.values_batch_clear(body={"ranges": [quoted(n, "A2:Z") for n in reset]})
+        calls += 1
+
+    # 2) Every in-place cell write across tabs in one request
+    leaderboard = sheets["Leaderboard"]
+    if len(plan.leaderboard_table) > leaderboard.row_count:
+        leaderboard.add_rows(len(plan.leaderboard_table) - leaderboard.row_count)
+        calls += 1
+
+    # Blank out any stale rows below the rewritten table
+    table = plan.leaderboard_table + [[""] * 5] * max(0, plan.leaderboard_height - len(plan.leaderboard_table))
+    data = [{"range": quoted("Leaderboard", "A1"), "values": table}]
+    for row, col, value in plan.match_cell_updates:
+        data.append({"range": quoted("Matches", f"{chr(64 + col)}{row}"), "values": [[value]]})
+    data += season.mark_active(plan.schedule_rows)
+    spreadsheet.values_batch_update(body={"valueInputOption": "RAW", "data": data})
+    calls += 1
+
+    # 3) Appends
+    if plan.history_rows:
+        sheets["Match History"].append_rows(plan.history_rows)
+        calls += 1
+    if plan.new_match_rows:
+        sheets["Matches"].append_rows(plan.new_match_rows)
+        sheets["Weekly Matches"].append_rows(plan.weekly_rows)
+        calls += 2
+
+    # Keep the in-memory standings in step with the rewritten leaderboard
+    for team, rating in plan.changed_ratings.items():
+        standings.set_rating(team, rating)
+    if plan.changed_ratings:
+        request_leaderboard_refresh()
+
+    plan.timings["commit"] = time.perf_counter() - started
+    plan.timings["write_calls"] = calls
+    return plan
@@ -0,0 +1,96 @@
+import time
+
+# -------------------- Roster Index --------------------
+# One in-memory view of the Teams sheet: team -> players, user -> team, and the
+# precomputed mention string for every team. Anything that writes a roster calls
+# roster.invalidate(); the next lookup re-reads the sheet once. Admins also edit
+# the Teams sheet by hand, so a load older than MAX_AGE is re-read on next use too.
+
+MAX_AGE = 60   # seconds
+
+def parse_player(cell):
+    """'Name (123)' -> ('Name', '123'); cells without an id give (cell, None)."""
+    cell = cell.strip()
+    if "(" in cell and ")" in cell:
+        return cell.split(" (")[0].strip(), cell.split("(")[-1].split(")")[0].strip()
+    return cell, None
+
+class RosterIndex:
+    def __init__(self):
+        self.teams_sheet = None
+        self.teams = None        # team -> {"row": idx, "players": [(name, id)], "captain_id": id}
+        self.user_team = {}      # user id -> team
+        self.full_mentions = {}  # team -> "<@1> <@2> ..."
+        self.captain_mentions = {}
+        self.listeners = []      # called with the index after every reload
+        self.loaded_at = 0.0
+
+    def on_load(self, callback):
+        self.listeners.append(callback)
+        if self.teams is not None:
+            callback(self)
+
+    def bind(self, teams_sheet):
+        self.teams_sheet = teams_sheet
+        self.invalidate()
+
+    def invalidate(self):
+        self.teams = None
+
+    def load_rows(self, rows):
+        """Build the index from Teams sheet rows (header included)."""
+        teams, user_team, full, captains = {}, {}, {}, {}
+        for idx, row in enumerate(rows[1:], start=2):
+            if not row or not row[0].strip():
+                continue
+            team = row[0]
+            players = [parse_player(cell) for cell in row[1:7] if cell.strip()]
+            captain_id = players[0][1] if players and row[1].strip() else None
+            teams[team] = {"row": idx, "players": players, "captain_id": captain_id}
+            for _, user_id in players:
+                if user_id:
+                    user_team[user_id] = team
+            full[team] = " ".join(f"<@{uid}>" for _, uid in players if uid)
+            captains[team] = f"<@{captain_id}>" if captain_id else ""
+
+        self.teams, self.user_team = teams, user_team
+        self.full_mentions, self.captain_mentions = full, captains
+        self.loaded_at = time.monotonic()
+        for callback in self.listeners:
+            callback(self)
+
+    def ensure(self):
+        if self.teams is None or time.monotonic() - self.loaded_at > MAX_AGE:
+            if self.teams_sheet is None:
+                raise RuntimeError("Roster index used before roster.bind(teams_sheet).")
+            self.load_rows(self.teams_sheet.get_all_values())
+        return self.teams
+
+    # --- Lookups ---
+
+    def team_names(self):
+        return list(self.ensure())
+
+    def get(self, team):
+        return self.ensure().get(team)
+
+    def team_of(self, user_id):
+        self.ensure()
+        return self.user_team.get(str(user_id))
+
+    def captain_id(self, team):
+        entry = self.ensure().get(team)
+        return entry["captain_id"] if entry else None
+
+    def player_ids(self, team):
+        entry = self.ensure().get(team)
+        return [uid for _, uid in entry["players"] if uid] if entry else []
+
+    def mentions(self, team, ping_full_team=True, fallback=""):
+        """Mention string built from stored user ids, so it never needs the member cache."""
+        self.ensure()
+        text = (self.full_mentions if ping_full_team else self.captain_mentions).get(team, "")
+        return text or fallback
+
+# Shared instance; league.py binds it to the Teams sheet at startup
+roster = RosterIndex()
@@ -0,0 +1,146 @@
+import uuid
+
+from gspread.utils import rowcol_to_a1
+
+# -------------------- Row Version Stamps --------------------
+# Mutable tabs get a hidden last column holding "<row key>.<version>". A handler keeps
+# the row it read (index, values, stamp); before a delete or update the row is read
+# back and must still carry the same stamp and values. If the row moved (someone
+# inserted or deleted above it) or was edited by hand, the tab is re-read, the row
+# is found again by its key and the write is retried against the fresh copy.
+# Sheets has no compare-and-set, so the check narrows the race to one round trip
+# rather than closing it; the entity locks cover the bot's own handlers.
+
+GUARD_HEADER = "_rowver"
+MAX_ATTEMPTS = 3
+
+class RowConflict(Exception):
+    pass
+
+def new_stamp(key=None, version=0):
+    return f"{key or uuid.uuid4().hex[:10]}.{version}"
+
+def split_stamp(stamp):
+    key, _, version = str(stamp).partition(".")
+    return key, int(version) if version.isdigit() else 0
+
+class GuardedRow:
+    def __init__(self, idx, values, stamp):
+        self.idx = idx
+        self.values = values   # data cells only, padded to the data width
+        self.stamp = stamp
+
+    @property
+    def key(self):
+        return split_stamp(self.stamp)[0]
+
+class GuardedSheet:
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.col = None   # 1-based guard column
+
+    # --- Reading ---
+
+    def _pad(self, row, width):
+        return (list(row) + [""] * width)[:width]
+
+    def read(self):
+        """All data rows as GuardedRows. Adds the guard column and stamps unstamped rows in one write."""
+        data = self.sheet.get_all_values()
+        header = data[0] if data else []
+        updates = []
+
+        if GUARD_HEADER in header:
+            self.col = header.index(GUARD_HEADER) + 1
+        else:
+            self.col = max([len(header)] + [len(r) for r in data]) + 1
+            if self.sheet.col_count < self.col:
+                self.sheet.resize(cols=self.col)
+            updates.append({"range": rowcol_to_a1(1, self.col), "values": [[GUARD_HEADER]]})
+            self.sheet.hide_columns(self.col - 1, self.col)
+
+        rows = []
+        for idx, raw in enumerate(data[1:], start=2):
+            raw = self._pad(raw, self.col)
+            stamp = raw[self.col - 1]
+            if not stamp:
+                stamp = new_stamp()
+                updates.append({"range": rowcol_to_a1(idx, self.col), "values": [[stamp]]})
+            rows.append(GuardedRow(idx, raw[:self.col - 1], stamp))
+
+        if updates:
+            self.sheet.batch_update(updates)
+        return rows
+
+    def find(self, predicate):
+        return next((row for row in self.read() if predicate(row.values)), None)
+
+    # --- Conditional writes ---
+
+    def _unchanged(self, row):
+        current = self._pad(self.sheet.row_values(row.idx), self.col)
+        return current[self.col - 1] == row.stamp and current[:self.col - 1] == row.values
+
+    def _relocate(self, row, predicate):
+        """Fresh copy of the same row (by key), provided it still satisfies predicate."""
+        fresh = next((r for r in self.read() if r.key == row.key), None)
+        if fresh is None or (predicate and not predicate(fresh.values)):
+            return None
+        return fresh
+
+    def _attempt(self, row, predicate, commit):
+        for _ in range(MAX_ATTEMPTS):
+            if self.col is None:
+                self.read()
+            if self._unchanged(row):
+                commit(row)
+                return row
+            print(f"[🔁] Row {row.key} changed in '{self.sheet.title}' since it was read; re-reading.")
+            row = self._relocate(row, predicate)
+            if row is None:
+                raise RowConflict(f"Row changed in '{self.sheet.title}' and no longer matches.")
+        raise RowConflict(f"Row in '{self.sheet.title}' kept changing; gave up after {MAX_ATTEMPTS} attempts.")
+
+    def delete(self, row, predicate=None):
+        """Delete row if it is unchanged; otherwise re-read, re-check predicate(values) and retry."""
+        return self._attempt(row, predicate, lambda r: self.sheet.delete_rows(r.idx))
+
+    def update(self, row, values, predicate=None):
+        """Overwrite the row's data cells (from column A) and bump its version in one request.
+        values may be a function of the row's current values, applied to the fresh copy on retry."""
+        def commit(r):
+            key, version = split_stamp(r.stamp)
+            stamp = new_stamp(key, version + 1)
+            width = self.col - 1
+            padded = self._pad(values(list(r.values)) if callable(values) else values, width)
+            self.sheet.batch_update([
+                {"range": f"{rowcol_to_a1(r.idx, 1)}:{rowcol_to_a1(r.idx, width)}", "values": [padded]},
+                {"range": rowcol_to_a1(r.idx, self.col), "values": [[stamp]]},
+            ])
+            r.values, r.stamp = padded, stamp
+        return self._attempt(row, predicate, commit)
+
+    # --- Find-and-write helpers for best-effort cleanup ---
+
+    def delete_where(self, predicate):
+        """Delete the first row matching predicate(values). Its values, or None if none matched (anymore)."""
+        row = self.find(predicate)
+        if row is None:
+            return None
+        try:
+            self.delete(row, predicate=predicate)
+        except RowConflict as e:
+            print(f"[⚠️] {e}")
+            return None
+        return row.values
+
+    def update_where(self, predicate, change):
+        """Rewrite the first row matching predicate(values) as change(values). The new values, or None."""
+        row = self.find(predicate)
+        if row is None:
+            return None
+        try:
+            return self.update(row, change, predicate=predicate).values
+        except RowConflict as e:
+            print(f"[⚠️] {e}")
+            return None
@@ -0,0 +1,79 @@
+import asyncio
+import heapq
+import time
+
+# -------------------- Deadline Scheduler --------------------
+# One task and one min-heap for every timed expiry in the bot, instead of a timer per
+# View. Each entry is (deadline, key, kind); cancelling or rescheduling just updates
+# the deadline map and the stale heap entry is skipped when it surfaces. The task
+# sleeps until the earliest deadline and is woken early when a sooner one is added.
+
+class DeadlineScheduler:
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}   # key -> current deadline; anything else in the heap is stale
+        self._handlers = {}    # kind -> async callback(key)
+        self._wake = None
+        self._task = None
+
+    def on(self, kind, handler):
+        """Run handler(key) when a key scheduled under this kind comes due."""
+        self._handlers[kind] = handler
+
+    def schedule(self, key, when, kind):
+        """Fire at unix time `when`. Re-scheduling a key replaces its earlier deadline."""
+        self._deadlines[key] = when
+        heapq.heappush(self._heap, (when, key, kind))
+        if self._wake and self._heap[0][1] == key:
+            self._wake.set()
+
+    def cancel(self, key):
+        return self._deadlines.pop(key, None) is not None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def _compact(self):
+        # Cancelled entries linger until they surface; rebuild once they dominate the heap
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [entry for entry in self._heap if self._deadlines.get(entry[1]) == entry[0]]
+            heapq.heapify(self._heap)
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self._compact()
+            while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+
+            delay = max(0.0, self._heap[0][0] - time.time()) if self._heap else None
+            if delay:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if delay is None:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            when, key, kind = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            handler = self._handlers.get(kind)
+            if not handler:
+                print(f"[⚠️] No expiry handler for '{kind}' ({key})")
+                continue
+            try:
+                await handler(key)
+            except Exception as e:
+                print(f"[❌] Expiry handler for {key} failed: {e}")
+
+# Shared instance used by every module
+scheduler = DeadlineScheduler()
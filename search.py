@@ -0,0 +1,210 @@
+import asyncio
+import re
+from collections import defaultdict
+
+import discord
+from discord import app_commands
+
+from roster import roster
+
+# -------------------- Search Index --------------------
+# In-memory prefix + trigram index over team names and players. Team entries are
+# rebuilt whenever the roster index reloads; players come from the Players sheet once
+# and are kept current by signup/unsignup/kick/ban. Autocomplete only ever reads the
+# index, never Sheets.
+
+PREFIX_LEN = 4
+MAX_CHOICES = 25   # Discord's limit for select options and autocomplete choices
+
+def normalize(text):
+    return re.sub(r"\s+", " ", str(text).strip().lower())
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class Entry:
+    __slots__ = ("key", "label", "value", "terms", "grams")
+
+    def __init__(self, key, label, value, terms):
+        self.key = key
+        self.label = label
+        self.value = value
+        self.terms = [normalize(t) for t in terms if t]
+        self.grams = set().union(*(trigrams(t) for t in self.terms)) if self.terms else set()
+
+class SearchIndex:
+    def __init__(self):
+        self.entries = {}
+        self.by_prefix = defaultdict(set)
+        self.by_gram = defaultdict(set)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, key, label, value=None, terms=None):
+        self.remove(key)
+        entry = Entry(key, label, label if value is None else value, terms or [label])
+        self.entries[key] = entry
+        for term in entry.terms:
+            for word in term.split(" "):
+                for n in range(1, min(PREFIX_LEN, len(word)) + 1):
+                    self.by_prefix[word[:n]].add(key)
+        for gram in entry.grams:
+            self.by_gram[gram].add(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return
+        for term in entry.terms:
+            for word in term.split(" "):
+                for n in range(1, min(PREFIX_LEN, len(word)) + 1):
+                    self.by_prefix[word[:n]].discard(key)
+        for gram in entry.grams:
+            self.by_gram[gram].discard(key)
+
+    def replace_all(self, items):
+        """Rebuild from (key, label, value, terms) tuples."""
+        self.entries, self.by_prefix, self.by_gram = {}, defaultdict(set), defaultdict(set)
+        for item in items:
+            self.add(*item)
+
+    def _score(self, entry, query, query_grams):
+        best = None
+        for term in entry.terms:
+            if term == query:
+                rank = 0
+            elif term.startswith(query):
+                rank = 1
+            elif any(word.startswith(query) for word in term.split(" ")):
+                rank = 2
+            elif query in term:
+                rank = 3
+            else:
+                rank = 4
+            best = rank if best is None else min(best, rank)
+        similarity = len(entry.grams & query_grams) / len(entry.grams | query_grams) if entry.grams else 0
+        return (best, -similarity, entry.label.lower())
+
+    def search(self, query, limit=MAX_CHOICES, accept=None):
+        """Entries ranked exact > prefix > word prefix > substring > fuzzy (trigram overlap)."""
+        query = normalize(query)
+        if not query:
+            pool = self.entries.values()
+            if accept:
+                pool = [e for e in pool if accept(e)]
+            return sorted(pool, key=lambda e: e.label.lower())[:limit]
+
+        first = query.split(" ")[0]
+        candidates = set(self.by_prefix.get(first[:PREFIX_LEN], ()))
+        query_grams = trigrams(query)
+        for gram in query_grams:
+            candidates |= self.by_gram.get(gram, set())
+
+        scored = []
+        for key in candidates:
+            entry = self.entries[key]
+            if accept and not accept(entry):
+                continue
+            score = self._score(entry, query, query_grams)
+            # Fuzzy-only hits need a real overlap, otherwise every shared trigram shows up
+            if score[0] == 4 and -score[1] < 0.25:
+                continue
+            scored.append((score, entry))
+        scored.sort(key=lambda pair: pair[0])
+        return [entry for _, entry in scored[:limit]]
+
+teams = SearchIndex()
+players = SearchIndex()
+
+# -------------------- Keeping the index current --------------------
+
+def rebuild_teams(index):
+    teams.replace_all((team, team, team, [team]) for team in index.teams)
+
+def load_players(player_rows):
+    players.replace_all(
+        (row[0], f"{row[1]} ({row[0]})", row[0], [row[1], row[0]])
+        for row in player_rows if len(row) >= 2 and row[0]
+    )
+
+def add_player(user_id, name):
+    players.add(str(user_id), f"{name} ({user_id})", str(user_id), [name, str(user_id)])
+
+def remove_player(user_id):
+    players.remove(str(user_id))
+
+_refreshing = False
+
+def refresh_teams_soon():
+    """Reload the roster in a worker thread when it was invalidated; callers keep the current index."""
+    global _refreshing
+    if roster.teams is not None or _refreshing:
+        return
+    _refreshing = True
+
+    async def refresh():
+        global _refreshing
+        try:
+            await asyncio.to_thread(roster.ensure)
+        finally:
+            _refreshing = False
+
+    asyncio.get_running_loop().create_task(refresh())
+
+def team_choices(current, accept=None):
+    refresh_teams_soon()
+    return [app_commands.Choice(name=e.label[:100], value=e.value) for e in teams.search(current, accept=accept)]
+
+def player_choices(current):
+    return [app_commands.Choice(name=e.label[:100], value=e.value) for e in players.search(current)]
+
+# -------------------- Slash commands --------------------
+
+def setup_search_module(bot, players_sheet, make_panel, remove_player_action):
+    """Register /join, /challenge, /kick and /ban with autocomplete.
+
+    make_panel() returns a LeaguePanel for the join/challenge flows;
+    remove_player_action(interaction, user_id, action) runs the dev kick/ban.
+    """
+    roster.on_load(rebuild_teams)
+    load_players(players_sheet.get_all_values()[1:])
+    print(f"[DEBUG] Search index ready: {len(players)} players.")
+
+    async def autocomplete_team(interaction: discord.Interaction, current: str):
+        return team_choices(current)
+
+    async def autocomplete_opponent(interaction: discord.Interaction, current: str):
+        own = roster.team_of(interaction.user.id) if roster.teams is not None else None
+        return team_choices(current, accept=lambda e: e.value != own)
+
+    async def autocomplete_player(interaction: discord.Interaction, current: str):
+        return player_choices(current)
+
+    @app_commands.command(name="join", description="Ask a team's captain to let you join")
+    @app_commands.describe(team="Team to join")
+    @app_commands.autocomplete(team=autocomplete_team)
+    async def join(interaction: discord.Interaction, team: str):
+        await make_panel().start_join(interaction, team=team)
+
+    @app_commands.command(name="challenge", description="Propose a challenge match against a team")
+    @app_commands.describe(team="Team to challenge")
+    @app_commands.autocomplete(team=autocomplete_opponent)
+    async def challenge(interaction: discord.Interaction, team: str):
+        await make_panel().start_propose(interaction, challenge_team=team)
+
+    @app_commands.command(name="kick", description="(Dev) Remove a player from the league")
+    @app_commands.describe(player="Player name or id")
+    @app_commands.autocomplete(player=autocomplete_player)
+    async def kick(interaction: discord.Interaction, player: str):
+        await remove_player_action(interaction, player, "Kick")
+
+    @app_commands.command(name="ban", description="(Dev) Remove and ban a player from the league")
+    @app_commands.describe(player="Player name or id")
+    @app_commands.autocomplete(player=autocomplete_player)
+    async def ban(interaction: discord.Interaction, player: str):
+        await remove_player_action(interaction, player, "Ban")
+
+    for command in (join, challenge, kick, ban):
+        bot.tree.add_command(command)
@@ -0,0 +1,125 @@
+import time
+
+# -------------------- Season Schedule Planner --------------------
+
+SCHEDULE_SHEET = "Season Schedule"
+SCHEDULE_HEADERS = ["Week", "Team A", "Team B", "Match ID", "Status"]
+
+def get_or_create_sheet(spreadsheet, name, headers):
+    try:
+        sheet = spreadsheet.worksheet(name)
+    except Exception:
+        sheet = spreadsheet.add_worksheet(title=name, rows="100", cols=str(len(headers)))
+        sheet.append_row(headers)
+    return sheet
+
+def make_match_id(week, team_a, team_b):
+    # Same format generate_weekly_matches has always used
+    team_a_id, team_b_id = sorted([team_a[:3], team_b[:3]])
+    return f"Week{week}-{team_a_id}-{team_b_id}"
+
+def round_robin_rounds(teams):
+    """Yield round-robin rounds with the circle method; each round is a perfect matching.
+
+    Rounds are produced lazily, so only the rounds a season needs are ever built.
+    Once every pairing has been used the cycle repeats with home/away swapped.
+    """
+    order = list(teams)
+    if len(order) % 2:
+        order.append(None)  # bye
+    n = len(order)
+    if n < 2:
+        return
+
+    cycle = 0
+    while True:
+        rotation = list(order)
+        for r in range(n - 1):
+            pairs = []
+            for i in range(n // 2):
+                a, b = rotation[i], rotation[n - 1 - i]
+                if a is None or b is None:
+                    continue
+                if (r + cycle) % 2:
+                    a, b = b, a
+                pairs.append((a, b))
+            yield pairs
+            rotation = [rotation[0], rotation[-1]] + rotation[1:-1]
+        cycle += 1
+
+def plan_season(teams, weeks, games_per_week=1, start_week=1):
+    """Build every week's matchups up front.
+
+    With fewer rounds than a full round robin needs, the season is a balanced incomplete
+    design: every team still plays once per round and never meets an opponent twice.
+    """
+    teams = sorted(set(teams))
+    rounds = round_robin_rounds(teams)
+    schedule = []
+    for week in range(start_week, start_week + weeks):
+        for _ in range(games_per_week):
+            pairs = next(rounds, None)
+            if pairs is None:
+                return schedule
+            for team_a, team_b in pairs:
+                schedule.append([week, team_a, team_b, make_match_id(week, team_a, team_b), "Planned"])
+    return schedule
+
+def eligible_teams(team_rows, team_min_players):
+    return [row[0] for row in team_rows if row and row[0] and len([p for p in row[1:7] if p.strip()]) >= team_min_players]
+
+def save_schedule(spreadsheet, schedule):
+    """Replace the stored season with one bulk write."""
+    sheet = get_or_create_sheet(spreadsheet, SCHEDULE_SHEET, SCHEDULE_HEADERS)
+    sheet.clear()
+    sheet.append_rows([SCHEDULE_HEADERS] + schedule)
+    return sheet
+
+def load_week(schedule_rows, week_number, valid_teams):
+    """Planned rows for a week from the Season Schedule rows (no header), or None if no season schedule covers it.
+
+    Returns (matchups, rows_to_activate) where rows_to_activate are sheet row indexes.
+    Matchups involving a team that is no longer eligible are skipped.
+    """
+    valid = set(valid_teams)
+    matchups, row_indexes = [], []
+    found = False
+    for idx, row in enumerate(schedule_rows, start=2):
+        if len(row) < 5 or str(row[0]).strip() != str(week_number):
+            continue
+        found = True
+        if row[4] != "Planned":
+            continue
+        if row[1] not in valid or row[2] not in valid:
+            print(f"⚠️ Skipping planned match {row[3]}: team no longer eligible.")
+            continue
+        matchups.append((row[1], row[2], row[3]))
+        row_indexes.append(idx)
+
+    if not found:
+        return None
+    return matchups, row_indexes
+
+def mark_active(row_indexes):
+    """values_batch_update entries flipping the activated rows' status, to ride along in a bulk write."""
+    return [{"range": f"'{SCHEDULE_SHEET}'!E{idx}", "values": [["Active"]]} for idx in row_indexes]
+
+def plan_and_store(spreadsheet, config, weeks, games_per_week=None, start_week=1):
+    started = time.perf_counter()
+    team_min_players = config.team_min_players
+    if games_per_week is None:
+        games_per_week = config.weekly_games_per_team
+
+    teams_sheet = get_or_create_sheet(spreadsheet, "Teams", ["Team Name", "Captain", "Player 2", "Player 3", "Player 4", "Player 5", "Player 6"])
+    teams = eligible_teams(teams_sheet.get_all_values()[1:], team_min_players)
+    schedule = plan_season(teams, weeks, games_per_week, start_week)
+    save_schedule(spreadsheet, schedule)
+
+    full_rounds = len(teams) - 1 if len(teams) % 2 == 0 else len(teams)
+    return {
+        "teams": len(teams),
+        "matches": len(schedule),
+        "rounds": weeks * games_per_week,
+        "complete": weeks * games_per_week >= full_rounds,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
@@ -0,0 +1,190 @@
+import json
+import os
+import time
+
+# -------------------- Settings --------------------
+# config.json parsed and validated once, shared by every module. Values are plain
+# attributes (settings.team_min_players) already coerced to the right type. The file
+# is re-checked at most every few seconds; a valid edit is swapped in as a whole, an
+# invalid one is reported and the previous values stay in effect.
+
+CONFIG_FILE = "config.json"
+CHECK_INTERVAL = 2.0
+
+class ConfigError(ValueError):
+    pass
+
+REQUIRED = object()
+
+def snowflake(value):
+    return int(value) if value not in (None, "", 0) else None
+
+def snowflake_list(value):
+    if not isinstance(value, list):
+        raise ValueError("expected a list of ids")
+    return [int(v) for v in value]
+
+def minutes_list(value):
+    if not isinstance(value, list):
+        raise ValueError("expected a list of minutes")
+    minutes = sorted({int(v) for v in value}, reverse=True)
+    if any(m < 1 for m in minutes):
+        raise ValueError("every entry must be at least 1")
+    return minutes
+
+def choice(*options):
+    def check(value):
+        value = str(value).strip().lower()
+        if value not in options:
+            raise ValueError(f"expected one of {', '.join(options)}, got {value!r}")
+        return value
+    return check
+
+def boolean(value):
+    if isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in ("true", "yes", "1"):
+        return True
+    if str(value).strip().lower() in ("false", "no", "0"):
+        return False
+    raise ValueError(f"expected true/false, got {value!r}")
+
+# key -> (type, default)
+FIELDS = {
+    "bot_token": (str, REQUIRED),
+    "sheet_name": (str, REQUIRED),
+    "dev_override_ids": (snowflake_list, []),
+
+    "dev_channel_id": (snowflake, None),
+    "panel_channel_id": (snowflake, None),
+    "notifications_channel_id": (snowflake, None),
+    "match_channel_id": (snowflake, None),
+    "weekly_channel_id": (snowflake, None),
+    "score_channel_id": (snowflake, None),
+    "results_channel_id": (snowflake, None),
+    "scheduled_channel_id": (snowflake, None),
+    "leaderboard_channel_id": (snowflake, None),
+    "fallback_category_id": (snowflake, None),
+    "fallback_thread_channel_id": (snowflake, None),
+    "fallback_mode": (choice("channel", "thread"), "channel"),
+
+    "match_ping_full_team": (boolean, True),
+    "forfeit_affects_elo": (boolean, True),
+    "weekly_challenge_limit": (int, 2),
+    "minimum_teams_start": (int, 4),
+    "team_min_players": (int, 3),
+    "team_max_players": (int, 6),
+    "elo_win_points": (int, 25),
+    "elo_loss_points": (int, -25),
+    "weekly_games_per_team": (int, 2),
+    "rematch_cooldown_weeks": (int, 2),
+    "match_length_minutes": (int, 60),
+    "leaderboard_page_size": (int, 20),
+    "use_webhook_announcements": (boolean, False),
+    "proposal_timeout_minutes": (int, 5),
+    "role_free_teams": (boolean, False),
+    "dm_recheck_minutes": (int, 360),
+    "reminder_offsets_minutes": (minutes_list, [1440, 30]),
+    "elo_k_factor": (int, 32),
+}
+
+def validate(raw):
+    """Coerce every known key and check cross-field rules. Unknown keys pass through untouched."""
+    if not isinstance(raw, dict):
+        raise ConfigError("config.json must contain a JSON object")
+
+    values = dict(raw)
+    errors = []
+    for key, (kind, default) in FIELDS.items():
+        if key not in raw or raw[key] is None:
+            if default is REQUIRED:
+                errors.append(f"'{key}' is required")
+            values[key] = list(default) if isinstance(default, list) else default
+            continue
+        try:
+            values[key] = kind(raw[key])
+        except (TypeError, ValueError) as e:
+            errors.append(f"'{key}': {e}")
+
+    if not errors:
+        if not 1 <= values["team_min_players"] <= values["team_max_players"] <= 6:
+            errors.append("team sizes must satisfy 1 <= team_min_players <= team_max_players <= 6")
+        if values["fallback_mode"] == "thread" and not values["fallback_thread_channel_id"]:
+            errors.append("fallback_mode 'thread' needs fallback_thread_channel_id")
+        for key in ("weekly_games_per_team", "match_length_minutes", "leaderboard_page_size", "proposal_timeout_minutes", "dm_recheck_minutes", "elo_k_factor"):
+            if values[key] < 1:
+                errors.append(f"'{key}' must be at least 1")
+
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return values
+
+class Settings:
+    def __init__(self, path=CONFIG_FILE):
+        self._path = path
+        self._values = {}
+        self._mtime = None
+        self._checked = 0.0
+        self._listeners = []
+        self.reload()
+
+    def reload(self):
+        """Parse and validate the file, then swap the new values in at once."""
+        mtime = os.path.getmtime(self._path)
+        try:
+            with open(self._path) as f:
+                raw = json.load(f)
+        except ValueError as e:
+            raise ConfigError(f"{self._path} is not valid JSON: {e}")
+        values = validate(raw)
+
+        self._values = values
+        self._mtime = mtime
+        for callback in self._listeners:
+            callback(self)
+
+    def refresh(self):
+        """Reload if the file changed on disk. Invalid edits are reported and ignored."""
+        now = time.monotonic()
+        if now - self._checked < CHECK_INTERVAL:
+            return False
+        self._checked = now
+        try:
+            if os.path.getmtime(self._path) == self._mtime:
+                return False
+            self.reload()
+            print(f"[⚙️] Reloaded {self._path}")
+            return True
+        except (OSError, ConfigError) as e:
+            print(f"[❌] Ignoring config change: {e}")
+            self._mtime = os.path.getmtime(self._path) if os.path.exists(self._path) else self._mtime
+            return False
+
+    def on_reload(self, callback):
+        """Run callback(settings) after every successful reload."""
+        self._listeners.append(callback)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        self.refresh()
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"Unknown config key '{name}'")
+
+    # dict-style access for code that still passes config around as a mapping
+    def get(self, key, default=None):
+        self.refresh()
+        value = self._values.get(key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        self.refresh()
+        return self._values[key]
+
+    def __contains__(self, key):
+        return key in self._values
+
+# Shared instance; import this rather than opening config.json
+settings = Settings()
@@ -0,0 +1,214 @@
+import discord
+import os
+from bisect import bisect_left, insort
+from roster import roster
+
+# -------------------- Order-Statistic Standings --------------------
+
+class Standings:
+    """In-memory rating index answering rank / k-th team queries in O(log n).
+
+    A Fenwick tree counts teams per rating value; teams that share a rating are kept
+    in a small sorted bucket so ties are ordered by name.
+    """
+
+    def __init__(self):
+        self.ratings = {}    # team -> rating
+        self.buckets = {}    # rating -> sorted [team, ...]
+        self.low = 0
+        self.tree = [0] * 2  # 1-based Fenwick tree over ratings low .. low + len(tree) - 2
+        self.total = 0
+
+    def __len__(self):
+        return self.total
+
+    def __contains__(self, team):
+        return team in self.ratings
+
+    # --- Fenwick helpers ---
+
+    def _span(self):
+        return len(self.tree) - 1
+
+    def _fits(self, rating):
+        return self.low <= rating < self.low + self._span()
+
+    def _rebuild(self, rating):
+        # Grow the covered rating range (doubling) so the new rating fits, then re-add every bucket
+        values = list(self.ratings.values()) + [rating]
+        low, high = min(values), max(values)
+        span = max(self._span(), 64)
+        while span <= (high - low) * 2:
+            span *= 2
+        self.low = low - span // 4
+        self.tree = [0] * (span + 1)
+        for r, teams in self.buckets.items():
+            self._add(r, len(teams))
+
+    def _add(self, rating, delta):
+        i = rating - self.low + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def _count_at_or_below(self, rating):
+        i = min(rating - self.low + 1, self._span())
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def _rating_at_ascending(self, position):
+        # Smallest rating whose cumulative count (ascending) reaches `position`
+        idx, step = 0, 1
+        while step * 2 <= self._span():
+            step *= 2
+        while step:
+            nxt = idx + step
+            if nxt <= self._span() and self.tree[nxt] < position:
+                idx = nxt
+                position -= self.tree[nxt]
+            step //= 2
+        return idx + self.low
+
+    # --- Public API ---
+
+    def clear(self):
+        self.__init__()
+
+    def load(self, rows):
+        """Load Leaderboard rows (Team Name, Rating, ...) without the header."""
+        self.clear()
+        for row in rows:
+            if not row or not row[0].strip():
+                continue
+            try:
+                self.set_rating(row[0], int(row[1]))
+            except (ValueError, IndexError):
+                print(f"⚠️ Skipping leaderboard row with bad rating: {row}")
+
+    def set_rating(self, team, rating):
+        rating = int(rating)
+        old = self.ratings.get(team)
+        if old == rating:
+            return
+        if old is not None:
+            self.remove(team)
+        if not self._fits(rating):
+            self._rebuild(rating)
+        self.ratings[team] = rating
+        insort(self.buckets.setdefault(rating, []), team)
+        self._add(rating, 1)
+        self.total += 1
+
+    def remove(self, team):
+        rating = self.ratings.pop(team, None)
+        if rating is None:
+            return
+        bucket = self.buckets[rating]
+        bucket.pop(bisect_left(bucket, team))
+        if not bucket:
+            del self.buckets[rating]
+        self._add(rating, -1)
+        self.total -= 1
+
+    def rank(self, team):
+        """1-based rank (highest rating first) or None if the team is unknown."""
+        rating = self.ratings.get(team)
+        if rating is None:
+            return None
+        above = self.total - self._count_at_or_below(rating)
+        return above + bisect_left(self.buckets[rating], team) + 1
+
+    def team_at(self, rank):
+        """(team, rating) at a 1-based rank, or None if out of range."""
+        if rank < 1 or rank > self.total:
+            return None
+        rating = self._rating_at_ascending(self.total - rank + 1)
+        above = self.total - self._count_at_or_below(rating)
+        return self.buckets[rating][rank - above - 1], rating
+
+    def neighbours(self, team):
+        """Rank, rating and the teams directly above/below with their point gaps."""
+        rank = self.rank(team)
+        if rank is None:
+            return None
+        rating = self.ratings[team]
+        above = self.team_at(rank - 1)
+        below = self.team_at(rank + 1)
+        return {
+            "team": team,
+            "rank": rank,
+            "rating": rating,
+            "total": self.total,
+            "above": (above[0], above[1], above[1] - rating) if above else None,
+            "below": (below[0], below[1], rating - below[1]) if below else None,
+        }
+
+# Shared instance kept in sync by every rating write (see match.update_team_rating)
+standings = Standings()
+
+# Touched after rating writes; leaderboard.py watches its mtime and re-posts without waiting for its 5 minute poll
+REFRESH_FILE = "leaderboard_refresh"
+
+def request_leaderboard_refresh():
+    try:
+        with open(REFRESH_FILE, "a"):
+            pass
+        os.utime(REFRESH_FILE)
+    except OSError as e:
+        print(f"[WARN] Could not request leaderboard refresh: {e}")
+
+def find_team(name):
+    """Case-insensitive team lookup against the standings."""
+    if name in standings:
+        return name
+    lowered = name.strip().lower()
+    return next((t for t in standings.ratings if t.lower() == lowered), None)
+
+def build_rank_embed(team):
+    info = standings.neighbours(team)
+    if not info:
+        return None
+
+    embed = discord.Embed(
+        title=f"📈 {team}",
+        description=f"Rank **#{info['rank']}** of {info['total']} — **{info['rating']}** points",
+        color=discord.Color.purple()
+    )
+    if info["above"]:
+        name, rating, gap = info["above"]
+        embed.add_field(name=f"⬆️ #{info['rank'] - 1}", value=f"**{name}** — {rating} ({gap} pts ahead)", inline=False)
+    if info["below"]:
+        name, rating, gap = info["below"]
+        embed.add_field(name=f"⬇️ #{info['rank'] + 1}", value=f"**{name}** — {rating} ({gap} pts behind)", inline=False)
+    return embed
+
+async def send_rank(interaction, team_name=None):
+    if team_name:
+        team = find_team(team_name)
+    else:
+        team = roster.team_of(interaction.user.id)
+        if not team:
+            await interaction.response.send_message("❗ You are not on a team. Use `/rank team:<name>` to look one up.", ephemeral=True)
+            return
+
+    embed = build_rank_embed(team) if team else None
+    if not embed:
+        await interaction.response.send_message("❗ That team is not on the leaderboard yet.", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def setup_standings_module(bot, leaderboard_sheet):
+    from discord import app_commands
+
+    standings.load(leaderboard_sheet.get_all_values()[1:])
+    print(f"[DEBUG] Loaded {len(standings)} teams into standings index.")
+
+    @app_commands.command(name="rank", description="Show a team's leaderboard rank and neighbours")
+    @app_commands.describe(team="Team name (defaults to your team)")
+    async def rank(interaction: discord.Interaction, team: str = None):
+        await send_rank(interaction, team)
+
+    bot.tree.add_command(rank)
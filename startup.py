@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+# -------------------- Startup Pipeline --------------------
+# on_ready fires again on every reconnect and resume; the real startup work runs once
+# per process. Independent steps run concurrently, each one timed, and the command
+# tree is only synced when its contents actually changed.
+
+STATE_FILE = "startup_state.json"
+
+_started = False
+_lock = asyncio.Lock()
+timings = {}
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return {}
+
+def save_state(state):
+    tmp = f"{STATE_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+def command_tree_hash(bot):
+    payload = sorted(
+        (command.to_dict(bot.tree) for command in bot.tree.get_commands()),
+        key=lambda c: (c.get("type", 1), c["name"])
+    )
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_commands(bot, force=False):
+    """Sync the app-command tree only if it differs from the last synced one. Returns True if synced."""
+    state = load_state()
+    digest = command_tree_hash(bot)
+    key = str(bot.application_id)
+    if not force and state.get("command_hashes", {}).get(key) == digest:
+        print("[⚡] Command tree unchanged; skipping sync.")
+        return False
+
+    await bot.tree.sync()
+    state.setdefault("command_hashes", {})[key] = digest
+    save_state(state)
+    print(f"[🔁] Synced {len(bot.tree.get_commands())} app commands.")
+    return True
+
+async def timed(name, step):
+    started = time.perf_counter()
+    try:
+        await step()
+        return None
+    except Exception as e:
+        print(f"[❌] Startup step '{name}' failed: {e}")
+        return e
+    finally:
+        timings[name] = time.perf_counter() - started
+
+async def run_once(steps):
+    """Run (name, async callable) steps concurrently, once per process. Returns False on repeat calls."""
+    global _started
+    async with _lock:
+        if _started:
+            print("[🔌] Reconnected; startup already done.")
+            return False
+        _started = True
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(name, step) for name, step in steps))
+    timings["total"] = time.perf_counter() - started
+
+    breakdown = ", ".join(f"{name} {timings[name] * 1000:.0f} ms" for name, _ in steps)
+    print(f"[🚀] Startup finished in {timings['total'] * 1000:.0f} ms ({breakdown})")
+    return True
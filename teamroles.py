@@ -0,0 +1,76 @@
+import discord
+
+from roster import roster
+from settings import settings
+
+# -------------------- Team Roles --------------------
+# Team and captain membership is authoritative in the Teams sheet (through the roster
+# index); captain checks and mentions read the index, never role membership. Discord
+# roles are only a mirror for servers that want them. With "role_free_teams": true no
+# roles are made unless the captain opts in when creating the team, so a league is
+# not capped by Discord's 250 roles per guild and creating a team costs no role
+# calls. A team has roles exactly when its "Team X" role exists.
+
+def team_role(guild, team_name):
+    return discord.utils.get(guild.roles, name=f"Team {team_name}")
+
+def captain_role(guild, team_name):
+    return discord.utils.get(guild.roles, name=f"Team {team_name} Captain")
+
+def wants_roles(opt_in=False):
+    return not settings.role_free_teams or opt_in
+
+async def member(guild, user_id):
+    """Guild member by id from the cache, falling back to one fetch. None if they left."""
+    if not user_id:
+        return None
+    found = guild.get_member(int(user_id))
+    if found:
+        return found
+    try:
+        return await guild.fetch_member(int(user_id))
+    except discord.NotFound:
+        return None
+
+async def captain_member(guild, team_name):
+    return await member(guild, roster.captain_id(team_name))
+
+def is_captain(user_id, team_name):
+    return roster.captain_id(team_name) == str(user_id)
+
+# --- Role mirror (every call is a no-op for teams without roles) ---
+
+async def create(guild, team_name, captain, opt_in=False):
+    if not wants_roles(opt_in):
+        return False
+    role = await guild.create_role(name=f"Team {team_name}")
+    cap_role = await guild.create_role(name=f"Team {team_name} Captain")
+    await captain.add_roles(role, cap_role)
+    return True
+
+async def add_member(guild, team_name, user):
+    role = team_role(guild, team_name)
+    if role:
+        await user.add_roles(role)
+
+async def remove_member(guild, team_name, user):
+    role = team_role(guild, team_name)
+    if role:
+        try:
+            await user.remove_roles(role)
+        except discord.Forbidden:
+            print(f"❗ Failed to remove role from {user.display_name}")
+
+async def move_captain(guild, team_name, old_captain, new_captain):
+    role = captain_role(guild, team_name)
+    if not role:
+        return
+    if old_captain:
+        await old_captain.remove_roles(role)
+    if new_captain:
+        await new_captain.add_roles(role)
+
+async def delete(guild, team_name):
+    for role in (team_role(guild, team_name), captain_role(guild, team_name)):
+        if role:
+            await role.delete()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The bot's modules live flat at the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)   # settings reads config.json from the working directory
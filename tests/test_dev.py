@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import dev
+import search as search_index
+from settings import settings
+
+class Response:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content, ephemeral=False):
+        self.sent.append(content)
+
+    async def defer(self, ephemeral=False):
+        pass
+
+class Followup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content, ephemeral=False):
+        self.sent.append(content)
+
+def make_interaction(user_id):
+    return SimpleNamespace(
+        user=SimpleNamespace(id=user_id, roles=[]),
+        response=Response(),
+        followup=Followup(),
+        client=SimpleNamespace(spreadsheet=None),
+    )
+
+def test_remove_player_refuses_non_dev(monkeypatch):
+    monkeypatch.setitem(settings._values, "dev_override_ids", [42])
+    monkeypatch.setattr(dev, "remove_league_player", lambda *a: pytest.fail("removed without permission"))
+    interaction = make_interaction(7)
+
+    asyncio.run(dev.slash_remove_player(interaction, "123", "Kick"))
+
+    assert interaction.response.sent == ["❗ No permission."]
+
+def test_remove_player_runs_for_dev(monkeypatch):
+    monkeypatch.setitem(settings._values, "dev_override_ids", [42])
+    calls = []
+    monkeypatch.setattr(dev, "remove_league_player", lambda sheet, player, action: calls.append((player, action)) or [player, "Alice"])
+    search_index.add_player(123, "Alice")
+    interaction = make_interaction(42)
+    try:
+        asyncio.run(dev.slash_remove_player(interaction, "123", "Kick"))
+    finally:
+        search_index.remove_player(123)
+
+    assert calls == [("123", "Kick")]
+    assert interaction.followup.sent == ["✅ Kicked **Alice**."]
@@ -0,0 +1,57 @@
+import fix
+from rowguard import GUARD_HEADER
+
+class FakeSheet:
+    def __init__(self, rows):
+        self.rows = [list(r) for r in rows]
+        self.cleared = False
+
+    def get_all_values(self):
+        return [list(r) for r in self.rows]
+
+    def clear(self):
+        self.cleared = True
+        self.rows = []
+
+    def append_row(self, row):
+        self.rows.append(list(row))
+
+class FakeSpreadsheet:
+    def __init__(self, sheets):
+        self.sheets = sheets
+
+    def worksheet(self, name):
+        return self.sheets[name]
+
+TEAMS = fix.SHEETS["Teams"]
+
+def guarded_teams():
+    return FakeSheet([
+        TEAMS + [GUARD_HEADER],
+        ["Alpha", "cap (1)", "", "", "", "", "", "", "a1b2c3d4e5.0"],
+        ["Bravo", "cap (2)", "p (3)", "", "", "", "", "Yes", "f6a7b8c9d0.2"],
+    ])
+
+def test_headers_match_ignores_guard_column():
+    assert fix.headers_match(TEAMS + [GUARD_HEADER], TEAMS)
+    assert fix.headers_match(TEAMS + ["", GUARD_HEADER], TEAMS)
+    assert fix.headers_match(TEAMS, TEAMS)
+    assert not fix.headers_match(TEAMS[:-1] + [GUARD_HEADER], TEAMS)
+
+def test_header_check_keeps_guarded_tab():
+    sheet = guarded_teams()
+    before = sheet.get_all_values()
+    assert fix.get_or_create_sheet(FakeSpreadsheet({"Teams": sheet}), "Teams", TEAMS) is sheet
+    assert not sheet.cleared
+    assert sheet.get_all_values() == before
+
+def test_fix_sheet_keeps_rows_and_stamps():
+    sheet = guarded_teams()
+    before = sheet.get_all_values()
+    fix.fix_sheet(FakeSpreadsheet({"Teams": sheet}), "Teams", TEAMS)
+    assert sheet.get_all_values() == before
+
+def test_header_check_still_repairs_wrong_headers():
+    sheet = FakeSheet([["Team", "Cap"], ["Alpha", "cap (1)"]])
+    fix.get_or_create_sheet(FakeSpreadsheet({"Teams": sheet}), "Teams", TEAMS)
+    assert sheet.get_all_values() == [TEAMS]
@@ -0,0 +1,70 @@
+from gspread.utils import a1_to_rowcol
+
+from rowguard import GUARD_HEADER, GuardedSheet
+
+class MemorySheet:
+    """Just enough of a gspread Worksheet for GuardedSheet."""
+    title = "Matches"
+
+    def __init__(self, rows):
+        self.rows = [list(r) for r in rows]
+        self.col_count = max(len(r) for r in rows)
+
+    def get_all_values(self):
+        width = max(len(r) for r in self.rows)
+        return [r + [""] * (width - len(r)) for r in self.rows]
+
+    def row_values(self, idx):
+        return list(self.rows[idx - 1]) if idx <= len(self.rows) else []
+
+    def resize(self, cols):
+        self.col_count = cols
+
+    def hide_columns(self, start, end):
+        pass
+
+    def _set(self, row, col, value):
+        cells = self.rows[row - 1]
+        cells += [""] * (col - len(cells))
+        cells[col - 1] = value
+
+    def batch_update(self, updates):
+        for update in updates:
+            start = update["range"].split(":")[0]
+            row, col = a1_to_rowcol(start)
+            for offset, value in enumerate(update["values"][0]):
+                self._set(row, col + offset, value)
+
+    def delete_rows(self, idx):
+        del self.rows[idx - 1]
+
+def matches():
+    return MemorySheet([
+        ["Match ID", "Team A", "Team B", "Status"],
+        ["1", "Alpha", "Bravo", "Scheduled"],
+        ["2", "Charlie", "Delta", "Scheduled"],
+    ])
+
+def test_delete_where_follows_a_shifted_row():
+    sheet = matches()
+    guard = GuardedSheet(sheet)
+    row = guard.find(lambda v: v[0] == "2")
+    sheet.delete_rows(2)   # someone removes the row above it
+    guard.delete(row, predicate=lambda v: v[0] == "2")
+    assert [r[0] for r in sheet.rows] == ["Match ID"]
+
+def test_update_where_applies_change_and_bumps_version():
+    sheet = matches()
+    guard = GuardedSheet(sheet)
+    values = guard.update_where(lambda v: v[0] == "1", lambda v: v[:3] + ["Finished"])
+    assert values == ["1", "Alpha", "Bravo", "Finished"]
+    assert sheet.rows[0][-1] == GUARD_HEADER
+    assert sheet.rows[1][-1].endswith(".1")
+
+def test_delete_where_skips_rows_that_stopped_matching():
+    sheet = matches()
+    guard = GuardedSheet(sheet)
+    guard.read()
+    sheet.rows[1][3] = "Cancelled"   # edited by hand after the read
+    assert guard.delete_where(lambda v: v[0] == "1" and v[3] == "Scheduled") is None
+    assert len(sheet.rows) == 3
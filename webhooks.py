@@ -0,0 +1,118 @@
+import json
+import os
+
+import discord
+
+from outbound import outbound, NOTIFY
+
+# -------------------- Announcement Webhooks --------------------
+# Optional ("use_webhook_announcements": true). One webhook per announcement channel,
+# created once and cached in webhooks.json. One-way posts go out through the webhook,
+# which has its own rate-limit bucket, so they no longer share the bot's channel
+# budget. Anything with buttons (a view) still goes through the bot.
+
+WEBHOOK_NAME = "League Announcements"
+WEBHOOK_FILE = "webhooks.json"
+ANNOUNCE_CHANNEL_KEYS = ["notifications_channel_id", "match_channel_id", "weekly_channel_id", "score_channel_id", "scheduled_channel_id"]
+
+class WebhookRouter:
+    def __init__(self):
+        self.bot = None
+        self.enabled = False
+        self.channel_ids = set()
+        self.webhooks = {}   # channel id -> discord.Webhook
+        self.stats = {"webhook": 0, "bot": 0}
+
+    def configure(self, bot, config):
+        self.bot = bot
+        self.enabled = config.use_webhook_announcements
+        self.channel_ids = {config.get(key) for key in ANNOUNCE_CHANNEL_KEYS if config.get(key)}
+        self.webhooks = {}
+
+    # --- Storage ---
+
+    def _load_urls(self):
+        if not os.path.exists(WEBHOOK_FILE):
+            return {}
+        try:
+            with open(WEBHOOK_FILE) as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return {}
+
+    def _save_url(self, channel_id, url):
+        urls = self._load_urls()
+        if url is None:
+            urls.pop(str(channel_id), None)
+        else:
+            urls[str(channel_id)] = url
+        tmp = f"{WEBHOOK_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(urls, f, indent=2)
+        os.replace(tmp, WEBHOOK_FILE)
+
+    # --- Lookup ---
+
+    async def webhook_for(self, channel):
+        """Cached webhook for an announcement channel, creating it on first use. None if unavailable."""
+        if not self.enabled or channel.id not in self.channel_ids or not isinstance(channel, discord.TextChannel):
+            return None
+        if channel.id in self.webhooks:
+            return self.webhooks[channel.id]
+
+        webhook = None
+        url = self._load_urls().get(str(channel.id))
+        if url:
+            webhook = discord.Webhook.from_url(url, client=self.bot)
+        else:
+            try:
+                existing = [w for w in await channel.webhooks() if w.name == WEBHOOK_NAME and w.token]
+                webhook = existing[0] if existing else await channel.create_webhook(name=WEBHOOK_NAME)
+                self._save_url(channel.id, webhook.url)
+                print(f"[🔗] Using webhook for #{channel.name}")
+            except discord.Forbidden:
+                print(f"[⚠️] Missing Manage Webhooks in #{channel.name}; announcing with the bot instead.")
+            except discord.HTTPException as e:
+                print(f"[⚠️] Could not create webhook for #{channel.name}: {e}")
+
+        self.webhooks[channel.id] = webhook
+        return webhook
+
+    def forget(self, channel_id):
+        self.webhooks.pop(channel_id, None)
+        self._save_url(channel_id, None)
+
+    # --- Sending ---
+
+    async def announce(self, channel, content=None, *, priority=NOTIFY, **kwargs):
+        """Post a one-way announcement, through the channel's webhook when enabled."""
+        webhook = None if "view" in kwargs else await self.webhook_for(channel)
+        if webhook is None:
+            self.stats["bot"] += 1
+            return await outbound.send(channel, content, priority=priority, **kwargs)
+
+        me = channel.guild.me
+        send_kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        if content is not None:
+            send_kwargs["content"] = content
+        try:
+            message = await outbound.submit(
+                priority, ("webhook", webhook.id),
+                lambda: webhook.send(
+                    username=me.display_name,
+                    avatar_url=me.display_avatar.url,
+                    wait=True,
+                    **send_kwargs
+                )
+            )
+            self.stats["webhook"] += 1
+            return message
+        except discord.NotFound:
+            # Someone deleted the webhook; drop it and fall back to the bot for this post
+            print(f"[⚠️] Webhook for #{channel.name} is gone; recreating on next announcement.")
+            self.forget(channel.id)
+            self.stats["bot"] += 1
+            return await outbound.send(channel, content, priority=priority, **kwargs)
+
+# Shared instance; league.py configures it at startup
+webhooks = WebhookRouter()